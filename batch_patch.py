@@ -0,0 +1,135 @@
+"""
+Headless batch patcher: applies one layout spec (offsets and colors) to many .big files.
+Does not import tkinter or config, so it runs on build hosts without a display.
+
+Layout spec (JSON), labels as in offsets.json:
+    {
+        "offsets": {"Home Team Name X": 120.5, "Time Text Size": 21},
+        "colors": {"Home Team Name Color": "#FFFFFF", "Added Time Text Color": "BLACK"}
+    }
+
+Usage: python batch_patch.py layout.json "mods/*.big" other.big [--workers N] [--processes] [--dry-run]
+"""
+import os
+import sys
+import glob
+import json
+import logging
+import argparse
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from journal import JournalError, recover as recover_journal, write_transaction
+from layout import LayoutError, ScoreboardLayout, encode_values, plan_writes
+from offsets_db import OFFSETS_JSON_PATH, load_database
+from utils import detection_order, format_filesize, read_internal_name
+
+
+@dataclass
+class PatchResult:
+    path: str
+    ok: bool
+    internal_name: Optional[str] = None
+    writes: int = 0
+    bytes_written: int = 0
+    message: str = ""
+
+
+def expand_paths(patterns: List[str]) -> List[str]:
+    """Expands globs (Windows shells do not) and drops duplicates while keeping order."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            logging.warning(f"No files match '{pattern}'")
+        paths.extend(matches)
+    return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+
+def patch_file(path: str, layouts: Dict[str, ScoreboardLayout], encoded_offsets: Dict[str, bytes],
+               encoded_colors: Dict[str, bytes], dry_run: bool = False) -> PatchResult:
+    """Resolves one file's layout, checks every address is inside the file, then writes."""
+    if not os.path.isfile(path):
+        return PatchResult(path, False, message="File not found")
+    internal_name = read_internal_name(path, detection_order(layouts))
+    if not internal_name:
+        return PatchResult(path, False, message="No internal scoreboard name detected")
+    try:
+        if internal_name not in layouts:
+            raise LayoutError(f"Configuration for '{internal_name}' not found in offsets.json.")
+        writes = plan_writes(layouts[internal_name], encoded_offsets, encoded_colors)
+        file_size = os.path.getsize(path)
+        out_of_range = [addr for addr, data in writes if addr + len(data) > file_size]
+        if out_of_range:
+            raise LayoutError(f"Addresses beyond end of file ({file_size} bytes): "
+                              f"{', '.join(hex(a) for a in sorted(out_of_range))}")
+        if dry_run:
+            return PatchResult(path, True, internal_name, len(writes), 0, "Dry run, nothing written")
+        recovery = recover_journal(path)
+        if recovery:
+            logging.warning(f"{path}: {recovery} before patching")
+        written = write_transaction(path, writes)
+        return PatchResult(path, True, internal_name, len(writes), written)
+    except (LayoutError, JournalError, OSError) as e:
+        return PatchResult(path, False, internal_name, message=str(e))
+
+
+def run_batch(spec: Dict[str, Any], paths: List[str], layouts: Dict[str, ScoreboardLayout],
+              max_workers: Optional[int] = None, use_processes: bool = False, dry_run: bool = False) -> List[PatchResult]:
+    """Validates the whole spec before any file is touched, then patches files concurrently."""
+    encoded_offsets, encoded_colors = encode_values(spec.get("offsets", {}), spec.get("colors", {}))
+    if not encoded_offsets and not encoded_colors:
+        raise LayoutError("Layout spec contains no offsets or colors")
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_cls(max_workers=max_workers) as pool:
+        futures = [pool.submit(patch_file, p, layouts, encoded_offsets, encoded_colors, dry_run) for p in paths]
+        return [fut.result() for fut in futures]
+
+
+def print_report(results: List[PatchResult]):
+    for res in results:
+        if res.ok:
+            detail = res.message or f"{res.writes} writes, {format_filesize(res.bytes_written)}"
+            print(f"OK      {res.path} [{res.internal_name}] {detail}")
+        else:
+            name = f" [{res.internal_name}]" if res.internal_name else ""
+            print(f"FAILED  {res.path}{name} {res.message}")
+    failed = sum(1 for r in results if not r.ok)
+    print(f"{len(results) - failed} patched, {failed} failed, {len(results)} total")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply a scoreboard layout spec to many .big files.")
+    parser.add_argument("spec", help="Layout spec JSON with 'offsets' and/or 'colors' keyed by label")
+    parser.add_argument("files", nargs="+", help=".big files or glob patterns")
+    parser.add_argument("--offsets", default=OFFSETS_JSON_PATH, help="Path to offsets.json")
+    parser.add_argument("--workers", type=int, default=None, help="Maximum concurrent files")
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of threads")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and resolve only; write nothing")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    try:
+        with open(args.spec, 'r') as f:
+            spec = json.load(f)
+        layouts = load_database(args.offsets).layouts
+    except (OSError, json.JSONDecodeError, LayoutError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    paths = expand_paths(args.files)
+    if not paths:
+        print("Error: no input files", file=sys.stderr)
+        return 2
+    try:
+        results = run_batch(spec, paths, layouts, args.workers, args.processes, args.dry_run)
+    except LayoutError as e:
+        print(f"Invalid layout spec: {e}", file=sys.stderr)
+        return 2
+    print_report(results)
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Speed and quality benchmark for the built-in BC1/BC3 DDS encoder.
+Encodes a synthetic texture, any PNG files given and the DDS textures of any .big
+files given, and reports encode time and PSNR against the source for dds.encode_dds,
+Pillow's own DDS writer (when the installed version has one) and texconv.exe
+(when it can run on this platform).
+
+Usage: python benchmarks/bench_dds_encode.py [image.png | archive.big ...]
+"""
+import io
+import os
+import sys
+import time
+import logging
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+from dds import encode_dds, open_dds_image
+from file_io import FifaBigFile
+
+TEXCONV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "texconv.exe")
+PIL_PIXEL_FORMATS = {"BC1": "DXT1", "BC3": "DXT5"}
+
+
+def psnr(reference, candidate, channels, mask=None) -> float:
+    """PSNR over the given channels, counting only pixels where mask (if given) is set."""
+    ref = np.asarray(reference, dtype=np.float64)[..., channels]
+    cand = np.asarray(candidate, dtype=np.float64)[..., channels]
+    if mask is not None:
+        ref, cand = ref[mask], cand[mask]
+    mse = ((ref - cand) ** 2).mean()
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def make_synthetic_image(size: int = 512) -> Image.Image:
+    """Gradients, a smooth pattern, noise and an alpha ramp: a rough stand-in for scoreboard art."""
+    rng = np.random.default_rng(size)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float64)
+    rgba = np.stack((x * 255 / size, y * 255 / size,
+                     128 + 100 * np.sin(x / 17) * np.cos(y / 23),
+                     255 * x / size), axis=-1)
+    rgba[..., :3] += rng.normal(0, 6, (size, size, 3))
+    return Image.fromarray(np.clip(rgba, 0, 255).astype(np.uint8), "RGBA")
+
+
+def encode_builtin(image: Image.Image, fmt: str) -> bytes:
+    return encode_dds(image, fmt, mipmaps=False)
+
+
+def encode_pillow(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, "DDS", pixel_format=PIL_PIXEL_FORMATS[fmt])
+    return buffer.getvalue()
+
+
+def encode_texconv(image: Image.Image, fmt: str) -> bytes:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "source.png")
+        image.save(source)
+        subprocess.run([TEXCONV_PATH, "-y", "-f", f"{fmt}_UNORM", "-m", "1", "-o", temp_dir, source],
+                       check=True, capture_output=True)
+        with open(os.path.join(temp_dir, "source.dds"), "rb") as f:
+            return f.read()
+
+
+def available_encoders():
+    encoders = [("built-in", encode_builtin)]
+    try:
+        encode_pillow(Image.new("RGBA", (4, 4)), "BC3")
+        encoders.append(("pillow", encode_pillow))
+    except Exception as e:
+        logging.info(f"Pillow DDS writer unavailable: {e}")
+    if os.name == "nt" and os.path.isfile(TEXCONV_PATH):
+        encoders.append(("texconv", encode_texconv))
+    return encoders
+
+
+def report(label: str, image: Image.Image, encoders, repeat: int = 3):
+    source = image.convert("RGBA")
+    # BC1 punch-through pixels (alpha below 128) decode to transparent black, so their colour
+    # is not comparable; BC1 colour PSNR only counts the pixels that stay opaque.
+    opaque = np.asarray(source)[..., 3] >= 128
+    for fmt in ("BC1", "BC3"):
+        rgb_mask = opaque if fmt == "BC1" else None
+        for name, encoder in encoders:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                encoded = encoder(source, fmt)
+                best = min(best, time.perf_counter() - start)
+            decoded = open_dds_image(encoded).convert("RGBA")
+            mpix = source.width * source.height / 1e6
+            print(f"{label:<28} {fmt} {name:<9} {source.width:>5}x{source.height:<5} | "
+                  f"{best * 1000:8.1f} ms ({mpix / best:6.2f} MP/s) | "
+                  f"PSNR rgb {psnr(source, decoded, slice(0, 3), rgb_mask):6.2f} dB, alpha {psnr(source, decoded, 3):6.2f} dB")
+
+
+def main(argv):
+    logging.basicConfig(level=logging.WARNING)
+    encoders = available_encoders()
+    report("synthetic 512", make_synthetic_image(512), encoders)
+
+    for path in argv:
+        if path.lower().endswith(".big"):
+            with FifaBigFile(path, lazy=True, use_mmap=True) as big_file:
+                for entry in big_file.entries:
+                    if entry.file_type == "DDS" and entry.size > 0:
+                        report(f"{os.path.basename(path)}:{entry.name}", open_dds_image(entry.data), encoders)
+        else:
+            with Image.open(path) as image:
+                report(os.path.basename(path), image, encoders)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,168 @@
+"""
+Throughput benchmark for the EAHD codec.
+Compares Decompressor.decompress_eahd against the original byte-at-a-time
+decoder on synthetic streams and on the EAHD entries of any .big files given,
+then reports Compressor.compress_eahd speed and ratio per level on their DDS entries.
+
+Usage: python benchmarks/bench_eahd.py [archive.big ...]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import Compression
+from file_io import BinaryReader, Compressor, Decompressor, FifaBigFile
+
+
+def legacy_decompress_eahd(data: bytes) -> bytes:
+    """The original per-byte decoder, kept verbatim as the baseline."""
+    try:
+        reader = BinaryReader(bytearray(data))
+        if reader.read_int(2, True) != 0xFB10: return data
+        total_size = reader.read_int(3, True)
+        out = bytearray(total_size)
+        pos = 0
+        while reader.pos < len(reader.data) and pos < total_size:
+            ctrl = reader.read_byte()
+            to_read = 0
+            to_copy = 0
+            off_val = 0
+            if ctrl < 0x80:
+                a = reader.read_byte()
+                to_read = ctrl & 0x03
+                to_copy = ((ctrl & 0x1C) >> 2) + 3
+                off_val = ((ctrl & 0x60) << 3) + a + 1
+            elif ctrl < 0xC0:
+                a, b = reader.read_byte(), reader.read_byte()
+                to_read = (a >> 6) & 0x03
+                to_copy = (ctrl & 0x3F) + 4
+                off_val = ((a & 0x3F) << 8) + b + 1
+            elif ctrl < 0xE0:
+                a, b, c = reader.read_byte(), reader.read_byte(), reader.read_byte()
+                to_read = ctrl & 0x03
+                to_copy = ((ctrl & 0x0C) << 6) + c + 5
+                off_val = ((ctrl & 0x10) << 12) + (a << 8) + b + 1
+            elif ctrl < 0xFC:
+                to_read = ((ctrl & 0x1F) << 2) + 4
+            else:
+                to_read = ctrl & 0x03
+
+            if pos + to_read > total_size: to_read = total_size - pos
+            for _ in range(to_read):
+                if reader.pos >= len(reader.data): break
+                out[pos] = reader.read_byte()
+                pos += 1
+
+            if to_copy > 0:
+                copy_start = pos - off_val
+                if copy_start < 0:
+                    return data
+                if pos + to_copy > total_size: to_copy = total_size - pos
+                for _ in range(to_copy):
+                    if copy_start >= pos:
+                        return data
+                    out[pos] = out[copy_start]
+                    pos += 1
+                    copy_start += 1
+        return bytes(out[:pos])
+    except ValueError:
+        return data
+
+
+def make_synthetic_stream(size: int, seed: int) -> bytes:
+    """
+    Builds a valid EAHD stream of roughly `size` output bytes from random commands,
+    mixing literal runs, short/medium/long matches and overlapping (RLE-style) copies.
+    """
+    rng = random.Random(seed)
+    alphabet = bytes(rng.randrange(256) for _ in range(16))
+    out_len = 0
+    body = bytearray()
+
+    def literals(count: int) -> bytes:
+        return bytes(rng.choice(alphabet) for _ in range(count))
+
+    while out_len < size:
+        kind = rng.random()
+        if kind < 0.15 or out_len < 8:
+            k = rng.randrange(28)
+            body.append(0xE0 | k)
+            body += literals((k << 2) + 4)
+            out_len += (k << 2) + 4
+            continue
+        lit = rng.randrange(4)
+        available = out_len + lit
+        if kind < 0.55:
+            copy = rng.randrange(3, 11)
+            off = rng.randrange(1, min(1024, available) + 1)
+            body += bytes((((off - 1) >> 8) << 5 | (copy - 3) << 2 | lit, (off - 1) & 0xFF))
+        elif kind < 0.85:
+            copy = rng.randrange(4, 68)
+            off = rng.randrange(1, min(16384, available) + 1)
+            body += bytes((0x80 | (copy - 4), lit << 6 | (off - 1) >> 8, (off - 1) & 0xFF))
+        else:
+            copy = rng.randrange(5, 1029)
+            off = rng.randrange(1, min(131072, available) + 1)
+            body += bytes((0xC0 | ((off - 1) >> 16) << 4 | ((copy - 5) >> 8) << 2 | lit,
+                           ((off - 1) >> 8) & 0xFF, (off - 1) & 0xFF, (copy - 5) & 0xFF))
+        body += literals(lit)
+        out_len += lit + copy
+    body.append(0xFC)
+    return b"\xfb\x10" + out_len.to_bytes(3, "big") + bytes(body)
+
+
+def measure(func, payload: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, payload: bytes, repeat: int):
+    expected = legacy_decompress_eahd(payload)
+    actual = Decompressor.decompress_eahd(payload)
+    status = "identical" if actual == expected else "MISMATCH"
+    old_t = measure(legacy_decompress_eahd, payload, repeat)
+    new_t = measure(Decompressor.decompress_eahd, payload, repeat)
+    mb = len(expected) / (1024 * 1024)
+    print(f"{label:<28} {len(payload):>9} -> {len(expected):>9} B | "
+          f"legacy {mb / old_t:8.2f} MB/s | new {mb / new_t:8.2f} MB/s | "
+          f"x{old_t / new_t:6.1f} | {status}")
+
+
+def report_compression(label: str, payload: bytes, levels=(1, 3, 6, 9)):
+    for level in levels:
+        start = time.perf_counter()
+        packed = Compressor.compress_eahd(payload, level, verify=False)
+        elapsed = time.perf_counter() - start
+        status = "round-trip ok" if Decompressor.decompress_eahd(packed, strict=True) == payload else "MISMATCH"
+        print(f"{label:<28} level {level} | {len(payload):>9} -> {len(packed):>9} B "
+              f"({len(packed) / max(len(payload), 1):6.1%}) | {len(payload) / (1024 * 1024) / elapsed:8.2f} MB/s | {status}")
+
+
+def main(argv):
+    logging.basicConfig(level=logging.WARNING)
+    for size in (64 * 1024, 512 * 1024, 2 * 1024 * 1024):
+        report(f"synthetic {size // 1024} KB", make_synthetic_stream(size, seed=size), repeat=3)
+
+    for path in argv:
+        with FifaBigFile(path, lazy=True, use_mmap=True) as big_file:
+            compressed = [e for e in big_file.entries if e.compression == Compression.EAHD]
+            if not compressed:
+                print(f"{os.path.basename(path)}: no EAHD entries")
+            for entry in compressed:
+                payload = bytes(big_file._view[entry.offset : entry.offset + entry.raw_size])
+                report(f"{os.path.basename(path)}:{entry.name}", payload, repeat=3)
+            for entry in big_file.entries:
+                if entry.file_type == "DDS" and entry.size > 0:
+                    report_compression(f"{os.path.basename(path)}:{entry.name}", bytes(entry.data))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
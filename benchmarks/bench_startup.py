@@ -0,0 +1,113 @@
+"""
+Cold-start benchmark for the editor.
+Each sample runs in a fresh interpreter and measures:
+  - import:     time to `import gui` (what main.py pays before creating the window)
+  - first idle: time from interpreter start of the script to the first idle callback
+                after App() is built, i.e. the window is up and the event loop is free
+  - process:    wall time of the whole child process, including interpreter startup
+It also lists the modules deferred until after the first paint and what each costs to import.
+The first-idle measurement needs a display; it is skipped when Tk cannot start.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import gui
+t1 = time.perf_counter()
+deferred = [m for m in gui._DEFERRED_MODULES if m in sys.modules]
+print(json.dumps({"import": t1 - t0, "loaded_deferred": deferred}))
+"""
+
+FIRST_IDLE_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import tkinter as tk
+from gui import App
+t_import = time.perf_counter()
+root = tk.Tk()
+app = App(root)
+result = {"import": t_import - t0}
+def on_idle():
+    result["first_idle"] = time.perf_counter() - t0
+    root.destroy()
+root.after_idle(on_idle)
+root.mainloop()
+print(json.dumps(result))
+"""
+
+MODULE_COST_PROBE = """
+import importlib, json, sys, time
+import gui
+costs = {}
+for name in gui._DEFERRED_MODULES:
+    t0 = time.perf_counter()
+    importlib.import_module(name)
+    costs[name] = time.perf_counter() - t0
+print(json.dumps(costs))
+"""
+
+
+def run_probe(code: str):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        return None, wall, proc.stderr.strip().splitlines()[-1:] or ["failed"]
+    return json.loads(proc.stdout.strip().splitlines()[-1]), wall, None
+
+
+def summarize(label: str, samples):
+    if not samples:
+        return
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<12} median {statistics.median(ms):8.1f} ms | min {min(ms):8.1f} ms | max {max(ms):8.1f} ms | n={len(ms)}")
+
+
+def main(argv):
+    runs = int(argv[0]) if argv else 10
+    run_probe(IMPORT_PROBE)  # Warm the OS file cache and __pycache__ before sampling.
+
+    imports, walls, leaked = [], [], set()
+    for _ in range(runs):
+        result, wall, error = run_probe(IMPORT_PROBE)
+        if error:
+            print(f"import probe failed: {error[0]}")
+            return 1
+        imports.append(result["import"])
+        walls.append(wall)
+        leaked.update(result["loaded_deferred"])
+    summarize("import", imports)
+    summarize("process", walls)
+    if leaked:
+        print(f"WARNING: deferred modules imported eagerly: {', '.join(sorted(leaked))}")
+
+    idles, error = [], None
+    for _ in range(runs):
+        result, _, error = run_probe(FIRST_IDLE_PROBE)
+        if error:
+            break
+        idles.append(result["first_idle"])
+    if error:
+        print(f"first idle   skipped: {error[0]}")
+    summarize("first idle", idles)
+
+    costs, _, error = run_probe(MODULE_COST_PROBE)
+    if costs:
+        print("deferred module import cost (paid after first paint):")
+        for name, cost in costs.items():
+            print(f"  {name:<12} {cost * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,97 @@
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from file_io import FifaBigFile
+
+# --- Session Caches ---
+
+class ArchiveCache:
+    """
+    Keeps opened .big archives for the session so GUI actions share one parsed archive.
+    Entries are keyed by normalized path and validated against the file's size and mtime;
+    callers that write to an archive must call invalidate() since an in-place patch
+    can leave both unchanged.
+    """
+    def __init__(self, max_archives: int = 4, max_workers: Optional[int] = None):
+        self.max_archives = max_archives
+        self.max_workers = max_workers  # Decode pool size of each opened archive
+        self._archives: "OrderedDict[str, Tuple[Tuple[int, int], FifaBigFile]]" = OrderedDict()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def get(self, path: str) -> FifaBigFile:
+        """Returns the cached archive for path, (re)opening it if the file changed on disk."""
+        key = self._key(path)
+        st = os.stat(path)
+        fingerprint = (st.st_size, st.st_mtime_ns)
+        cached = self._archives.get(key)
+        if cached and cached[0] == fingerprint:
+            self._archives.move_to_end(key)
+            return cached[1]
+        if cached:
+            logging.info(f"Archive changed on disk, reopening: {path}")
+            cached[1].close()
+
+        archive = FifaBigFile(path, lazy=True, use_mmap=True, max_workers=self.max_workers)
+        self._archives[key] = (fingerprint, archive)
+        self._archives.move_to_end(key)
+        while len(self._archives) > self.max_archives:
+            _, (_, evicted) = self._archives.popitem(last=False)
+            evicted.close()
+        return archive
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drops the cached archive for path, or every archive if no path is given."""
+        keys = [self._key(path)] if path else list(self._archives)
+        for key in keys:
+            cached = self._archives.pop(key, None)
+            if cached:
+                cached[1].close()
+
+
+class TextureCache:
+    """
+    LRU cache of decoded RGBA textures (PIL images), keyed by entry name and content hash.
+    The budget counts decoded pixel memory; least recently used images are evicted first.
+    """
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._images: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+
+    @staticmethod
+    def make_key(name: str, data) -> Tuple[str, str]:
+        return (name, hashlib.blake2b(data, digest_size=16).hexdigest())
+
+    @staticmethod
+    def _image_bytes(image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, key: Tuple[str, str]):
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+        return image
+
+    def put(self, key: Tuple[str, str], image):
+        size = self._image_bytes(image)
+        if size > self.max_bytes:
+            logging.debug(f"Texture {key[0]} ({size} bytes) exceeds the cache budget; not cached.")
+            return
+        old = self._images.pop(key, None)
+        if old is not None:
+            self.current_bytes -= self._image_bytes(old)
+        self._images[key] = image
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self.current_bytes -= self._image_bytes(evicted)
+
+    def clear(self):
+        self._images.clear()
+        self.current_bytes = 0
@@ -0,0 +1,144 @@
+import logging
+import tkinter as tk
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+
+# --- Retained-Mode Composite Renderer ---
+
+CANVAS_TAG = "composite_item"
+# Element fields that name the offsets.json labels an element is linked to
+LINKED_LABEL_KEYS = ('x_offset_label_linked', 'y_offset_label_linked', 'font_size_offset_label_linked', 'color_offset_label')
+
+
+class CompositeRenderer:
+    """
+    Keeps one canvas item per composite element and updates it in place.
+    Callers mark changed elements with invalidate() and then call render(). Only dirty elements
+    are visited, and only attributes whose value changed are sent to Tk (coords/itemconfigure).
+    Fonts and images are rebuilt only when zoom or font size changed, and a pan moves every
+    item with a single canvas.move(), so cost follows what changed, not how many elements exist.
+    """
+    def __init__(self, canvas: tk.Canvas, image_cache: Callable[[], Any], text_color_for: Callable[[Dict[str, Any]], str]):
+        self.canvas = canvas
+        self.image_cache = image_cache  # Returns the ZoomedImageCache; called only when an image is drawn
+        self.text_color_for = text_color_for
+        self.elements: List[Dict[str, Any]] = []
+        self.zoom = 1.0
+        self.pan_x = 0.0
+        self.pan_y = 0.0
+        self.fast = False  # Interactive preview quality; see set_quality()
+        self._fast_images = set()  # Tags of images last drawn at preview quality
+        self._origin: Optional[Tuple[int, int]] = None  # Screen position of the layout origin as drawn
+        self._rendered: Dict[str, Dict[str, Any]] = {}  # display_tag -> item id and attributes last sent to Tk
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        # Lookup indexes, rebuilt by set_elements() (items: as they are created)
+        self._by_label: Dict[str, List[Dict[str, Any]]] = {}
+        self._followers: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_item: Dict[int, Dict[str, Any]] = {}
+
+    def set_elements(self, elements: Iterable[Dict[str, Any]]):
+        self.clear()
+        self.elements = list(elements)
+        for el_data in self.elements:
+            labels = {el_data.get(key) for key in LINKED_LABEL_KEYS} - {None}
+            for label in labels:
+                self._by_label.setdefault(label, []).append(el_data)
+            if el_data.get('conjoined_to_tag'):
+                self._followers.setdefault(el_data['conjoined_to_tag'], []).append(el_data)
+        self.invalidate()
+
+    def elements_for_label(self, label: Optional[str]) -> List[Dict[str, Any]]:
+        """Elements whose position, font size or color is linked to an offsets.json label, in drawing order."""
+        return self._by_label.get(label, [])
+
+    def followers_of(self, el_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self._followers.get(el_data.get('display_tag'), [])
+
+    def element_for_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_item.get(item_id)
+
+    def set_view(self, zoom: float, pan_x: float, pan_y: float):
+        if zoom != self.zoom:
+            self.invalidate()
+        self.zoom, self.pan_x, self.pan_y = zoom, pan_x, pan_y
+
+    def set_quality(self, fast: bool):
+        """Switches between interactive and final quality; leaving fast mode redraws preview-quality images."""
+        if self.fast and not fast:
+            self.invalidate([el for el in self.elements if el['display_tag'] in self._fast_images])
+        self.fast = fast
+
+    def invalidate(self, elements: Optional[Iterable[Dict[str, Any]]] = None):
+        """Marks elements (all of them if None) for re-evaluation on the next render()."""
+        for el_data in (self.elements if elements is None else elements):
+            self._dirty[el_data['display_tag']] = el_data
+
+    def render(self) -> int:
+        """Applies the view and all pending element changes to the canvas; returns the number of elements visited."""
+        canvas_w = self.canvas.winfo_width() or 580
+        canvas_h = self.canvas.winfo_height() or 150
+        origin = (round(canvas_w / 2.0 - self.pan_x * self.zoom), round(canvas_h / 2.0 - self.pan_y * self.zoom))
+        if self._origin is not None and origin != self._origin and self._rendered:
+            self.canvas.move(CANVAS_TAG, origin[0] - self._origin[0], origin[1] - self._origin[1])
+        self._origin = origin
+
+        dirty, self._dirty = self._dirty, {}
+        for el_data in dirty.values():
+            try:
+                self._render_element(el_data, origin)
+            except Exception as e:
+                logging.error(f"Error rendering composite element {el_data.get('display_tag')}: {e}")
+        return len(dirty)
+
+    def _element_attributes(self, el_data: Dict[str, Any]) -> Dict[str, Any]:
+        if el_data.get('type') == "text":
+            font_size = max(1, int(el_data.get('base_font_size', config.DEFAULT_TEXT_BASE_FONT_SIZE) * self.zoom))
+            return {
+                'text': el_data['text_content'],
+                'font': (config.DEFAULT_TEXT_FONT_FAMILY, font_size, "bold"),
+                'fill': self.text_color_for(el_data),
+            }
+        photo = self.image_cache().get(el_data['display_tag'], el_data['pil_image'], self.zoom, fast=self.fast)
+        if self.fast:
+            self._fast_images.add(el_data['display_tag'])
+        else:
+            self._fast_images.discard(el_data['display_tag'])
+        el_data['tk_image_ref'] = photo
+        return {'image': photo if photo is not None else ""}
+
+    def _render_element(self, el_data: Dict[str, Any], origin: Tuple[int, int]):
+        tag = el_data['display_tag']
+        rel = (int(el_data['original_x'] * self.zoom), int(el_data['original_y'] * self.zoom))
+        attrs = self._element_attributes(el_data)
+        state = self._rendered.get(tag)
+
+        if state is None:
+            create = self.canvas.create_text if el_data.get('type') == "text" else self.canvas.create_image
+            item_id = create(origin[0] + rel[0], origin[1] + rel[1], anchor=tk.NW, tags=(CANVAS_TAG, tag), **attrs)
+            el_data['canvas_id'] = item_id
+            self._by_item[item_id] = el_data
+            self._rendered[tag] = {'id': item_id, 'rel': rel, **attrs}
+            return
+
+        if rel != state['rel']:
+            self.canvas.coords(state['id'], origin[0] + rel[0], origin[1] + rel[1])
+            state['rel'] = rel
+        changed = {key: value for key, value in attrs.items() if state.get(key) is not value and state.get(key) != value}
+        if changed:
+            self.canvas.itemconfigure(state['id'], **changed)
+            state.update(changed)
+
+    def clear(self):
+        self.canvas.delete(CANVAS_TAG)
+        for el_data in self.elements:
+            el_data.pop('tk_image_ref', None)
+            el_data.pop('canvas_id', None)
+        self.elements = []
+        self._rendered.clear()
+        self._dirty.clear()
+        self._by_label.clear()
+        self._followers.clear()
+        self._by_item.clear()
+        self._fast_images.clear()
+        self._origin = None
@@ -1,7 +1,4 @@
 import os
-import json
-import tkinter as tk
-from tkinter import filedialog, messagebox
 
 # --- Constants and Configuration ---
 
@@ -9,52 +6,43 @@ from tkinter import filedialog, messagebox
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 TEXCONV_PATH = os.path.join(SCRIPT_DIR, "texconv.exe")
 
-def load_offsets_data():
-    """
-    Loads scoreboard offsets from offsets.json.
-    Tries the default path first, then prompts the user if not found.
-    """
-    default_path = 'offsets.json'
-    try:
-        with open(default_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        messagebox.showwarning(
-            "File Not Found",
-            "offsets.json not found in the default location. Please select it manually."
-        )
-        # We need a temporary root to show the file dialog
-        _temp_root_for_dialog = tk.Tk()
-        _temp_root_for_dialog.withdraw()
-        file_path_json = filedialog.askopenfilename(
-            title="Select offsets.json file", filetypes=[("JSON files", "*.json")]
-        )
-        _temp_root_for_dialog.destroy()
-
-        if not file_path_json:
-            messagebox.showerror("Error", "No offsets.json selected. The application will exit.")
-            return None
-        try:
-            with open(file_path_json, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            messagebox.showerror(
-                "Error",
-                f"Failed to read the selected offsets.json file: {e}\nThe application will exit."
-            )
-            return None
-    except json.JSONDecodeError as e:
-        messagebox.showerror(
-            "Error",
-            f"Failed to read the default offsets.json file: {e}\nThe application will exit."
-        )
-        return None
-
-# Load the offset data at startup
-OFFSETS_DATA = load_offsets_data()
-
 # --- Static Application Configuration ---
 
+# EAHD compression level (1 = fastest, 9 = smallest) used when re-importing compressed textures
+EAHD_COMPRESSION_LEVEL = 6
+
+# Worker processes for decoding several compressed archive entries at once (1 decodes in-process)
+ARCHIVE_DECODE_WORKERS = min(os.cpu_count() or 1, 8)
+
+# Memory budget for decoded RGBA textures kept for quick preview switching
+TEXTURE_CACHE_BUDGET_BYTES = 128 * 1024 * 1024
+
+# Memory budget for resampled composite-view images kept per element and zoom level
+COMPOSITE_IMAGE_CACHE_BUDGET_BYTES = 64 * 1024 * 1024
+
+# Memory budget for resampled tiles of the single-texture preview (visible region only)
+SINGLE_VIEW_TILE_CACHE_BUDGET_BYTES = 32 * 1024 * 1024
+
+# Undo history limits, and the window within which repeated edits of one value merge into one step
+UNDO_MAX_ACTIONS = 50
+UNDO_MAX_BYTES = 1024 * 1024
+UNDO_COALESCE_SECONDS = 1.0
+
+# Texture import undo: previous slot bytes are kept compressed ("zlib" or "lzma"); compressed
+# snapshots above the spill size, or beyond the memory budget, are kept in a temp directory
+SNAPSHOT_COMPRESSION = "zlib"
+SNAPSHOT_SPILL_BYTES = 256 * 1024
+SNAPSHOT_MEMORY_BUDGET_BYTES = 16 * 1024 * 1024
+
+# Preview rendering: minimum time between frames, and how long input must pause before
+# the fast interactive preview is replaced by a high-quality render
+PREVIEW_FRAME_INTERVAL_MS = 16
+PREVIEW_SETTLE_DELAY_MS = 150
+
+# Block-compression format ("BC1" or "BC3") and mip chain generation for imported PNG textures
+TEXTURE_IMPORT_FORMAT = "BC3"
+TEXTURE_IMPORT_MIPMAPS = True
+
 # List of image files to cycle through
 IMAGE_FILES = [str(i) for i in range(1, 81)]
 
@@ -79,9 +67,6 @@ INITIAL_TEXT_ELEMENTS_CONFIG = [
     ("text_added_time", "+9", 120, 67, 22, "PlaceHolder", "Added Time Text Color", False, "Added Time X", 130, "Added Time Y", 83),
 ]
 
-# Labels for color values that are text-based ("WHITE"/"BLACK") instead of hex
-SPECIAL_TEXT_COLOR_LABELS = ["Added Time Text Color"]
-
 # Predefined coordinates and linking info for images in the composite view
 # Format: { 'tag': (gui_x, gui_y, x_offset_label, base_game_x, y_offset_label, base_game_y) }
 PREDEFINED_IMAGE_COORDS = {
@@ -1,7 +1,10 @@
+import time
 import logging
-from dataclasses import dataclass
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Any, Optional
+from typing import Deque, List, Any, Optional, Callable, Union
 
 # --- Enums and Data Classes ---
 
@@ -10,16 +13,50 @@ class Compression(Enum):
     NONE = "None"
     EAHD = "EAHD"
 
-@dataclass
+@dataclass(init=False)
 class FileEntry:
-    """Represents a single file entry within a .big archive."""
+    """
+    Represents a single file entry within a .big archive.
+    When a loader is attached, the payload is only read (and decompressed)
+    the first time `data` is accessed. Uncompressed entries of a memory-mapped
+    archive hold a memoryview into the mapping rather than a copy.
+    """
     offset: int
     size: int
     name: str
     file_type: str
     compression: Compression
-    data: bytes
+    _data: Optional[Union[bytes, memoryview]] = field(repr=False)
     raw_size: int
+    loader: Optional[Callable[["FileEntry"], Union[bytes, memoryview]]] = field(default=None, repr=False, compare=False)
+
+    def __init__(self, offset: int, size: int, name: str, file_type: str, compression: Compression,
+                 data: Optional[Union[bytes, memoryview]], raw_size: int,
+                 loader: Optional[Callable[["FileEntry"], Union[bytes, memoryview]]] = None):
+        # `data` stays the constructor argument (positional or keyword); the payload itself is
+        # kept in _data so the property below can load it on first access.
+        self.offset = offset
+        self.size = size
+        self.name = name
+        self.file_type = file_type
+        self.compression = compression
+        self._data = data
+        self.raw_size = raw_size
+        self.loader = loader
+
+    @property
+    def data(self) -> Union[bytes, memoryview]:
+        if self._data is None:
+            self._data = self.loader(self) if self.loader else b""
+        return self._data
+
+    @data.setter
+    def data(self, value: Union[bytes, memoryview]):
+        self._data = value
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._data is not None
 
 @dataclass
 class EditAction:
@@ -30,29 +67,161 @@ class EditAction:
     key_tuple: tuple
     entry_widget_ref: Any  # tk.Widget
     description: str = "value change"
+    timestamp: float = field(default_factory=time.monotonic, compare=False)
 
     def __str__(self):
         return f"EditAction({self.description}: {self.old_value} -> {self.new_value})"
 
+    def size_bytes(self) -> int:
+        return _ACTION_OVERHEAD_BYTES + len(self.old_value) + len(self.new_value) + len(self.description)
+
+@dataclass
+class CompoundAction:
+    """Several edits undone and redone as one step, e.g. the X and Y offsets of a drag."""
+    actions: List[EditAction]
+    description: str = "grouped change"
+
+    def __str__(self):
+        return f"CompoundAction({self.description}: {len(self.actions)} edits)"
+
+    def size_bytes(self) -> int:
+        return _ACTION_OVERHEAD_BYTES + sum(a.size_bytes() for a in self.actions)
+
+    def discard(self):
+        for action in self.actions:
+            _discard(action)
+
+
+def _discard(action):
+    """Lets an action free resources held outside the history (e.g. texture snapshots)."""
+    discard = getattr(action, 'discard', None)
+    if discard:
+        discard()
+
+@dataclass
+class TextureImportAction:
+    """
+    A texture slot overwritten by an import. The slot bytes before and after live in a
+    SnapshotStore (referenced by digest), so the action itself stays small.
+    """
+    archive_path: str
+    entry_name: str
+    address: int
+    length: int
+    before_digest: str
+    after_digest: str
+    store: Any  # snapshots.SnapshotStore
+    description: str = "texture import"
+
+    def __str__(self):
+        return f"TextureImportAction({self.description}: {self.entry_name} at {self.address:#x}, {self.length} bytes)"
+
+    def size_bytes(self) -> int:
+        return _ACTION_OVERHEAD_BYTES
+
+    def discard(self):
+        """Releases the snapshots once the action has left the history."""
+        self.store.release(self.before_digest)
+        self.store.release(self.after_digest)
+
+# Rough per-action memory cost (objects, references) on top of the stored strings
+_ACTION_OVERHEAD_BYTES = 256
+
 # --- Core Logic Classes ---
 
 class UndoManager:
-    """Manages undo and redo stacks for application actions."""
-    def __init__(self, app_instance, max_history=50):
+    """
+    Manages undo and redo stacks for application actions.
+    Undo history is bounded both by action count and by an estimate of its memory; the oldest
+    actions are dropped first. Consecutive edits of the same value within coalesce_window
+    seconds merge into one action, and edits recorded inside a transaction are undone as one.
+    """
+    def __init__(self, app_instance, max_history=50, max_bytes=1024 * 1024, coalesce_window=1.0):
         self.app = app_instance
-        self.undo_stack: List[EditAction] = []
-        self.redo_stack: List[EditAction] = []
+        self.undo_stack: Deque[Union[EditAction, CompoundAction, TextureImportAction]] = deque()
+        self.redo_stack: Deque[Union[EditAction, CompoundAction, TextureImportAction]] = deque()
         self.max_history = max_history
+        self.max_bytes = max_bytes
+        self.coalesce_window = coalesce_window
+        self.history_bytes = 0
+        self._mergeable: Optional[EditAction] = None  # Last recorded action, while it may still absorb edits
+        self._transaction: Optional[List[EditAction]] = None
+        self._transaction_description = ""
+        self._transaction_depth = 0
 
-    def record_action(self, action: EditAction):
+    def record_action(self, action: Union[EditAction, TextureImportAction]):
         """Records a new action, clearing the redo stack."""
-        self.redo_stack.clear()
-        self.undo_stack.append(action)
-        if len(self.undo_stack) > self.max_history:
-            self.undo_stack.pop(0)
+        if self._transaction is not None:
+            self._transaction.append(action)
+            return
+        if self._try_merge(action):
+            self.app.update_menu_states()
+            return
+        self._push(action)
+        # Only value edits can absorb later edits; anything else ends the merge run
+        self._mergeable = action if isinstance(action, EditAction) else None
         self.app.update_menu_states()
         logging.debug(f"Recorded action: {action}")
 
+    def _try_merge(self, action: EditAction) -> bool:
+        last = self._mergeable
+        if (last is None or not isinstance(action, EditAction) or not self.undo_stack or self.undo_stack[-1] is not last
+                or last.key_tuple != action.key_tuple or last.string_var is not action.string_var
+                or action.timestamp - last.timestamp > self.coalesce_window):
+            return False
+        self._clear_redo()
+        self.history_bytes -= last.size_bytes()
+        last.new_value, last.timestamp = action.new_value, action.timestamp
+        if last.old_value == last.new_value:  # The edits cancelled out
+            self.undo_stack.pop()
+            self._mergeable = None
+        else:
+            self.history_bytes += last.size_bytes()
+        logging.debug(f"Merged into action: {last}")
+        return True
+
+    def _push(self, action: Union[EditAction, CompoundAction, TextureImportAction]):
+        self._clear_redo()
+        self.undo_stack.append(action)
+        self.history_bytes += action.size_bytes()
+        while len(self.undo_stack) > self.max_history or (self.history_bytes > self.max_bytes and len(self.undo_stack) > 1):
+            evicted = self.undo_stack.popleft()
+            self.history_bytes -= evicted.size_bytes()
+            _discard(evicted)
+
+    def _clear_redo(self):
+        while self.redo_stack:
+            _discard(self.redo_stack.pop())
+
+    def begin_transaction(self, description: str = "grouped change"):
+        """Starts grouping recorded actions; transactions nest, and the outermost commit records the group."""
+        if self._transaction_depth == 0:
+            self._transaction = []
+            self._transaction_description = description
+        self._transaction_depth += 1
+
+    def commit_transaction(self):
+        if self._transaction_depth == 0:
+            return
+        self._transaction_depth -= 1
+        if self._transaction_depth:
+            return
+        actions, self._transaction = self._transaction, None
+        if not actions:
+            return
+        self._mergeable = None
+        self._push(actions[0] if len(actions) == 1 else CompoundAction(actions, self._transaction_description))
+        self.app.update_menu_states()
+        logging.debug(f"Recorded transaction '{self._transaction_description}' with {len(actions)} edits")
+
+    @contextmanager
+    def transaction(self, description: str = "grouped change"):
+        self.begin_transaction(description)
+        try:
+            yield
+        finally:
+            self.commit_transaction()
+
     def can_undo(self):
         return bool(self.undo_stack)
 
@@ -67,7 +236,9 @@ class UndoManager:
         if not self.can_undo():
             return None
         action = self.undo_stack.pop()
+        self.history_bytes -= action.size_bytes()
         self.redo_stack.append(action)
+        self._mergeable = None
         self.app.update_menu_states()
         logging.info(f"Undone: {action}")
         return action
@@ -81,13 +252,35 @@ class UndoManager:
             return None
         action = self.redo_stack.pop()
         self.undo_stack.append(action)
+        self.history_bytes += action.size_bytes()
+        self._mergeable = None
         self.app.update_menu_states()
         logging.info(f"Redone: {action}")
         return action
 
     def clear_history(self):
         """Clears both undo and redo stacks."""
+        for action in self.undo_stack:
+            _discard(action)
         self.undo_stack.clear()
-        self.redo_stack.clear()
+        self._clear_redo()
+        self.history_bytes = 0
+        self._mergeable = None
+        self.app.update_menu_states()
+        logging.info("Undo/Redo history cleared.")
+
+    def clear_edits(self):
+        """
+        Drops value edits from both stacks once they are saved. Texture imports are kept:
+        they were written to the archive when made, so a save does not settle them.
+        """
+        kept_undo = deque(a for a in self.undo_stack if isinstance(a, TextureImportAction))
+        kept_redo = deque(a for a in self.redo_stack if isinstance(a, TextureImportAction))
+        for action in list(self.undo_stack) + list(self.redo_stack):
+            if not isinstance(action, TextureImportAction):
+                _discard(action)
+        self.undo_stack, self.redo_stack = kept_undo, kept_redo
+        self.history_bytes = sum(a.size_bytes() for a in self.undo_stack)
+        self._mergeable = None
         self.app.update_menu_states()
-        logging.info("Undo/Redo history cleared.")
\ No newline at end of file
+        logging.info(f"Saved edits dropped from undo history; {len(kept_undo) + len(kept_redo)} texture imports kept.")
@@ -0,0 +1,292 @@
+import io
+import struct
+import importlib.util
+import logging
+from typing import Tuple
+
+from PIL import Image
+
+# --- DDS Decoding ---
+
+DDS_MAGIC = b"DDS "
+DDS_HEADER_SIZE = 128
+DDS_DX10_HEADER_SIZE = 20
+
+DDPF_ALPHAPIXELS = 0x1
+DDPF_FOURCC = 0x4
+DDPF_RGB = 0x40
+DDPF_LUMINANCE = 0x20000
+
+# FourCC -> (PIL bcn decoder index, mode, bytes per 4x4 block)
+_FOURCC_FORMATS = {
+    b"DXT1": (1, "RGBA", 8),
+    b"DXT2": (2, "RGBA", 16),
+    b"DXT3": (2, "RGBA", 16),
+    b"DXT4": (3, "RGBA", 16),
+    b"DXT5": (3, "RGBA", 16),
+    b"ATI1": (4, "L", 8),
+    b"BC4U": (4, "L", 8),
+    b"ATI2": (5, "RGB", 16),
+    b"BC5U": (5, "RGB", 16),
+}
+
+# DXGI format -> (PIL bcn decoder index, mode, bytes per 4x4 block)
+_DXGI_BC_FORMATS = {
+    70: (1, "RGBA", 8), 71: (1, "RGBA", 8), 72: (1, "RGBA", 8),      # BC1
+    73: (2, "RGBA", 16), 74: (2, "RGBA", 16), 75: (2, "RGBA", 16),   # BC2
+    76: (3, "RGBA", 16), 77: (3, "RGBA", 16), 78: (3, "RGBA", 16),   # BC3
+    79: (4, "L", 8), 80: (4, "L", 8),                                # BC4
+    82: (5, "RGB", 16), 83: (5, "RGB", 16),                          # BC5
+    97: (7, "RGBA", 16), 98: (7, "RGBA", 16), 99: (7, "RGBA", 16),   # BC7
+}
+
+# DXGI format -> raw decoder mode for uncompressed 32-bit formats
+_DXGI_RAW_FORMATS = {
+    27: "RGBA", 28: "RGBA", 29: "RGBA",   # R8G8B8A8
+    87: "BGRA", 91: "BGRA",               # B8G8R8A8
+    88: "BGRX", 93: "BGRX",               # B8G8R8X8
+}
+
+
+def open_dds_image(data) -> Image.Image:
+    """
+    Decodes DDS bytes (bytes or memoryview) entirely in memory and returns a loaded image.
+    PIL's DDS plugin is tried first; variants it rejects fall back to parsing the header
+    here and feeding the top mip level to PIL's raw or BCn decoders directly.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            return img
+    except Exception as e:
+        logging.debug(f"PIL could not open DDS directly ({e}); using header fallback.")
+    return _decode_dds_fallback(bytes(data))
+
+
+def _read_header(data: bytes) -> Tuple[int, int, int, int, bytes, int, Tuple[int, int, int, int]]:
+    if len(data) < DDS_HEADER_SIZE or data[:4] != DDS_MAGIC:
+        raise ValueError("Not a DDS file")
+    height, width = struct.unpack_from("<II", data, 12)
+    pf_flags, = struct.unpack_from("<I", data, 80)
+    fourcc = data[84:88]
+    bit_count, = struct.unpack_from("<I", data, 88)
+    masks = struct.unpack_from("<4I", data, 92)
+    return width, height, pf_flags, bit_count, fourcc, DDS_HEADER_SIZE, masks
+
+
+def _decode_dds_fallback(data: bytes) -> Image.Image:
+    width, height, pf_flags, bit_count, fourcc, offset, masks = _read_header(data)
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid DDS dimensions {width}x{height}")
+
+    if pf_flags & DDPF_FOURCC:
+        if fourcc == b"DX10":
+            dxgi_format, = struct.unpack_from("<I", data, DDS_HEADER_SIZE)
+            offset += DDS_DX10_HEADER_SIZE
+            if dxgi_format in _DXGI_RAW_FORMATS:
+                return _decode_raw(data, offset, width, height, _DXGI_RAW_FORMATS[dxgi_format], 4)
+            if dxgi_format not in _DXGI_BC_FORMATS:
+                raise ValueError(f"Unsupported DXGI format {dxgi_format}")
+            bc_format = _DXGI_BC_FORMATS[dxgi_format]
+        elif fourcc in _FOURCC_FORMATS:
+            bc_format = _FOURCC_FORMATS[fourcc]
+        else:
+            raise ValueError(f"Unsupported DDS FourCC {fourcc!r}")
+        decoder_index, mode, block_bytes = bc_format
+        top_size = max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * block_bytes
+        if len(data) < offset + top_size:
+            raise ValueError("DDS data is truncated")
+        return Image.frombuffer(mode, (width, height), data[offset : offset + top_size], "bcn", decoder_index).convert("RGBA")
+
+    if pf_flags & DDPF_RGB:
+        r_mask, g_mask, b_mask, a_mask = masks
+        has_alpha = bool(pf_flags & DDPF_ALPHAPIXELS) and a_mask
+        if bit_count == 32:
+            if (r_mask, g_mask, b_mask) == (0xFF0000, 0xFF00, 0xFF):
+                raw_mode = "BGRA" if has_alpha else "BGRX"
+            elif (r_mask, g_mask, b_mask) == (0xFF, 0xFF00, 0xFF0000):
+                raw_mode = "RGBA" if has_alpha else "RGBX"
+            else:
+                raise ValueError(f"Unsupported 32-bit DDS channel masks {masks}")
+            return _decode_raw(data, offset, width, height, raw_mode, 4)
+        if bit_count == 24:
+            raw_mode = "BGR" if r_mask == 0xFF0000 else "RGB"
+            return _decode_raw(data, offset, width, height, raw_mode, 3)
+        raise ValueError(f"Unsupported DDS bit count {bit_count}")
+
+    if pf_flags & DDPF_LUMINANCE and bit_count == 8:
+        return _decode_raw(data, offset, width, height, "L", 1)
+    raise ValueError(f"Unsupported DDS pixel format flags {pf_flags:#x}")
+
+
+def _decode_raw(data: bytes, offset: int, width: int, height: int, raw_mode: str, bytes_per_pixel: int) -> Image.Image:
+    top_size = width * height * bytes_per_pixel
+    if len(data) < offset + top_size:
+        raise ValueError("DDS data is truncated")
+    mode = "L" if raw_mode == "L" else ("RGB" if bytes_per_pixel == 3 or raw_mode.endswith("X") else "RGBA")
+    return Image.frombuffer(mode, (width, height), data[offset : offset + top_size], "raw", raw_mode, 0, 1).convert("RGBA")
+
+
+# --- DDS Encoding ---
+
+# NumPy is optional (callers fall back to texconv.exe) and slow to import, so it is loaded on first encode.
+np = None
+
+
+def _require_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError("NumPy is required for the built-in DDS encoder") from e
+        np = numpy
+    return np
+
+DDSD_CAPS = 0x1
+DDSD_HEIGHT = 0x2
+DDSD_WIDTH = 0x4
+DDSD_PIXELFORMAT = 0x1000
+DDSD_MIPMAPCOUNT = 0x20000
+DDSD_LINEARSIZE = 0x80000
+DDSCAPS_COMPLEX = 0x8
+DDSCAPS_TEXTURE = 0x1000
+DDSCAPS_MIPMAP = 0x400000
+
+ENCODE_FORMATS = {"BC1": (b"DXT1", 8), "BC3": (b"DXT5", 16)}
+
+
+def encoder_available() -> bool:
+    return np is not None or importlib.util.find_spec("numpy") is not None
+
+
+def encode_dds(image: Image.Image, fmt: str = "BC3", mipmaps: bool = True) -> bytes:
+    """
+    Encodes a PIL image as a BC1 (DXT1) or BC3 (DXT5) DDS file with a legacy FourCC header.
+    With mipmaps the full chain down to 1x1 is generated with a box filter, like texconv's default.
+    BC1 keeps 1-bit alpha (pixels below 128 become transparent). Requires NumPy.
+    """
+    _require_numpy()
+    fourcc, block_bytes = ENCODE_FORMATS[fmt]
+    rgba = image.convert("RGBA")
+    levels = [rgba]
+    if mipmaps:
+        while levels[-1].width > 1 or levels[-1].height > 1:
+            prev = levels[-1]
+            levels.append(prev.resize((max(1, prev.width // 2), max(1, prev.height // 2)), Image.BOX))
+
+    payload = [compress_blocks(np.asarray(level), fmt) for level in levels]
+    return _build_header(rgba.width, rgba.height, len(levels) if mipmaps else 0, fourcc, len(payload[0])) + b"".join(payload)
+
+
+def _build_header(width: int, height: int, mip_count: int, fourcc: bytes, linear_size: int) -> bytes:
+    flags = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE
+    caps = DDSCAPS_TEXTURE
+    if mip_count:
+        flags |= DDSD_MIPMAPCOUNT
+        caps |= DDSCAPS_COMPLEX | DDSCAPS_MIPMAP
+    header = struct.pack("<7I44x", 124, flags, height, width, linear_size, 0, mip_count)
+    pixel_format = struct.pack("<2I4s5I", 32, DDPF_FOURCC, fourcc, 0, 0, 0, 0, 0)
+    return DDS_MAGIC + header + pixel_format + struct.pack("<5I", caps, 0, 0, 0, 0)
+
+
+def compress_blocks(pixels, fmt: str = "BC3") -> bytes:
+    """Block-compresses an (H, W, 4) uint8 RGBA array; edges are padded to whole 4x4 blocks."""
+    _require_numpy()
+    height, width = pixels.shape[:2]
+    pad_h, pad_w = -height % 4, -width % 4
+    if pad_h or pad_w:
+        pixels = np.pad(pixels, ((0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+    bh, bw = pixels.shape[0] // 4, pixels.shape[1] // 4
+    # (bh, 4, bw, 4, 4) -> (blocks, 16 texels, RGBA) in row-major texel order.
+    blocks = pixels.reshape(bh, 4, bw, 4, 4).transpose(0, 2, 1, 3, 4).reshape(-1, 16, 4)
+
+    if fmt == "BC1":
+        return _encode_color(blocks, punch_through=True).tobytes()
+    out = np.empty((blocks.shape[0], 16), dtype=np.uint8)
+    out[:, :8] = _encode_alpha(blocks[:, :, 3])
+    out[:, 8:] = _encode_color(blocks, punch_through=False)
+    return out.tobytes()
+
+
+def _to_565(colors):
+    c = colors.astype(np.int32)
+    return (((c[..., 0] * 31 + 127) // 255) << 11) | (((c[..., 1] * 63 + 127) // 255) << 5) | ((c[..., 2] * 31 + 127) // 255)
+
+
+def _from_565(packed):
+    r = (packed >> 11) & 0x1F
+    g = (packed >> 5) & 0x3F
+    b = packed & 0x1F
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1).astype(np.float32)
+
+
+def _encode_color(blocks, punch_through: bool):
+    """Returns (N, 8) uint8 BC1 colour blocks: endpoints along each block's principal axis, nearest-palette indices."""
+    n = blocks.shape[0]
+    rgb = blocks[:, :, :3].astype(np.float32)
+    transparent = blocks[:, :, 3] < 128 if punch_through else np.zeros((n, 16), dtype=bool)
+    weights = (~transparent).astype(np.float32)[..., None]
+    counts = np.maximum(weights.sum(axis=1), 1.0)
+    mean = (rgb * weights).sum(axis=1) / counts
+    centered = (rgb - mean[:, None, :]) * weights
+
+    # Principal axis by a few rounds of power iteration on the 3x3 covariance.
+    cov = np.matmul(centered.transpose(0, 2, 1), centered)
+    axis = np.full((n, 3), 0.57735, dtype=np.float32)
+    for _ in range(4):
+        axis = np.matmul(cov, axis[:, :, None])[:, :, 0]
+        norm = np.linalg.norm(axis, axis=1, keepdims=True)
+        axis = np.where(norm > 1e-6, axis / np.maximum(norm, 1e-6), 0.57735)
+    proj = np.matmul(centered, axis[:, :, None])[:, :, 0]
+    lo = np.where(transparent, np.inf, proj).min(axis=1)
+    hi = np.where(transparent, -np.inf, proj).max(axis=1)
+    lo = np.where(np.isfinite(lo), lo, 0.0)
+    hi = np.where(np.isfinite(hi), hi, 0.0)
+    end_hi = np.clip(mean + axis * hi[:, None], 0, 255)
+    end_lo = np.clip(mean + axis * lo[:, None], 0, 255)
+
+    c0 = _to_565(np.rint(end_hi))
+    c1 = _to_565(np.rint(end_lo))
+    # Four-colour mode needs c0 > c1; three-colour (punch-through) mode needs c0 <= c1.
+    has_alpha = transparent.any(axis=1)
+    swap = np.where(has_alpha, c0 > c1, c0 < c1)
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+
+    p0, p1 = _from_565(c0), _from_565(c1)
+    four = np.stack((p0, p1, (2 * p0 + p1) / 3, (p0 + 2 * p1) / 3), axis=1)
+    three = np.stack((p0, p1, (p0 + p1) / 2, np.full_like(p0, 1e9)), axis=1)
+    palette = np.where(has_alpha[:, None, None], three, four)
+    # |x - p|^2 minus the per-texel |x|^2 term, which does not affect the argmin.
+    dist = (palette ** 2).sum(axis=-1)[:, None, :] - 2 * np.matmul(rgb, palette.transpose(0, 2, 1))
+    indices = dist.argmin(axis=2).astype(np.uint32)
+    indices = np.where(transparent, 3, indices)
+    # Solid blocks with equal endpoints in four-colour mode decode only index 0/1 reliably.
+    indices = np.where(((c0 == c1) & ~has_alpha)[:, None], 0, indices)
+
+    packed = (indices << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+    out = np.empty((n, 8), dtype=np.uint8)
+    out[:, 0:2] = c0.astype("<u2").view(np.uint8).reshape(n, 2)
+    out[:, 2:4] = c1.astype("<u2").view(np.uint8).reshape(n, 2)
+    out[:, 4:8] = packed.astype("<u4").view(np.uint8).reshape(n, 4)
+    return out
+
+
+def _encode_alpha(alpha):
+    """Returns (N, 8) uint8 BC3 alpha blocks in eight-value mode (a0 = max, a1 = min)."""
+    n = alpha.shape[0]
+    a = alpha.astype(np.int32)
+    a0 = a.max(axis=1)
+    a1 = a.min(axis=1)
+    span = np.maximum(a0 - a1, 1)
+    # Level k in 0..7 interpolates from a1 (k=0) to a0 (k=7); map it to the BC3 index order.
+    level = ((a - a1[:, None]) * 14 + span[:, None]) // (2 * span[:, None])
+    indices = np.where(level == 7, 0, np.where(level == 0, 1, 8 - level)).astype(np.uint64)
+    indices = np.where((a0 == a1)[:, None], 0, indices)
+
+    packed = (indices << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+    out = np.empty((n, 8), dtype=np.uint8)
+    out[:, 0] = a0
+    out[:, 1] = a1
+    out[:, 2:8] = packed.astype("<u8").view(np.uint8).reshape(n, 8)[:, :6]
+    return out
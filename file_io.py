@@ -1,6 +1,9 @@
+import os
+import mmap
 import logging
 import struct
-from typing import Optional, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Iterable, List, Tuple, Callable, Union
 
 from core import Compression, FileEntry
 
@@ -44,6 +47,10 @@ class BinaryReader:
         self.pos = min(len(self.data), self.pos + count)
 
 
+class EAHDError(ValueError):
+    """Raised for malformed or truncated EAHD (RefPack) streams."""
+
+
 class Decompressor:
     """Handles decompression of file data."""
     @staticmethod
@@ -51,93 +58,405 @@ class Decompressor:
         return Compression.EAHD if len(data) >= 2 and data[:2] == b"\xfb\x10" else Compression.NONE
 
     @staticmethod
-    def decompress_eahd(data: bytes) -> bytes:
-        try:
-            reader = BinaryReader(bytearray(data))
-            if reader.read_int(2, True) != 0xFB10: return data
-            total_size = reader.read_int(3, True)
-            out = bytearray(total_size)
-            pos = 0
-            while reader.pos < len(reader.data) and pos < total_size:
-                ctrl = reader.read_byte()
-                to_read = 0
-                to_copy = 0
-                off_val = 0
-                if ctrl < 0x80:
-                    a = reader.read_byte()
-                    to_read = ctrl & 0x03
-                    to_copy = ((ctrl & 0x1C) >> 2) + 3
-                    off_val = ((ctrl & 0x60) << 3) + a + 1
-                elif ctrl < 0xC0:
-                    a, b = reader.read_byte(), reader.read_byte()
-                    to_read = (a >> 6) & 0x03
-                    to_copy = (ctrl & 0x3F) + 4
-                    off_val = ((a & 0x3F) << 8) + b + 1
-                elif ctrl < 0xE0:
-                    a, b, c = reader.read_byte(), reader.read_byte(), reader.read_byte()
-                    to_read = ctrl & 0x03
-                    to_copy = ((ctrl & 0x0C) << 6) + c + 5
-                    off_val = ((ctrl & 0x10) << 12) + (a << 8) + b + 1
-                elif ctrl < 0xFC:
-                    to_read = ((ctrl & 0x1F) << 2) + 4
-                else:
-                    to_read = ctrl & 0x03
-
-                if pos + to_read > total_size: to_read = total_size - pos
-                for _ in range(to_read):
-                    if reader.pos >= len(reader.data): break
-                    out[pos] = reader.read_byte()
-                    pos += 1
-
-                if to_copy > 0:
-                    copy_start = pos - off_val
-                    if copy_start < 0:
-                        logging.error("EAHD: Invalid copy offset.")
-                        return data
-                    if pos + to_copy > total_size: to_copy = total_size - pos
-                    for _ in range(to_copy):
-                        if copy_start >= pos:
-                            logging.error("EAHD: copy_start >= pos.")
-                            return data
-                        out[pos] = out[copy_start]
-                        pos += 1
-                        copy_start += 1
-            return bytes(out[:pos])
-        except ValueError as e:
-            logging.error(f"EAHD Decompression ValueError: {e}")
+    def read_eahd_size(data: bytes) -> Optional[int]:
+        """Returns the decompressed size declared in an EAHD header, or None if data is not EAHD."""
+        if len(data) < 5 or data[0] != 0xFB or data[1] != 0x10:
+            return None
+        return (data[2] << 16) | (data[3] << 8) | data[4]
+
+    @staticmethod
+    def decompress_eahd(data: bytes, strict: bool = False, max_output: Optional[int] = None) -> bytes:
+        """
+        Decompresses an EAHD stream, stopping early after max_output bytes if given.
+        Malformed streams raise EAHDError when strict is set; otherwise the error is
+        logged and the input is returned unchanged, as before.
+        """
+        src = data if isinstance(data, bytes) else bytes(data)
+        if len(src) < 2 or src[0] != 0xFB or src[1] != 0x10:
             return data
-        except Exception as e:
-            logging.error(f"EAHD Decompression Exception: {e}", exc_info=True)
+        total_size = Decompressor.read_eahd_size(src)
+        if total_size is None:
+            error = f"truncated header ({len(src)} bytes)"
+        else:
+            target = total_size if max_output is None else min(total_size, max_output)
+            out, pos, error = Decompressor._run_eahd(src, target)
+            if not error and pos < target:
+                error = f"stream ended after {pos} of {total_size} declared bytes"
+                if not strict:
+                    logging.warning(f"EAHD {error}.")
+                    return bytes(out[:pos])
+        if error:
+            if strict: raise EAHDError(error)
+            logging.error(f"EAHD decompression failed: {error}")
             return data
+        return bytes(out)
+
+    @staticmethod
+    def peek_eahd(data: bytes, count: int) -> bytes:
+        """
+        Decodes only the first `count` bytes of an EAHD stream. `data` may be just a prefix
+        of the compressed payload; whatever could be decoded from it is returned.
+        """
+        src = data if isinstance(data, bytes) else bytes(data)
+        total_size = Decompressor.read_eahd_size(src)
+        if total_size is None:
+            return b""
+        out, pos, _ = Decompressor._run_eahd(src, min(total_size, count))
+        return bytes(out[:pos])
+
+    @staticmethod
+    def _run_eahd(src: bytes, out_size: int) -> Tuple[bytearray, int, Optional[str]]:
+        """
+        Core decode loop over a stream with a valid header. Returns the output buffer,
+        the number of bytes produced and an error message (None if the stream was well formed).
+        """
+        src_len = len(src)
+        out = bytearray(out_size)
+        ip, pos = 5, 0
+        while ip < src_len and pos < out_size:
+            ctrl = src[ip]
+            ip += 1
+            to_copy = 0
+            if ctrl < 0x80:
+                if ip + 1 > src_len: return out, pos, f"truncated 2-byte command at input offset {ip - 1}"
+                a = src[ip]
+                ip += 1
+                to_read = ctrl & 0x03
+                to_copy = ((ctrl & 0x1C) >> 2) + 3
+                off_val = ((ctrl & 0x60) << 3) + a + 1
+            elif ctrl < 0xC0:
+                if ip + 2 > src_len: return out, pos, f"truncated 3-byte command at input offset {ip - 1}"
+                a, b = src[ip], src[ip + 1]
+                ip += 2
+                to_read = (a >> 6) & 0x03
+                to_copy = (ctrl & 0x3F) + 4
+                off_val = ((a & 0x3F) << 8) + b + 1
+            elif ctrl < 0xE0:
+                if ip + 3 > src_len: return out, pos, f"truncated 4-byte command at input offset {ip - 1}"
+                a, b, c = src[ip], src[ip + 1], src[ip + 2]
+                ip += 3
+                to_read = ctrl & 0x03
+                to_copy = ((ctrl & 0x0C) << 6) + c + 5
+                off_val = ((ctrl & 0x10) << 12) + (a << 8) + b + 1
+            elif ctrl < 0xFC:
+                to_read = ((ctrl & 0x1F) << 2) + 4
+            else:
+                to_read = ctrl & 0x03
+
+            if to_read:
+                if pos + to_read > out_size: to_read = out_size - pos
+                if ip + to_read > src_len: to_read = src_len - ip
+                out[pos : pos + to_read] = src[ip : ip + to_read]
+                pos += to_read
+                ip += to_read
+                if pos >= out_size: break  # Output limit reached inside the literals; the match is not needed
+
+            if to_copy:
+                copy_start = pos - off_val
+                if copy_start < 0:
+                    return out, pos, f"back-reference {off_val} bytes behind output position {pos} (input offset {ip})"
+                if pos + to_copy > out_size: to_copy = out_size - pos
+                if off_val >= to_copy:
+                    out[pos : pos + to_copy] = out[copy_start : copy_start + to_copy]
+                elif off_val == 1:
+                    out[pos : pos + to_copy] = bytes((out[copy_start],)) * to_copy
+                else:
+                    # Overlapping match: the source run repeats with period off_val.
+                    pattern = out[copy_start : pos]
+                    out[pos : pos + to_copy] = (pattern * (to_copy // off_val + 1))[:to_copy]
+                pos += to_copy
+
+        return out, pos, None
+
+
+# Match finder settings per level: (max chain depth, lazy matching, good-enough length, index every position)
+_EAHD_LEVELS = {
+    1: (2, False, 16, False),
+    2: (4, False, 24, False),
+    3: (8, False, 32, True),
+    4: (8, True, 32, True),
+    5: (16, True, 64, True),
+    6: (32, True, 128, True),
+    7: (64, True, 256, True),
+    8: (256, True, 512, True),
+    9: (1024, True, 1028, True),
+}
+DEFAULT_EAHD_LEVEL = 6
+
+_EAHD_MAX_MATCH = 1028
+_EAHD_WINDOW = 131072
+_EAHD_MAX_SIZE = (1 << 24) - 1
+# Compressed bytes read when probing an entry: enough for the header and the first decoded bytes.
+_EAHD_PROBE_BYTES = 64
+# Compressed payloads smaller than this are decoded in-process even when a pool is used.
+_PARALLEL_MIN_BYTES = 16 * 1024
 
 
 class Compressor:
     """Handles compression of file data."""
     @staticmethod
-    def compress_eahd(data: bytes) -> bytes:
-        # NOTE: EAHD compression is not implemented.
-        logging.warning("EAHD COMPRESSION IS NOT IMPLEMENTED. Returning uncompressed data.")
-        return data
+    def compress_eahd(data: bytes, level: int = DEFAULT_EAHD_LEVEL, verify: bool = True) -> bytes:
+        """
+        Compresses data into an EAHD (RefPack) stream using a hash-chain match finder.
+        Level 1 is fastest, 9 gives the best ratio. With verify set, the result is decoded
+        again and EAHDError is raised if it does not reproduce the input exactly.
+        """
+        if level not in _EAHD_LEVELS:
+            raise ValueError(f"EAHD compression level must be 1-9, got {level}")
+        src = data if isinstance(data, bytes) else bytes(data)
+        if len(src) > _EAHD_MAX_SIZE:
+            raise EAHDError(f"{len(src)} bytes exceeds the 24-bit EAHD size field")
+
+        out = Compressor._encode_eahd(src, *_EAHD_LEVELS[level])
+        if verify and Decompressor.decompress_eahd(out, strict=True) != src:
+            raise EAHDError("round-trip verification failed")
+        logging.debug(f"EAHD level {level}: {len(src)} -> {len(out)} bytes")
+        return out
+
+    @staticmethod
+    def _encode_eahd(src: bytes, max_chain: int, lazy: bool, nice_len: int, index_all: bool) -> bytes:
+        n = len(src)
+        out = bytearray(b"\xfb\x10" + n.to_bytes(3, "big"))
+        head = {}
+        prev = [-1] * n
+
+        def find_match(i):
+            limit = min(_EAHD_MAX_MATCH, n - i)
+            best_len, best_off = 0, 0
+            cand = head.get(src[i : i + 3], -1)
+            depth = max_chain
+            while cand >= 0 and depth:
+                off = i - cand
+                if off > _EAHD_WINDOW: break
+                if src[cand + best_len] == src[i + best_len]:
+                    length = 0
+                    while length + 32 <= limit and src[cand + length : cand + length + 32] == src[i + length : i + length + 32]:
+                        length += 32
+                    while length + 4 <= limit and src[cand + length : cand + length + 4] == src[i + length : i + length + 4]:
+                        length += 4
+                    while length < limit and src[cand + length] == src[i + length]:
+                        length += 1
+                    if length > best_len and length >= (3 if off <= 1024 else 4 if off <= 16384 else 5):
+                        best_len, best_off = length, off
+                        if length >= nice_len or length == limit: break
+                cand = prev[cand]
+                depth -= 1
+            return best_len, best_off
+
+        def insert(i):
+            key = src[i : i + 3]
+            prev[i] = head.get(key, -1)
+            head[key] = i
+
+        i = lit_start = 0
+        last = n - 3
+        pending = None
+        while i <= last:
+            match_len, match_off = pending if pending else find_match(i)
+            pending = None
+            insert(i)
+            if match_len and lazy and match_len < nice_len and i + 1 <= last:
+                next_match = find_match(i + 1)
+                if next_match[0] > match_len:
+                    pending = next_match
+                    i += 1
+                    continue
+            if not match_len:
+                i += 1
+                continue
+            Compressor._emit_command(out, src, lit_start, i, match_off, match_len)
+            end = i + match_len
+            if index_all:
+                for j in range(i + 1, min(end, last + 1)):
+                    insert(j)
+            i = lit_start = end
+        Compressor._emit_command(out, src, lit_start, n, 0, 0)
+        return bytes(out)
+
+    @staticmethod
+    def _emit_command(out: bytearray, src: bytes, lit_start: int, lit_end: int, off: int, length: int):
+        """Writes pending literals followed by one back-reference (or the stop code when length is 0)."""
+        while lit_end - lit_start > 3:
+            run = min((lit_end - lit_start) & ~3, 112)
+            out.append(0xE0 | ((run - 4) >> 2))
+            out += src[lit_start : lit_start + run]
+            lit_start += run
+        lit = lit_end - lit_start
+        if not length:
+            out.append(0xFC | lit)
+        elif length <= 10 and off <= 1024:
+            off -= 1
+            out += bytes((((off >> 8) << 5) | ((length - 3) << 2) | lit, off & 0xFF))
+        elif length <= 67 and off <= 16384:
+            off -= 1
+            out += bytes((0x80 | (length - 4), (lit << 6) | (off >> 8), off & 0xFF))
+        else:
+            off -= 1
+            length -= 5
+            out += bytes((0xC0 | ((off >> 16) << 4) | ((length >> 8) << 2) | lit, (off >> 8) & 0xFF, off & 0xFF, length & 0xFF))
+        out += src[lit_start : lit_end]
+
+
+def _eahd_prefix_size(count: int) -> int:
+    """
+    Compressed bytes that always suffice to decode the first `count` bytes of an EAHD stream:
+    the 5-byte header, at most 5 input bytes per 4 output bytes (a 4-byte literal run is the
+    costliest command) and one more command that may straddle the limit.
+    """
+    return 5 + (5 * count + 3) // 4 + 4
+
+
+def _decompress_payload(raw_data: bytes) -> bytes:
+    """Process pool worker: decodes one compressed entry."""
+    return Decompressor.decompress_eahd(raw_data)
 
 
 class FifaBigFile:
-    """Class to read and parse FIFA .big archives."""
-    def __init__(self, filename: str):
+    """
+    Class to read and parse FIFA .big archives.
+    With lazy=True only the header and table of contents are read on open, plus a
+    short probe per entry for its type and size; each entry's payload is read and
+    decompressed the first time its data is used.
+    With use_mmap=True the archive is memory-mapped and uncompressed entries are
+    exposed as memoryview slices of the mapping instead of copies. Call close()
+    (or use the archive as a context manager) to release the mapping.
+    With max_workers > 1, compressed entries are decoded across a process pool
+    whenever many are decoded at once (eager loading or decompress_all()). The pool
+    is started on first use and reused for the life of the archive.
+    """
+    def __init__(self, filename: str, lazy: bool = False, use_mmap: bool = False, max_workers: Optional[int] = None):
         self.filename = filename
+        self.lazy = lazy
+        self.use_mmap = use_mmap
+        self.max_workers = max_workers
         self.entries: List[FileEntry] = []
+        self._file_size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
         self._load()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Releases the memory mapping and stops the decode pool. Entry views handed out
+        earlier keep the mapping alive until they are dropped.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._mmap is None: return
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            logging.debug(f"Mapping of {self.filename} still has exported views; it will be released with them.")
+        self._mmap = None
+        self._view = None
+
     def _load(self):
         try:
             with open(self.filename, 'rb') as f:
-                data_content = bytearray(f.read())
+                self._file_size = os.fstat(f.fileno()).st_size
+                if self.use_mmap and self._file_size > 0:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._view = memoryview(self._mmap)
+                    data_content = self._mmap
+                elif self.lazy:
+                    def peek_file(offset: int, count: int) -> bytes:
+                        f.seek(offset)
+                        return f.read(count)
+                    self._build_lazy_entries(self._read_toc_lazy(f), peek_file)
+                    return
+                else:
+                    data_content = bytearray(f.read())
         except FileNotFoundError:
             logging.error(f"BIG file not found: {self.filename}")
             raise
 
-        reader = BinaryReader(data_content)
+        toc = self._parse_toc(data_content)
+        if self.lazy:
+            self._build_lazy_entries(toc, lambda offset, count: data_content[offset : offset + count])
+            return
+
+        content_type_tag = "DAT"
+        pending: List[Tuple[FileEntry, bytes]] = []
+        for entry_offset, entry_raw_size, entry_name in toc:
+            if entry_raw_size == 0 and entry_name in {"sg1", "sg2"}:
+                content_type_tag = {"sg1": "DDS", "sg2": "APT"}[entry_name]
+                self.entries.append(FileEntry(entry_offset, 0, entry_name, content_type_tag, Compression.NONE, b"", 0))
+                continue
+
+            actual_raw_size = self._clamped_size(entry_offset, entry_raw_size)
+            if self._view is not None:
+                raw_data = self._view[entry_offset : entry_offset + actual_raw_size]
+            else:
+                raw_data = bytes(data_content[entry_offset : entry_offset + actual_raw_size])
+            compression_type = Decompressor.detect_compression(raw_data)
+            
+            determined_file_type = content_type_tag
+            if compression_type == Compression.NONE and raw_data[:4] == b'DDS ':
+                determined_file_type = "DDS"
+            
+            entry = FileEntry(
+                entry_offset, len(raw_data), entry_name, determined_file_type,
+                compression_type, raw_data, entry_raw_size
+            )
+            self.entries.append(entry)
+            if compression_type == Compression.EAHD:
+                pending.append((entry, raw_data))
+        self._decompress_entries(pending)
+
+    def decompress_all(self, names: Optional[Iterable[str]] = None):
+        """
+        Loads every entry (or only the named ones) that has not been read yet. Compressed
+        entries are decoded across the archive's process pool when max_workers is above 1.
+        """
+        wanted = None if names is None else set(names)
+        pending: List[Tuple[FileEntry, bytes]] = []
+        for entry in self.entries:
+            if entry.is_loaded or (wanted is not None and entry.name not in wanted): continue
+            if entry.compression == Compression.EAHD:
+                pending.append((entry, self._read_raw(entry)))
+            else:
+                entry.data = self._read_raw(entry)
+        self._decompress_entries(pending)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        """The archive's decode pool, started on first use and kept until close()."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _decompress_entries(self, pending: List[Tuple[FileEntry, bytes]]):
+        """Decodes the given (entry, raw payload) pairs in place. Results do not depend on max_workers."""
+        decoded: List[Optional[bytes]] = [None] * len(pending)
+        large = [i for i, (_, raw) in enumerate(pending) if len(raw) >= _PARALLEL_MIN_BYTES]
+        if self.max_workers and self.max_workers > 1 and len(large) > 1:
+            # Largest payloads first keeps the pool busy; results are slotted back by index.
+            large.sort(key=lambda i: len(pending[i][1]), reverse=True)
+            payloads = [bytes(pending[i][1]) for i in large]
+            for i, data in zip(large, self._executor().map(_decompress_payload, payloads)):
+                decoded[i] = data
+
+        for i, (entry, raw_data) in enumerate(pending):
+            data = decoded[i] if decoded[i] is not None else Decompressor.decompress_eahd(raw_data)
+            entry.data = data
+            entry.size = len(data)
+            if data[:4] == b'DDS ':
+                entry.file_type = "DDS"
+
+    @staticmethod
+    def _parse_toc(header_data) -> List[Tuple[int, int, str]]:
+        """Parses the archive header and returns (offset, raw_size, name) for every TOC entry."""
+        reader = BinaryReader(header_data)
         try:
-            magic = bytes(data_content[:4])
+            magic = bytes(header_data[:4])
             if magic not in (b'BIGF', b'BIG4'):
                 raise ValueError(f"Invalid BIG magic: {magic.decode(errors='ignore')}")
             reader.skip(4)
@@ -148,7 +467,7 @@ class FifaBigFile:
             logging.error(f"BIG header error: {e}")
             raise
 
-        content_type_tag = "DAT"
+        toc = []
         for i in range(num_entries):
             try:
                 entry_offset = reader.read_int(4, True)
@@ -157,30 +476,97 @@ class FifaBigFile:
             except ValueError as e:
                 logging.error(f"Entry read error at index {i}: {e}")
                 continue
+            toc.append((entry_offset, entry_raw_size, entry_name))
+        return toc
 
+    def _read_toc_lazy(self, f) -> List[Tuple[int, int, str]]:
+        """Reads only as much of the file as the table of contents needs."""
+        head = f.read(16)
+        num_entries = int.from_bytes(head[8:12], "big") if len(head) >= 12 else 0
+        # The 4th header field is the length of the header block (TOC included).
+        block_len = max(int.from_bytes(head[12:16], "big"), 16) if len(head) == 16 else len(head)
+        while True:
+            f.seek(0)
+            header_data = bytearray(f.read(block_len))
+            if block_len >= self._file_size or self._toc_fits(header_data, num_entries):
+                return self._parse_toc(header_data)
+            block_len = min(block_len * 2, self._file_size)
+
+    @staticmethod
+    def _toc_fits(header_data: bytearray, num_entries: int) -> bool:
+        """Checks that all TOC records are fully contained in the buffered header block."""
+        pos = 16
+        for _ in range(num_entries):
+            pos += 8
+            end = header_data.find(b"\x00", pos)
+            if end < 0: return False
+            pos = end + 1
+        return True
+
+    def _clamped_size(self, entry_offset: int, entry_raw_size: int) -> int:
+        if entry_offset + entry_raw_size > self._file_size:
+            return max(self._file_size - entry_offset, 0)
+        return entry_raw_size
+
+    def _build_lazy_entries(self, toc: List[Tuple[int, int, str]], peek: Callable[[int, int], bytes]):
+        content_type_tag = "DAT"
+        for entry_offset, entry_raw_size, entry_name in toc:
             if entry_raw_size == 0 and entry_name in {"sg1", "sg2"}:
                 content_type_tag = {"sg1": "DDS", "sg2": "APT"}[entry_name]
                 self.entries.append(FileEntry(entry_offset, 0, entry_name, content_type_tag, Compression.NONE, b"", 0))
                 continue
 
-            actual_raw_size = entry_raw_size
-            if entry_offset + entry_raw_size > len(data_content):
-                actual_raw_size = len(data_content) - entry_offset
-                if actual_raw_size < 0:
-                    actual_raw_size = 0
-            
-            raw_data = bytes(data_content[entry_offset : entry_offset + actual_raw_size])
-            compression_type = Decompressor.detect_compression(raw_data)
-            decompressed_data = Decompressor.decompress_eahd(raw_data) if compression_type == Compression.EAHD else raw_data
-            
+            actual_raw_size = self._clamped_size(entry_offset, entry_raw_size)
+            head = bytes(peek(entry_offset, min(_EAHD_PROBE_BYTES, actual_raw_size)))
+            compression_type = Decompressor.detect_compression(head)
+            entry_size = actual_raw_size
+            if compression_type == Compression.EAHD:
+                # Size comes from the 0xFB10 header; type from decoding just the first 4 bytes.
+                declared_size = Decompressor.read_eahd_size(head)
+                entry_size = declared_size if declared_size is not None else actual_raw_size
+                head = Decompressor.peek_eahd(head, 4)
+
             determined_file_type = content_type_tag
-            if decompressed_data[:4] == b'DDS ':
+            if head[:4] == b'DDS ':
                 determined_file_type = "DDS"
-            
+
             self.entries.append(FileEntry(
-                entry_offset, len(decompressed_data), entry_name, determined_file_type,
-                compression_type, decompressed_data, entry_raw_size
+                entry_offset, entry_size, entry_name, determined_file_type,
+                compression_type, None, entry_raw_size, loader=self._load_entry_data
             ))
+
+    def peek(self, entry: FileEntry, n: int) -> bytes:
+        """
+        Returns the first n bytes of an entry's content without loading the entry.
+        Plain entries read at most n raw bytes; compressed ones read only the prefix
+        of the stream that can hold the first n decoded bytes.
+        """
+        if entry.is_loaded:
+            return bytes(entry.data[:n])
+        if entry.compression != Compression.EAHD:
+            return bytes(self._read_raw(entry, n))
+        return Decompressor.peek_eahd(self._read_raw(entry, _eahd_prefix_size(n)), n)
+
+    def _read_raw(self, entry: FileEntry, limit: Optional[int] = None) -> Union[bytes, memoryview]:
+        actual_raw_size = self._clamped_size(entry.offset, entry.raw_size)
+        if limit is not None:
+            actual_raw_size = min(actual_raw_size, max(limit, 0))
+        if self._view is not None:
+            return self._view[entry.offset : entry.offset + actual_raw_size]
+        with open(self.filename, 'rb') as f:
+            f.seek(entry.offset)
+            return f.read(actual_raw_size)
+
+    def _load_entry_data(self, entry: FileEntry) -> Union[bytes, memoryview]:
+        """Reads and decompresses a single entry's payload on first access."""
+        raw_data = self._read_raw(entry)
+        if entry.compression != Compression.EAHD:
+            return raw_data
+        decompressed_data = Decompressor.decompress_eahd(raw_data)
+        entry.size = len(decompressed_data)
+        if decompressed_data[:4] == b'DDS ':
+            entry.file_type = "DDS"
+        return decompressed_data
             
     def list_files(self) -> List[str]:
-        return [e.name for e in self.entries if e.size > 0]
\ No newline at end of file
+        return [e.name for e in self.entries if e.size > 0]
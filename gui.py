@@ -1,19 +1,30 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, colorchooser
-import struct
-import webbrowser
 import os
-import tempfile
-import subprocess
+import json
 import logging
-from typing import List, Optional, Dict, Any
-
-from PIL import Image, ImageTk
+import importlib
+import threading
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 
 import config
-from core import EditAction, UndoManager, Compression
-from file_io import FifaBigFile, Compressor
-from utils import format_filesize, read_internal_name
+from core import CompoundAction, EditAction, TextureImportAction, UndoManager, Compression
+from layout import LayoutError, LayoutReadPlan, LayoutValues, SPECIAL_TEXT_COLOR_LABELS, SPECIAL_TEXT_COLOR_VALUES, encode_float, encode_values
+import offsets_db
+from journal import JournalError, recover as recover_journal, write_transaction
+from scheduler import RenderScheduler
+from composite import CANVAS_TAG, CompositeRenderer
+from utils import KNOWN_INTERNAL_NAMES, detection_order, format_filesize, read_internal_name
+
+# PIL, the archive engine (file_io/cache) and the DDS codec are imported where they are first
+# used, and warmed up on a background thread once the window is up, to keep them off the
+# critical path to the first paint.
+_DEFERRED_MODULES = ("PIL.Image", "PIL.ImageTk", "dds", "file_io", "cache", "imaging", "snapshots")
+if TYPE_CHECKING:
+    from PIL import Image
+    from cache import ArchiveCache, TextureCache
+    from imaging import TileCache, ZoomedImageCache
+    from snapshots import SnapshotStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
@@ -22,16 +33,17 @@ logging.basicConfig(level=logging.INFO,
 class App:
     def __init__(self, root: tk.Tk):
         self.root = root
-        if not config.OFFSETS_DATA:
-            logging.critical("offsets_data not loaded. Application cannot start.")
-            self.root.after(100, self.root.destroy)
-            return
 
         # --- State Variables ---
         self.file_path: Optional[str] = None
         self.offsets: Dict[str, List[int]] = {}
         self.colors: Dict[str, List[int]] = {}
+        self.offset_labels_by_key: Dict[tuple, str] = {}
+        self.color_labels_by_key: Dict[tuple, str] = {}
+        self.read_plan: Optional[LayoutReadPlan] = None
+        self.internal_name: Optional[str] = None
         self.current_image: Optional[Image.Image] = None
+        self.current_rgba: Optional[Image.Image] = None
 
         self.original_loaded_offsets: Dict[tuple, str] = {}
         self.original_loaded_colors: Dict[tuple, str] = {}
@@ -63,8 +75,16 @@ class App:
         self.highlighted_offset_entries = []
 
         # --- Managers and Data ---
-        self.undo_manager = UndoManager(self)
-        self.offsets_data = config.OFFSETS_DATA
+        self.undo_manager = UndoManager(self, config.UNDO_MAX_ACTIONS, config.UNDO_MAX_BYTES, config.UNDO_COALESCE_SECONDS)
+        self._archive_cache: Optional["ArchiveCache"] = None
+        self._texture_cache: Optional["TextureCache"] = None
+        self._zoomed_image_cache: Optional["ZoomedImageCache"] = None
+        self._single_view_tiles: Optional["TileCache"] = None
+        self._snapshot_store: Optional["SnapshotStore"] = None
+        # Archive path -> (address, length) -> snapshot digest of a texture slot before its first
+        # import this session; patch export diffs against it, independent of the undo history
+        self.imported_slot_bases: Dict[str, Dict[tuple, str]] = {}
+        self.offsets_db: Optional[offsets_db.OffsetsDatabase] = None
 
         # --- Widget References (for dynamic access) ---
         self.offsets_vars: Dict[tuple, tk.StringVar] = {}
@@ -83,6 +103,57 @@ class App:
         
         self.clear_editor_widgets()
         self.update_menu_states()
+        self.root.after_idle(self._start_background_warmup)
+
+    @property
+    def archive_cache(self) -> "ArchiveCache":
+        if self._archive_cache is None:
+            from cache import ArchiveCache
+            self._archive_cache = ArchiveCache(max_workers=config.ARCHIVE_DECODE_WORKERS)
+        return self._archive_cache
+
+    @property
+    def texture_cache(self) -> "TextureCache":
+        if self._texture_cache is None:
+            from cache import TextureCache
+            self._texture_cache = TextureCache(config.TEXTURE_CACHE_BUDGET_BYTES)
+        return self._texture_cache
+
+    @property
+    def zoomed_image_cache(self) -> "ZoomedImageCache":
+        if self._zoomed_image_cache is None:
+            from imaging import ZoomedImageCache
+            self._zoomed_image_cache = ZoomedImageCache(config.COMPOSITE_IMAGE_CACHE_BUDGET_BYTES)
+        return self._zoomed_image_cache
+
+    @property
+    def single_view_tiles(self) -> "TileCache":
+        if self._single_view_tiles is None:
+            from imaging import TileCache
+            self._single_view_tiles = TileCache(config.SINGLE_VIEW_TILE_CACHE_BUDGET_BYTES)
+        return self._single_view_tiles
+
+    @property
+    def snapshot_store(self) -> "SnapshotStore":
+        if self._snapshot_store is None:
+            from snapshots import SnapshotStore
+            self._snapshot_store = SnapshotStore(config.SNAPSHOT_COMPRESSION, config.SNAPSHOT_SPILL_BYTES,
+                                                 config.SNAPSHOT_MEMORY_BUDGET_BYTES)
+        return self._snapshot_store
+
+    def _start_background_warmup(self):
+        """Runs once the first frame has been drawn: preloads heavy modules and the offsets database off the UI thread."""
+        threading.Thread(target=self._background_warmup, name="startup-warmup", daemon=True).start()
+
+    @staticmethod
+    def _background_warmup():
+        try:
+            for module_name in _DEFERRED_MODULES:
+                importlib.import_module(module_name)
+            offsets_db.get_database()
+        except Exception as e:
+            # The foreground retries on first use and reports errors there.
+            logging.info(f"Background warm-up incomplete: {e}")
 
     def _setup_window(self):
         self.root.title("FLP Scoreboard Editor 25 (v1.13)")
@@ -103,6 +174,9 @@ class App:
         self.filemenu.add_command(label="Open", command=self.open_file, accelerator="Ctrl+O")
         self.filemenu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
         self.filemenu.add_separator()
+        self.filemenu.add_command(label="Export Patch...", command=self.export_patch)
+        self.filemenu.add_command(label="Apply Patch...", command=self.apply_patch_file)
+        self.filemenu.add_separator()
         self.filemenu.add_command(label="Exit", command=self.exit_app)
         self.menubar.add_cascade(label="File", menu=self.filemenu)
         
@@ -154,6 +228,9 @@ class App:
         
         self.preview_canvas = tk.Canvas(preview_controls_frame, width=580, height=150, bg="#CCCCCC", relief="solid", bd=1)
         self.preview_canvas.pack(side=tk.LEFT, padx=5, pady=5, anchor='center')
+        self.composite_renderer = CompositeRenderer(self.preview_canvas, lambda: self.zoomed_image_cache, self._composite_text_color)
+        self.render_scheduler = RenderScheduler(self.root, self._render_preview,
+                                                config.PREVIEW_FRAME_INTERVAL_MS, config.PREVIEW_SETTLE_DELAY_MS)
         
         self.right_arrow_button = ttk.Button(preview_controls_frame, text="▶", command=self.next_image, width=2)
         self.right_arrow_button.pack(side=tk.LEFT, padx=5, pady=5, anchor='center')
@@ -218,27 +295,29 @@ class App:
         self.editmenu.entryconfig("Undo", state=tk.NORMAL if self.undo_manager.can_undo() else tk.DISABLED)
         self.editmenu.entryconfig("Redo", state=tk.NORMAL if self.undo_manager.can_redo() else tk.DISABLED)
 
-    def _apply_action(self, action: EditAction, is_undo: bool):
+    def _apply_action(self, action, is_undo: bool):
         """Applies an undo or redo action and updates the UI accordingly."""
         if not action: return
+        if isinstance(action, CompoundAction):
+            for sub_action in (reversed(action.actions) if is_undo else action.actions):
+                self._apply_action(sub_action, is_undo)
+            return
+        if isinstance(action, TextureImportAction):
+            self._apply_texture_action(action, is_undo)
+            return
         logging.debug(f"Applying {'undo' if is_undo else 'redo'} for: {action}")
         
         # Set the variable's value
         action.string_var.set(action.old_value if is_undo else action.new_value)
         
         # Determine the type of variable and call the appropriate update function
-        is_offset_var = any(var == action.string_var for var in self.offsets_vars.values())
+        is_offset_var = self.offsets_vars.get(action.key_tuple) is action.string_var
 
         if is_offset_var:
             self.update_value(action.key_tuple, action.string_var, from_undo_redo=True)
         else: # It's a color var
-            color_json_label = None
-            for lbl, c_key_tuple in self.colors.items():
-                if tuple(c_key_tuple) == action.key_tuple:
-                    color_json_label = lbl
-                    break
-            
-            if color_json_label in config.SPECIAL_TEXT_COLOR_LABELS:
+            color_json_label = self.color_labels_by_key.get(action.key_tuple)
+            if color_json_label in SPECIAL_TEXT_COLOR_LABELS:
                 self.handle_special_text_color_change(action.key_tuple, action.string_var, from_undo_redo=True)
             else:
                 self.update_color_preview_from_entry(action.key_tuple, action.string_var, from_undo_redo=True)
@@ -254,6 +333,22 @@ class App:
         
         self.update_menu_states()
 
+    def _apply_texture_action(self, action: TextureImportAction, is_undo: bool):
+        """Restores a texture slot to its bytes before (undo) or after (redo) an import, rewriting only changed blocks."""
+        from snapshots import restore_range
+        try:
+            target = action.store.get(action.before_digest if is_undo else action.after_digest)
+            if self._archive_cache: self._archive_cache.invalidate(action.archive_path)
+            written = restore_range(action.archive_path, action.address, target)
+        except (OSError, ValueError, KeyError, JournalError) as e:
+            messagebox.showerror("Undo Error" if is_undo else "Redo Error", f"Could not restore texture '{action.entry_name}.dds':\n{e}")
+            logging.error(f"Texture {'undo' if is_undo else 'redo'} failed for {action}: {e}", exc_info=True)
+            return
+        self.update_status(f"{'Undid' if is_undo else 'Redid'} import of {action.entry_name}.dds ({format_filesize(written)} rewritten)", "blue")
+        if not self.composite_mode_active and self.file_path == action.archive_path:
+            self.extract_and_display_texture()
+        self.update_menu_states()
+
     def undo(self):
         """Performs an undo operation."""
         action = self.undo_manager.perform_undo()
@@ -268,6 +363,14 @@ class App:
     def open_file(self):
         fp_temp = filedialog.askopenfilename(filetypes=[("FIFA Big Files", "*.big")])
         if fp_temp:
+            try:
+                recovery = recover_journal(fp_temp)
+            except (JournalError, OSError) as e:
+                messagebox.showerror("Recovery Error", f"Could not recover an interrupted save for this file:\n{e}")
+                logging.error(f"Journal recovery failed for {fp_temp}: {e}", exc_info=True)
+                return
+            if recovery:
+                messagebox.showinfo("Interrupted Save Recovered", f"A previous save of this file did not finish.\nRecovery: {recovery}.")
             self.file_path = fp_temp
             self.current_image_index = 0
             self.undo_manager.clear_history()
@@ -308,64 +411,152 @@ class App:
             messagebox.showerror("Error", "Data is not initialized. Cannot save.")
             return
 
+        dirty_offsets, dirty_colors = self._collect_dirty_values()
         try:
-            with open(self.file_path, 'r+b') as f:
-                # Save numerical offsets
-                for off_key, var_obj in self.offsets_vars.items():
-                    val_str = var_obj.get()
-                    try:
-                        val_f = float(val_str)
-                        packed = struct.pack('<f', val_f)
-                    except ValueError:
-                        messagebox.showerror("Save Error", f"Invalid float value '{val_str}' for offset {off_key}. Save aborted.")
-                        return
-                    for addr in off_key:
-                        f.seek(addr)
-                        f.write(packed)
-                    self.original_loaded_offsets[off_key] = val_str
-                    if off_key in self.asterisk_labels: self.asterisk_labels[off_key].config(text="")
-
-                # Save colors
-                for color_label, off_tuple_list in self.colors.items():
-                    off_key = tuple(off_tuple_list)
-                    if off_key not in self.color_vars: continue
-                    var_obj = self.color_vars[off_key]
-                    
-                    if color_label in config.SPECIAL_TEXT_COLOR_LABELS:
-                        text_val = var_obj.get()
-                        if text_val in ["WHITE", "BLACK"]:
-                            bytes_to_write = text_val.encode('ascii').ljust(5, b'\x00')[:5]
-                            for addr in off_key:
-                                f.seek(addr)
-                                f.write(bytes_to_write)
-                            self.original_loaded_colors[off_key] = text_val
-                        else:
-                            messagebox.showerror("Save Error", f"Invalid text color '{text_val}' for '{color_label}'. Save aborted.")
-                            return
-                    else: # Regular hex color
-                        hex_str = var_obj.get()
-                        if not (len(hex_str) == 7 and hex_str.startswith('#')):
-                            messagebox.showerror("Save Error", f"Invalid hex color '{hex_str}' for '{color_label}'. Save aborted.")
-                            return
-                        try:
-                            r, g, b = int(hex_str[1:3], 16), int(hex_str[3:5], 16), int(hex_str[5:7], 16)
-                            bgra = bytes([b, g, r, 0xFF])
-                        except ValueError:
-                            messagebox.showerror("Save Error", f"Invalid hex value in '{hex_str}' for '{color_label}'. Save aborted.")
-                            return
-                        for addr in off_key:
-                            f.seek(addr)
-                            f.write(bgra)
-                        self.original_loaded_colors[off_key] = hex_str
-                    
-                    if off_key in self.asterisk_labels: self.asterisk_labels[off_key].config(text="")
+            encoded_offsets, encoded_colors = encode_values(
+                {label: value for label, (_, value) in dirty_offsets.items()},
+                {label: value for label, (_, value) in dirty_colors.items()})
+        except LayoutError as e:
+            messagebox.showerror("Save Error", f"Save aborted, nothing was written. Invalid values:\n\n{e}")
+            return
+
+        if not encoded_offsets and not encoded_colors:
+            self._clear_change_markers()
+            self.update_status("No changes to save.", "green")
+            return
 
+        writes = [(addr, encoded_offsets[lbl]) for lbl, (key, _) in dirty_offsets.items() for addr in key]
+        writes += [(addr, encoded_colors[lbl]) for lbl, (key, _) in dirty_colors.items() for addr in key]
+        if self._archive_cache: self._archive_cache.invalidate(self.file_path)
+        try:
+            written = write_transaction(self.file_path, writes)
+            logging.info(f"Saved {len(dirty_offsets) + len(dirty_colors)} changed values ({written} bytes) to {self.file_path}")
+
+            for off_key, value in dirty_offsets.values():
+                self.original_loaded_offsets[off_key] = value
+            for off_key, value in dirty_colors.values():
+                self.original_loaded_colors[off_key] = value
+            self._clear_change_markers()
             self.update_status("File saved successfully.", "green")
-            self.undo_manager.clear_history()
+            self.undo_manager.clear_edits()
         except Exception as e:
             messagebox.showerror("Save Error", f"An error occurred while saving the file: {e}")
             logging.error(f"File save failed: {e}", exc_info=True)
 
+    def export_patch(self):
+        """Writes the current layout values, plus textures imported this session, as a patch file."""
+        if not self.file_path or not self.internal_name:
+            messagebox.showerror("Error", "Load a .big file with a valid configuration before exporting a patch.")
+            return
+        from patchset import PATCH_SUFFIX, PatchError, build_patch, write_patch
+        try:
+            encoded_offsets, encoded_colors = encode_values(
+                {lbl: self.offsets_vars[tuple(key)].get() for lbl, key in self.offsets.items() if tuple(key) in self.offsets_vars},
+                {lbl: self.color_vars[tuple(key)].get() for lbl, key in self.colors.items() if tuple(key) in self.color_vars})
+        except LayoutError as e:
+            messagebox.showerror("Export Error", f"Export aborted. Invalid values:\n\n{e}")
+            return
+        writes = [(addr, encoded_offsets[lbl]) for lbl in encoded_offsets for addr in self.offsets[lbl]]
+        writes += [(addr, encoded_colors[lbl]) for lbl in encoded_colors for addr in self.colors[lbl]]
+
+        try:
+            slot_runs = self._imported_slot_runs()
+            patch = build_patch(self.internal_name, writes, slot_runs)
+        except (OSError, KeyError, PatchError) as e:
+            messagebox.showerror("Export Error", f"Could not build the patch: {e}")
+            logging.error(f"Patch export failed: {e}", exc_info=True)
+            return
+
+        default_name = os.path.splitext(os.path.basename(self.file_path))[0] + PATCH_SUFFIX
+        out_path = filedialog.asksaveasfilename(title="Export Patch", initialfile=default_name, defaultextension=PATCH_SUFFIX,
+                                                filetypes=[("Scoreboard Patch", f"*{PATCH_SUFFIX}")])
+        if not out_path: return
+        try:
+            size = write_patch(out_path, patch)
+        except (OSError, PatchError) as e:
+            messagebox.showerror("Export Error", f"Could not write the patch: {e}")
+            return
+        msg = (f"Exported {len(patch.runs)} runs ({len(slot_runs)} texture slots) for '{self.internal_name}' "
+               f"to {os.path.basename(out_path)} ({format_filesize(size)}).")
+        self.update_status(msg, "green")
+        logging.info(msg)
+
+    def _imported_slot_runs(self):
+        """(address, current bytes, bytes before the first import) for slots of the open archive imported this session."""
+        slot_bases = self.imported_slot_bases.get(self.file_path, {})
+        runs = []
+        with open(self.file_path, 'rb') as f:
+            for (address, length), base_digest in sorted(slot_bases.items()):
+                f.seek(address)
+                current = f.read(length)
+                base = self.snapshot_store.get(base_digest)
+                if current != base:
+                    runs.append((address, current, base))
+        return runs
+
+    def apply_patch_file(self):
+        """Applies a patch file to the open archive and reloads it."""
+        if not self.file_path:
+            messagebox.showerror("Error", "No .big file loaded.")
+            return
+        from patchset import PATCH_SUFFIX, PatchError, apply_patch, read_patch
+        patch_path = filedialog.askopenfilename(title="Apply Patch", filetypes=[("Scoreboard Patch", f"*{PATCH_SUFFIX}")])
+        if not patch_path: return
+        try:
+            patch = read_patch(patch_path)
+        except (OSError, PatchError) as e:
+            messagebox.showerror("Patch Error", f"Could not read the patch: {e}")
+            return
+        if not messagebox.askyesno("Apply Patch", f"Apply {os.path.basename(patch_path)} ({len(patch.runs)} runs for "
+                                   f"'{patch.internal_name}') to {os.path.basename(self.file_path)}?\n"
+                                   f"Unsaved edits will be discarded and the undo history cleared."):
+            return
+
+        if self._archive_cache: self._archive_cache.invalidate(self.file_path)
+        result = apply_patch(patch, self.file_path)
+        if not result.ok:
+            messagebox.showerror("Patch Error", f"Patch not applied: {result.message}")
+            logging.error(f"Applying {patch_path} to {self.file_path} failed: {result.message}")
+            return
+        self.undo_manager.clear_history()
+        self.load_current_values()
+        if self.composite_mode_active:
+            self.toggle_composite_mode()
+        elif self.file_path:
+            self.extract_and_display_texture()
+        msg = f"Applied {os.path.basename(patch_path)}: {result.writes} runs, {format_filesize(result.bytes_written)} written."
+        self.update_status(msg, "green")
+        logging.info(msg)
+
+    def _collect_dirty_values(self):
+        """Returns {label: (address tuple, value)} for offsets and colors that differ from the loaded values."""
+        dirty_offsets = {}
+        for label, off_list in self.offsets.items():
+            off_key = tuple(off_list)
+            if off_key not in self.offsets_vars: continue
+            value = self.offsets_vars[off_key].get()
+            original = self.original_loaded_offsets.get(off_key)
+            if value == original: continue
+            try:
+                if original is not None and encode_float(value) == encode_float(original): continue
+            except LayoutError:
+                pass
+            dirty_offsets[label] = (off_key, value)
+
+        dirty_colors = {}
+        for label, off_list in self.colors.items():
+            off_key = tuple(off_list)
+            if off_key not in self.color_vars: continue
+            value = self.color_vars[off_key].get()
+            original = self.original_loaded_colors.get(off_key)
+            if original is not None and (value == original or (label not in SPECIAL_TEXT_COLOR_LABELS and value.lower() == original.lower())):
+                continue
+            dirty_colors[label] = (off_key, value)
+        return dirty_offsets, dirty_colors
+
+    def _clear_change_markers(self):
+        for asterisk_label in self.asterisk_labels.values():
+            asterisk_label.config(text="")
 
     def import_texture(self):
         if not self.file_path:
@@ -376,7 +567,7 @@ class App:
             return
 
         try:
-            big_file_obj = FifaBigFile(self.file_path)
+            big_file_obj = self.archive_cache.get(self.file_path)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to read BIG file for import: {e}")
             logging.error(f"BIG read error during import: {e}", exc_info=True)
@@ -401,17 +592,26 @@ class App:
 
         new_data_uncompressed = None
         try:
-            if new_texture_path.lower().endswith(".png"):
+            from dds import encode_dds, encoder_available
+            if new_texture_path.lower().endswith(".png") and encoder_available():
+                from PIL import Image
+                with Image.open(new_texture_path) as png_img:
+                    new_data_uncompressed = encode_dds(png_img, config.TEXTURE_IMPORT_FORMAT, config.TEXTURE_IMPORT_MIPMAPS)
+                logging.info(f"Encoded '{new_texture_path}' to {config.TEXTURE_IMPORT_FORMAT} DDS in-process.")
+
+            elif new_texture_path.lower().endswith(".png"):
                 if not os.path.isfile(config.TEXCONV_PATH):
                     messagebox.showerror("Dependency Missing", f"'texconv.exe' not found at:\n{config.TEXCONV_PATH}\nIt is required for PNG conversion.")
                     logging.error(f"texconv.exe not found at path: {config.TEXCONV_PATH}")
                     return
 
+                import tempfile
+                import subprocess
                 with tempfile.TemporaryDirectory() as temp_dir:
                     try:
                         creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
                         proc = subprocess.run(
-                            [config.TEXCONV_PATH, "-y", "-f", "BC3_UNORM", "-o", temp_dir, new_texture_path],
+                            [config.TEXCONV_PATH, "-y", "-f", f"{config.TEXTURE_IMPORT_FORMAT}_UNORM", "-m", "0" if config.TEXTURE_IMPORT_MIPMAPS else "1", "-o", temp_dir, new_texture_path],
                             check=True, capture_output=True, text=True, creationflags=creationflags
                         )
                         logging.info(f"texconv.exe ran for '{new_texture_path}'.\nstdout: {proc.stdout.strip()}")
@@ -449,8 +649,9 @@ class App:
             compression_msg = ""
             if original_entry_obj.compression == Compression.EAHD:
                 logging.info(f"Original '{file_name_to_replace}' was EAHD compressed. Attempting to compress new texture.")
-                data_to_write_in_big = Compressor.compress_eahd(new_data_uncompressed)
-                compression_msg = "(EAHD compression placeholder; data currently uncompressed)" if data_to_write_in_big is new_data_uncompressed else "(EAHD compression attempted)"
+                from file_io import Compressor
+                data_to_write_in_big = Compressor.compress_eahd(new_data_uncompressed, config.EAHD_COMPRESSION_LEVEL)
+                compression_msg = f"(EAHD compressed from {format_filesize(len(new_data_uncompressed))})"
                 logging.info(f"Compression status: {compression_msg}")
 
             if original_entry_obj.raw_size > 0 and len(data_to_write_in_big) > original_entry_obj.raw_size:
@@ -461,13 +662,23 @@ class App:
                 logging.warning(msg)
                 return
 
-            with open(self.file_path, 'r+b') as f_big_write:
-                f_big_write.seek(original_entry_obj.offset)
-                f_big_write.write(data_to_write_in_big)
-                if original_entry_obj.raw_size > 0 and len(data_to_write_in_big) < original_entry_obj.raw_size:
-                    padding_size = original_entry_obj.raw_size - len(data_to_write_in_big)
-                    f_big_write.write(b'\x00' * padding_size)
-                    logging.info(f"Padded import with {padding_size} bytes to match original size.")
+            self.archive_cache.invalidate(self.file_path)
+            slot_data = data_to_write_in_big
+            if original_entry_obj.raw_size > 0 and len(data_to_write_in_big) < original_entry_obj.raw_size:
+                padding_size = original_entry_obj.raw_size - len(data_to_write_in_big)
+                slot_data = data_to_write_in_big + b'\x00' * padding_size
+                logging.info(f"Padded import with {padding_size} bytes to match original size.")
+            with open(self.file_path, 'rb') as f_slot:
+                f_slot.seek(original_entry_obj.offset)
+                previous_slot_data = f_slot.read(len(slot_data))
+            write_transaction(self.file_path, [(original_entry_obj.offset, slot_data)])
+            store = self.snapshot_store
+            slot_bases = self.imported_slot_bases.setdefault(self.file_path, {})
+            if (original_entry_obj.offset, len(slot_data)) not in slot_bases:
+                slot_bases[(original_entry_obj.offset, len(slot_data))] = store.put(previous_slot_data)
+            self.undo_manager.record_action(TextureImportAction(
+                self.file_path, file_name_to_replace, original_entry_obj.offset, len(slot_data),
+                store.put(previous_slot_data), store.put(slot_data), store, f"Import {file_name_to_replace}.dds"))
 
             success_msg = (f"Successfully imported '{os.path.basename(new_texture_path)}' as '{file_name_to_replace}.dds'.\n"
                            f"Original slot size: {format_filesize(original_entry_obj.raw_size)}\n"
@@ -498,7 +709,7 @@ class App:
 
         file_name_to_export = config.IMAGE_FILES[self.current_image_index]
         try:
-            big_file_obj = FifaBigFile(self.file_path)
+            big_file_obj = self.archive_cache.get(self.file_path)
         except Exception as e:
             messagebox.showerror("Error", f"Could not read BIG file for export: {e}")
             logging.error(f"BIG read error on export: {e}", exc_info=True)
@@ -517,15 +728,10 @@ class App:
         )
         if not export_target_path: return
 
-        temp_dds_path_for_export = None
         try:
             if export_target_path.lower().endswith(".png"):
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".dds") as temp_dds_f:
-                    temp_dds_f.write(data_for_export)
-                    temp_dds_path_for_export = temp_dds_f.name
-                
-                with Image.open(temp_dds_path_for_export) as pil_img_export:
-                    pil_img_export.save(export_target_path, "PNG")
+                from dds import open_dds_image
+                open_dds_image(data_for_export).save(export_target_path, "PNG")
                 
                 messagebox.showinfo("Export Successful", f"Exported '{file_name_to_export}.dds' as a PNG file to:\n'{export_target_path}'")
                 logging.info(f"Exported {file_name_to_export}.dds as PNG to {export_target_path}")
@@ -540,16 +746,11 @@ class App:
         except Exception as e_export:
             messagebox.showerror("Export Error", f"Failed to export file: {e_export}")
             logging.error(f"Export failed: {e_export}", exc_info=True)
-        finally:
-            if temp_dds_path_for_export and os.path.exists(temp_dds_path_for_export):
-                try:
-                    os.remove(temp_dds_path_for_export)
-                except Exception as e_clean:
-                    logging.warning(f"Could not remove temporary export file: {e_clean}")
 
 
     # --- UI and Editor Logic ---
     def add_internal_name(self):
+        self.internal_name = None
         if not self.file_path:
             self.internal_name_label.config(text="Internal Name: Not Loaded")
             self.clear_editor_widgets()
@@ -558,19 +759,23 @@ class App:
             if self.composite_mode_active: self.toggle_composite_mode()
             return
 
-        internal_name_str = read_internal_name(self.file_path)
+        database = self._get_offsets_db()
+        internal_name_str = read_internal_name(self.file_path, detection_order(database.names()) if database else KNOWN_INTERNAL_NAMES)
         if internal_name_str:
             self.internal_name_label.config(text=f"Internal Name: {internal_name_str}")
-            if internal_name_str in self.offsets_data:
-                config_data = self.offsets_data[internal_name_str]
-                self.current_reference_width = config_data.get("reference_width")
-                self.current_reference_height = config_data.get("reference_height")
-                self.offsets = {k: [int(str(v), 16) for v in (vl if isinstance(vl, list) else [vl])] for k, vl in config_data.get("offsets", {}).items()}
-                self.colors = {k: [int(str(v), 16) for v in (vl if isinstance(vl, list) else [vl])] for k, vl in config_data.get("colors", {}).items()}
+            layout = database.get(internal_name_str) if database else None
+            if layout:
+                self.internal_name = internal_name_str
+                self.current_reference_width = layout.reference_width
+                self.current_reference_height = layout.reference_height
+                self.offsets = layout.offsets
+                self.colors = layout.colors
+                self.read_plan = database.read_plan(internal_name_str)
                 self._recreate_widgets()
                 self.load_current_values()
             else:
-                messagebox.showerror("Config Error", f"Configuration for '{internal_name_str}' not found in offsets.json.")
+                if database:
+                    messagebox.showerror("Config Error", f"Configuration for '{internal_name_str}' not found in offsets.json.")
                 self.internal_name_label.config(text=f"Internal Name: {internal_name_str} (No Config)")
                 self.clear_editor_widgets()
                 self.current_reference_width = None
@@ -588,21 +793,48 @@ class App:
             self.current_reference_height = None
             if self.composite_mode_active: self.toggle_composite_mode()
 
+    def _get_offsets_db(self) -> Optional[offsets_db.OffsetsDatabase]:
+        """Loads the compiled offsets database on first use, asking for offsets.json if the bundled one is missing."""
+        if self.offsets_db is not None:
+            return self.offsets_db
+        try:
+            self.offsets_db = offsets_db.get_database()
+        except FileNotFoundError:
+            messagebox.showwarning("File Not Found", "offsets.json not found in the default location. Please select it manually.")
+            file_path_json = filedialog.askopenfilename(title="Select offsets.json file", filetypes=[("JSON files", "*.json")])
+            if not file_path_json:
+                messagebox.showerror("Error", "No offsets.json selected. Scoreboard values cannot be edited.")
+                return None
+            try:
+                self.offsets_db = offsets_db.load_database(file_path_json)
+                offsets_db.set_database(self.offsets_db)
+            except (OSError, json.JSONDecodeError, LayoutError) as e:
+                messagebox.showerror("Error", f"Failed to read the selected offsets.json file: {e}")
+                return None
+        except (OSError, json.JSONDecodeError, LayoutError) as e:
+            messagebox.showerror("Error", f"Failed to read the default offsets.json file: {e}")
+            logging.error(f"Loading offsets.json failed: {e}", exc_info=True)
+            return None
+        return self.offsets_db
+
     def clear_editor_widgets(self):
         for frame in [self.positions_frame, self.sizes_frame, self.colors_frame]:
             for widget in frame.winfo_children():
                 widget.destroy()
         
-        for attr in ['offsets_vars', 'color_vars', 'color_previews', 'offset_entry_widgets', 'asterisk_labels', 'color_comboboxes']:
+        for attr in ['offsets_vars', 'color_vars', 'color_previews', 'offset_entry_widgets', 'asterisk_labels', 'color_comboboxes',
+                     'offset_labels_by_key', 'color_labels_by_key']:
             if hasattr(self, attr):
                 getattr(self, attr).clear()
 
     def _recreate_widgets(self):
         self.clear_editor_widgets()
         
+        self.offset_labels_by_key = {tuple(v): lbl for lbl, v in self.offsets.items()}
+        self.color_labels_by_key = {tuple(v): lbl for lbl, v in self.colors.items()}
         self.offsets_vars = {tuple(v): tk.StringVar() for v in self.offsets.values()}
         self.color_vars = {
-            tuple(v_list): tk.StringVar(value='#000000' if lbl not in config.SPECIAL_TEXT_COLOR_LABELS else "WHITE")
+            tuple(v_list): tk.StringVar(value='#000000' if lbl not in SPECIAL_TEXT_COLOR_LABELS else "WHITE")
             for lbl, v_list in self.colors.items()
         }
         self.color_previews = {}
@@ -685,7 +917,7 @@ class App:
             current_var = self.color_vars[key_tuple]
             asterisk_col_idx = 2
 
-            if lbl in config.SPECIAL_TEXT_COLOR_LABELS:
+            if lbl in SPECIAL_TEXT_COLOR_LABELS:
                 combo = ttk.Combobox(self.colors_frame, textvariable=current_var, values=["WHITE", "BLACK"], width=8, state="readonly")
                 combo.grid(row=row_c, column=1, padx=0, pady=5)
                 self.color_comboboxes[key_tuple] = combo
@@ -743,58 +975,49 @@ class App:
             row_c += 1
 
     def load_current_values(self):
-        if not self.file_path or not hasattr(self, 'offsets_vars') or not hasattr(self, 'color_vars'):
+        if not self.file_path or self.read_plan is None or not hasattr(self, 'offsets_vars') or not hasattr(self, 'color_vars'):
             return
 
         self.original_loaded_offsets.clear()
         self.original_loaded_colors.clear()
 
         try:
-            with open(self.file_path, 'rb') as file:
-                # Load numerical offsets
-                for off_tuple, var_obj in self.offsets_vars.items():
-                    try:
-                        file.seek(off_tuple[0])
-                        data = file.read(4)
-                        val = struct.unpack('<f', data)[0]
-                        val_str = f"{val:.2f}"
-                        var_obj.set(val_str)
-                        self.original_loaded_offsets[off_tuple] = val_str
-                        if off_tuple in self.asterisk_labels: self.asterisk_labels[off_tuple].config(text="")
-                    except Exception:
-                        var_obj.set("ERR")
-                
-                # Load color values
-                for color_label, off_tuple_list in self.colors.items():
-                    off_tuple = tuple(off_tuple_list)
-                    if off_tuple not in self.color_vars: continue
-
-                    var_obj = self.color_vars[off_tuple]
-                    try:
-                        file.seek(off_tuple[0])
-                        if color_label in config.SPECIAL_TEXT_COLOR_LABELS:
-                            data_bytes = file.read(5)
-                            text_color_val = data_bytes.decode('ascii', errors='ignore').strip().rstrip('\x00')
-                            if text_color_val in ["WHITE", "BLACK"]:
-                                var_obj.set(text_color_val)
-                                self.original_loaded_colors[off_tuple] = text_color_val
-                            else:
-                                var_obj.set("ERR_TXT")
-                                self.original_loaded_colors[off_tuple] = "ERR_TXT"
-                        else: # Regular hex color
-                            data_bytes = file.read(4) # BGRA
-                            hex_col = f'#{data_bytes[2]:02X}{data_bytes[1]:02X}{data_bytes[0]:02X}'
-                            var_obj.set(hex_col)
-                            self.original_loaded_colors[off_tuple] = hex_col
-                            if off_tuple in self.color_previews: self.color_previews[off_tuple].config(bg=hex_col)
-                        
-                        if off_tuple in self.asterisk_labels: self.asterisk_labels[off_tuple].config(text="")
-
-                    except Exception as e:
-                        var_obj.set("#ERR" if color_label not in config.SPECIAL_TEXT_COLOR_LABELS else "ERR_TXT")
-                        logging.error(f"Error loading color/text for {color_label} at {off_tuple}: {e}")
+            values = self.read_plan.read(self.file_path)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to read values from the file: {e}")
+            return
+        self._bind_loaded_values(values)
+
+    def _bind_loaded_values(self, values: LayoutValues):
+        """Pushes values read from the file into the editor variables and records them as the saved state."""
+        for label, val in values.offsets.items():
+            off_tuple = tuple(self.offsets[label])
+            if off_tuple not in self.offsets_vars: continue
+            if val is None:
+                self.offsets_vars[off_tuple].set("ERR")
+                continue
+            val_str = f"{val:.2f}"
+            self.offsets_vars[off_tuple].set(val_str)
+            self.original_loaded_offsets[off_tuple] = val_str
+            if off_tuple in self.asterisk_labels: self.asterisk_labels[off_tuple].config(text="")
+
+        for color_label, val in values.colors.items():
+            off_tuple = tuple(self.colors[color_label])
+            if off_tuple not in self.color_vars: continue
+            var_obj = self.color_vars[off_tuple]
+            if color_label in SPECIAL_TEXT_COLOR_LABELS:
+                text_color_val = val if val in SPECIAL_TEXT_COLOR_VALUES else "ERR_TXT"
+                var_obj.set(text_color_val)
+                self.original_loaded_colors[off_tuple] = text_color_val
+            elif val is None:
+                var_obj.set("#ERR")
+                logging.error(f"Error loading color for {color_label} at {off_tuple}: address outside the file")
+                continue
+            else:
+                var_obj.set(val)
+                self.original_loaded_colors[off_tuple] = val
+                if off_tuple in self.color_previews: self.color_previews[off_tuple].config(bg=val)
+            if off_tuple in self.asterisk_labels: self.asterisk_labels[off_tuple].config(text="")
 
     def update_value(self, offset_key_tuple, string_var, from_undo_redo=False):
         val_str = string_var.get()
@@ -824,13 +1047,13 @@ class App:
             self._update_composite_element_from_offset(offset_key_tuple, new_game_offset_val)
 
     def _update_composite_element_from_offset(self, offset_key_tuple, new_game_offset_val):
-        current_offset_json_label = next((label for label, off_list in self.offsets.items() if tuple(off_list) == offset_key_tuple), None)
+        current_offset_json_label = self.offset_labels_by_key.get(offset_key_tuple)
         if not current_offset_json_label: return
 
-        visual_updated = False
+        modified_elements = []
         is_font_size_update = "Size" in current_offset_json_label and any(kw in current_offset_json_label for kw in ["Font", "Text", "Name", "Score"])
 
-        for el_data in self.composite_elements:
+        for el_data in self.composite_renderer.elements_for_label(current_offset_json_label):
             element_modified = False
             if el_data.get('x_offset_label_linked') == current_offset_json_label:
                 base_game_x = el_data.get('base_game_x')
@@ -848,15 +1071,12 @@ class App:
                 element_modified = True
 
             if element_modified:
-                visual_updated = True
-                leader_tag = el_data.get('display_tag')
-                if leader_tag: # Update conjoined elements
-                    for follower in self.composite_elements:
-                        if follower.get('conjoined_to_tag') == leader_tag:
-                            follower['original_x'] = el_data['original_x'] + follower.get('relative_offset_x', 0)
-                            follower['original_y'] = el_data['original_y'] + follower.get('relative_offset_y', 0)
+                modified_elements.append(el_data)
+                for follower in self.composite_renderer.followers_of(el_data): # Update conjoined elements
+                    follower['original_x'] = el_data['original_x'] + follower.get('relative_offset_x', 0)
+                    follower['original_y'] = el_data['original_y'] + follower.get('relative_offset_y', 0)
         
-        if visual_updated: self.redraw_composite_view()
+        if modified_elements: self.redraw_composite_view(self._with_conjoined(modified_elements))
 
     def _increment_value(self, event, str_var, direction):
         try:
@@ -884,7 +1104,7 @@ class App:
                 if hasattr(self, 'color_previews') and off_key_tuple in self.color_previews:
                     self.color_previews[off_key_tuple].config(bg=hex_color_str)
                 if not from_undo_redo: self.update_status("Color preview updated.", "blue")
-                if self.composite_mode_active: self.redraw_composite_view()
+                if self.composite_mode_active: self.redraw_composite_view(self._composite_elements_for_color(off_key_tuple))
             except ValueError:
                 if not from_undo_redo: self.update_status("Invalid hex color code.", "red")
         elif not from_undo_redo and len(hex_color_str) > 0 and not hex_color_str.startswith('#') and all(c in "0123456789abcdefABCDEF" for c in hex_color_str) and len(hex_color_str) <= 6:
@@ -902,7 +1122,7 @@ class App:
         if not from_undo_redo:
             self.update_status(f"Text color set to {text_color_value}.", "blue")
         if self.composite_mode_active:
-            self.redraw_composite_view()
+            self.redraw_composite_view(self._composite_elements_for_color(off_key_tuple))
 
         if off_key_tuple in self.asterisk_labels:
             original_val = self.original_loaded_colors.get(off_key_tuple)
@@ -954,7 +1174,7 @@ class App:
             return False
 
         try:
-            big_file = FifaBigFile(self.file_path)
+            big_file = self.archive_cache.get(self.file_path)
             if not (0 <= self.current_image_index < len(config.IMAGE_FILES)): return False
             img_name = config.IMAGE_FILES[self.current_image_index]
             entry = next((e for e in big_file.entries if e.name == img_name), None)
@@ -963,38 +1183,58 @@ class App:
                 logging.info(f"Texture '{img_name}' is not a valid or displayable DDS file.")
                 return False
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".dds") as tmp_f:
-                tmp_f.write(entry.data)
-                temp_dds_path = tmp_f.name
-            
             try:
-                pil_img = Image.open(temp_dds_path)
-                w, h = pil_img.width, pil_img.height
-                
-                bg_color = (255, 255, 255, 255) if self.preview_bg_color_is_white else (0, 0, 0, 255)
-                pil_rgba = pil_img.convert('RGBA') if pil_img.mode != 'RGBA' else pil_img
-                background = Image.new('RGBA', pil_rgba.size, bg_color)
-                self.current_image = Image.alpha_composite(background, pil_rgba)
-                
-                self.single_view_zoom_level = 1.0
-                self.single_view_pan_offset_x = 0.0
-                self.single_view_pan_offset_y = 0.0
-                self.redraw_single_view_image()
-                
-                self.texture_label.config(text=f"{img_name}.dds")
-                self.image_dimensions_label.config(text=f"{w}x{h}")
-                return True
+                pil_rgba = self._decode_texture_rgba(img_name, entry.data)
             except Exception as e_disp:
                 logging.warning(f"Failed to display DDS texture '{img_name}': {e_disp}")
                 return False
-            finally:
-                if os.path.exists(temp_dds_path): os.remove(temp_dds_path)
+
+            self.current_rgba = pil_rgba
+            self._apply_preview_background()
+            self.single_view_zoom_level = 1.0
+            self.single_view_pan_offset_x = 0.0
+            self.single_view_pan_offset_y = 0.0
+            self.redraw_single_view_image()
+
+            self.texture_label.config(text=f"{img_name}.dds")
+            self.image_dimensions_label.config(text=f"{pil_rgba.width}x{pil_rgba.height}")
+            return True
         
         except Exception as e_outer:
             logging.error(f"Error during texture extraction: {e_outer}", exc_info=True)
             return False
 
-    def redraw_single_view_image(self):
+    def _decode_texture_rgba(self, img_name: str, dds_data) -> "Image.Image":
+        """Decodes DDS data to RGBA, reusing the texture cache when the same content was seen before."""
+        from cache import TextureCache
+        from dds import open_dds_image
+        key = TextureCache.make_key(img_name, dds_data)
+        pil_rgba = self.texture_cache.get(key)
+        if pil_rgba is not None:
+            return pil_rgba
+
+        pil_rgba = open_dds_image(dds_data).convert('RGBA')
+
+        self.texture_cache.put(key, pil_rgba)
+        return pil_rgba
+
+    def _apply_preview_background(self):
+        """Composites the current RGBA texture over the selected preview background."""
+        bg_color = (255, 255, 255, 255) if self.preview_bg_color_is_white else (0, 0, 0, 255)
+        from PIL import Image
+        background = Image.new('RGBA', self.current_rgba.size, bg_color)
+        self.current_image = Image.alpha_composite(background, self.current_rgba)
+
+    def _render_preview(self, fast: bool):
+        """Scheduled render of whichever view is active; fast is set while the user is still interacting."""
+        if self.composite_mode_active:
+            self.composite_renderer.set_quality(fast)
+            self.composite_renderer.set_view(self.composite_zoom_level, self.composite_pan_offset_x, self.composite_pan_offset_y)
+            self.composite_renderer.render()
+        else:
+            self.redraw_single_view_image(fast)
+
+    def redraw_single_view_image(self, fast: bool = False):
         if self.current_image is None:
             self.preview_canvas.delete("all")
             return
@@ -1003,19 +1243,15 @@ class App:
         canvas_h = self.preview_canvas.winfo_height()
         if canvas_w <= 1 or canvas_h <= 1: return
 
-        zoomed_w = int(self.current_image.width * self.single_view_zoom_level)
-        zoomed_h = int(self.current_image.height * self.single_view_zoom_level)
-        if zoomed_w <= 0 or zoomed_h <= 0: return
-
         try:
-            resized_img = self.current_image.resize((zoomed_w, zoomed_h), Image.LANCZOS)
-            img_tk = ImageTk.PhotoImage(resized_img)
-            self.preview_canvas.delete("all")
-            
             draw_x = canvas_w / 2 + self.single_view_pan_offset_x
             draw_y = canvas_h / 2 + self.single_view_pan_offset_y
-            self.preview_canvas.create_image(draw_x, draw_y, anchor=tk.CENTER, image=img_tk, tags="image_on_canvas")
-            self.preview_canvas.image_ref = img_tk
+            tiles = self.single_view_tiles.visible_tiles(self.current_image, self.single_view_zoom_level,
+                                                         canvas_w, canvas_h, draw_x, draw_y, fast)
+            self.preview_canvas.delete("all")
+            for tile_x, tile_y, tile_tk in tiles:
+                self.preview_canvas.create_image(tile_x, tile_y, anchor=tk.NW, image=tile_tk, tags="image_on_canvas")
+            self.preview_canvas.image_ref = [tile_tk for _, _, tile_tk in tiles]
         except Exception as e:
             logging.error(f"Error redrawing single view image: {e}")
 
@@ -1054,8 +1290,9 @@ class App:
     def toggle_preview_background(self):
         if self.composite_mode_active: return
         self.preview_bg_color_is_white = not self.preview_bg_color_is_white
-        if self.file_path and self.current_image:
-            self.extract_and_display_texture()
+        if self.file_path and self.current_image and self.current_rgba is not None:
+            self._apply_preview_background()
+            self.redraw_single_view_image()
 
     # --- Mouse/Drag Handlers ---
     def zoom_image_handler(self, event):
@@ -1073,13 +1310,13 @@ class App:
     def on_drag_release_handler(self, event):
         self.drag_data["is_panning"] = False
         self.drag_data["is_panning_rmb"] = False
-        if self.composite_mode_active: self.clear_all_highlights()
+        if self.composite_mode_active: self.on_drag_release_composite(event)
 
     def zoom_single_view(self, event):
         if self.current_image is None: return
         factor = 1.1 if event.delta > 0 else (1 / 1.1)
         self.single_view_zoom_level = max(0.05, min(self.single_view_zoom_level * factor, 10.0))
-        self.redraw_single_view_image()
+        self.render_scheduler.request(interactive=True)
 
     def start_drag_single(self, event):
         self.drag_data["is_panning"] = True
@@ -1094,7 +1331,7 @@ class App:
         self.single_view_pan_offset_y += dy
         self.drag_data["x"] = event.x
         self.drag_data["y"] = event.y
-        self.redraw_single_view_image()
+        self.render_scheduler.request(interactive=True)
 
 
     # --- Composite View ---
@@ -1169,13 +1406,14 @@ class App:
 
         self.preview_canvas.config(bg="gray70")
         try:
-            big_file = FifaBigFile(self.file_path)
+            big_file = self.archive_cache.get(self.file_path)
             canvas_w = self.preview_canvas.winfo_width() or 580
             canvas_h = self.preview_canvas.winfo_height() or 150
             
             # Load images
             temp_elements_map: Dict[str, Dict[str, Any]] = {}
             images_to_load_cfg = [("10", "10"), ("14", "14"), ("30", "30_orig"), ("30", "30_dup")]
+            big_file.decompress_all(name for name, _ in images_to_load_cfg)
             source_dds_entries = {e.name: e for e in big_file.entries if e.name in [c[0] for c in images_to_load_cfg] and e.file_type == "DDS" and e.data}
 
             for big_name, disp_tag_suffix in images_to_load_cfg:
@@ -1185,32 +1423,25 @@ class App:
                 img_cfg = config.PREDEFINED_IMAGE_COORDS.get(img_tag)
                 if not img_cfg: continue
 
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".dds") as tmp_f:
-                    tmp_f.write(source_entry.data)
-                    tmp_path = tmp_f.name
+                pil_img = self._decode_texture_rgba(big_name, source_entry.data)
+                gui_ref_x, gui_ref_y, x_lbl, base_gx, y_lbl, base_gy = img_cfg
+                vis_x, vis_y = float(gui_ref_x), float(gui_ref_y)
                 
-                try:
-                    pil_img = Image.open(tmp_path).convert("RGBA")
-                    gui_ref_x, gui_ref_y, x_lbl, base_gx, y_lbl, base_gy = img_cfg
-                    vis_x, vis_y = float(gui_ref_x), float(gui_ref_y)
-                    
-                    if x_lbl in self.offsets and y_lbl in self.colors and hasattr(self, 'offsets_vars'):
-                        x_key, y_key = tuple(self.offsets[x_lbl]), tuple(self.offsets[y_lbl])
-                        if x_key in self.offsets_vars and y_key in self.offsets_vars:
-                            try:
-                                cur_gx, cur_gy = float(self.offsets_vars[x_key].get()), float(self.offsets_vars[y_key].get())
-                                vis_x += (cur_gx - base_gx)
-                                vis_y += (cur_gy - base_gy)
-                            except ValueError: pass
-                    
-                    temp_elements_map[img_tag] = {
-                        'type': "image", 'pil_image': pil_img, 'original_x': vis_x, 'original_y': vis_y,
-                        'display_tag': img_tag, 'is_fixed': (img_tag == "img_10"),
-                        'x_offset_label_linked': x_lbl, 'y_offset_label_linked': y_lbl,
-                        'base_game_x': base_gx, 'base_game_y': base_gy, 'gui_ref_x': gui_ref_x, 'gui_ref_y': gui_ref_y
-                    }
-                finally:
-                    if os.path.exists(tmp_path): os.remove(tmp_path)
+                if x_lbl in self.offsets and y_lbl in self.colors and hasattr(self, 'offsets_vars'):
+                    x_key, y_key = tuple(self.offsets[x_lbl]), tuple(self.offsets[y_lbl])
+                    if x_key in self.offsets_vars and y_key in self.offsets_vars:
+                        try:
+                            cur_gx, cur_gy = float(self.offsets_vars[x_key].get()), float(self.offsets_vars[y_key].get())
+                            vis_x += (cur_gx - base_gx)
+                            vis_y += (cur_gy - base_gy)
+                        except ValueError: pass
+                
+                temp_elements_map[img_tag] = {
+                    'type': "image", 'pil_image': pil_img, 'original_x': vis_x, 'original_y': vis_y,
+                    'display_tag': img_tag, 'is_fixed': (img_tag == "img_10"),
+                    'x_offset_label_linked': x_lbl, 'y_offset_label_linked': y_lbl,
+                    'base_game_x': base_gx, 'base_game_y': base_gy, 'gui_ref_x': gui_ref_x, 'gui_ref_y': gui_ref_y
+                }
             
             # Load text elements
             for cfg_tuple in config.INITIAL_TEXT_ELEMENTS_CONFIG:
@@ -1256,6 +1487,7 @@ class App:
                 follower.update({'conjoined_to_tag': leader_tag, 'relative_offset_x': rel_off_x, 'relative_offset_y': rel_off_y, 'is_fixed': True})
 
             self.composite_elements = list(temp_elements_map.values())
+            self.composite_renderer.set_elements(self.composite_elements)
             self.redraw_composite_view()
             self.texture_label.config(text="Composite Mode Active")
             self.image_dimensions_label.config(text=f"Canvas: {canvas_w}x{canvas_h} | Ref: {self.current_reference_width or 'N/A'}x{self.current_reference_height or 'N/A'}")
@@ -1264,64 +1496,46 @@ class App:
             logging.error(f"Critical composite display error: {e}", exc_info=True)
             self.toggle_composite_mode() # Switch back to single view
 
-    def redraw_composite_view(self):
-        self.preview_canvas.delete("composite_item")
-        canvas_w = self.preview_canvas.winfo_width() or 580
-        canvas_h = self.preview_canvas.winfo_height() or 150
-        
-        view_origin_x = canvas_w / 2.0
-        view_origin_y = canvas_h / 2.0
-        eff_pan_x = self.composite_pan_offset_x * self.composite_zoom_level
-        eff_pan_y = self.composite_pan_offset_y * self.composite_zoom_level
-
-        for el_data in self.composite_elements:
-            screen_x = view_origin_x - eff_pan_x + (el_data['original_x'] * self.composite_zoom_level)
-            screen_y = view_origin_y - eff_pan_y + (el_data['original_y'] * self.composite_zoom_level)
-            el_data.update({'current_x_on_canvas': screen_x, 'current_y_on_canvas': screen_y})
-
-            if el_data.get('type') == "text":
-                zoomed_font_size = max(1, int(el_data.get('base_font_size', config.DEFAULT_TEXT_BASE_FONT_SIZE) * self.composite_zoom_level))
-                
-                text_color = config.DEFAULT_TEXT_COLOR_FALLBACK
-                color_label = el_data.get('color_offset_label')
-                if color_label and color_label in self.colors and hasattr(self, 'color_vars'):
-                    key_tuple = tuple(self.colors[color_label])
-                    if key_tuple in self.color_vars:
-                        val = self.color_vars[key_tuple].get()
-                        if color_label in config.SPECIAL_TEXT_COLOR_LABELS:
-                            text_color = val.lower()
-                        elif val.startswith("#") and len(val) == 7:
-                            text_color = val
-                
-                item_id = self.preview_canvas.create_text(
-                    int(screen_x), int(screen_y), anchor=tk.NW, text=el_data['text_content'],
-                    font=(config.DEFAULT_TEXT_FONT_FAMILY, zoomed_font_size, "bold"), fill=text_color,
-                    tags=("composite_item", el_data['display_tag'])
-                )
-                el_data['canvas_id'] = item_id
-
-            elif el_data.get('type') == "image":
-                pil_img = el_data['pil_image']
-                zoomed_w = int(pil_img.width * self.composite_zoom_level)
-                zoomed_h = int(pil_img.height * self.composite_zoom_level)
-                if zoomed_w <= 0 or zoomed_h <= 0: continue
-
-                try:
-                    resized_pil = pil_img.resize((zoomed_w, zoomed_h), Image.LANCZOS)
-                    el_data['tk_image_ref'] = ImageTk.PhotoImage(resized_pil)
-                    item_id = self.preview_canvas.create_image(
-                        int(screen_x), int(screen_y), anchor=tk.NW,
-                        image=el_data['tk_image_ref'], tags=("composite_item", el_data['display_tag'])
-                    )
-                    el_data['canvas_id'] = item_id
-                except Exception as e_redraw:
-                    logging.error(f"Error redrawing image {el_data.get('display_tag')}: {e_redraw}")
+    def redraw_composite_view(self, elements=None, interactive: bool = False):
+        """
+        Marks elements (all if None) as changed and schedules a composite render for the next frame.
+        interactive marks requests from continuous input, which are previewed at fast quality.
+        """
+        self.composite_renderer.invalidate(elements)
+        self.render_scheduler.request(interactive)
+
+    def _composite_text_color(self, el_data) -> str:
+        color_label = el_data.get('color_offset_label')
+        if color_label and color_label in self.colors and hasattr(self, 'color_vars'):
+            key_tuple = tuple(self.colors[color_label])
+            if key_tuple in self.color_vars:
+                val = self.color_vars[key_tuple].get()
+                if color_label in SPECIAL_TEXT_COLOR_LABELS:
+                    return val.lower()
+                if val.startswith("#") and len(val) == 7:
+                    return val
+        return config.DEFAULT_TEXT_COLOR_FALLBACK
+
+    def _composite_elements_for_color(self, color_key_tuple):
+        color_label = self.color_labels_by_key.get(color_key_tuple)
+        return [el for el in self.composite_renderer.elements_for_label(color_label) if el.get('color_offset_label') == color_label]
+
+    def _with_conjoined(self, elements):
+        """Returns the elements followed by every element conjoined to one of them."""
+        result = list(elements)
+        seen = {id(el) for el in result}
+        for el in elements:
+            for follower in self.composite_renderer.followers_of(el):
+                if id(follower) not in seen:
+                    seen.add(id(follower))
+                    result.append(follower)
+        return result
 
     def clear_composite_view(self):
-        self.preview_canvas.delete("composite_item")
-        for el in self.composite_elements:
-            if 'tk_image_ref' in el: del el['tk_image_ref']
+        self.render_scheduler.cancel()
+        self.composite_renderer.clear()
         self.composite_elements.clear()
+        if self._zoomed_image_cache: self._zoomed_image_cache.clear()
         self.preview_canvas.config(bg="#CCCCCC")
         
     def clear_all_highlights(self):
@@ -1348,7 +1562,7 @@ class App:
             self.composite_pan_offset_y += pan_adj_y
 
         self.composite_zoom_level = new_zoom
-        self.redraw_composite_view()
+        self.redraw_composite_view(elements=[], interactive=True)
 
     def start_pan_composite(self, event):
         self.drag_data["is_panning_rmb"] = True
@@ -1364,7 +1578,7 @@ class App:
             self.composite_pan_offset_y -= dy / self.composite_zoom_level
         self.drag_data["x"] = event.x
         self.drag_data["y"] = event.y
-        self.redraw_composite_view()
+        self.redraw_composite_view(elements=[], interactive=True)
 
     def start_drag_composite(self, event):
         if event.num == 3: # Right click
@@ -1380,36 +1594,37 @@ class App:
             return
         
         item_id = item_tuple[0]
-        if "composite_item" not in self.preview_canvas.gettags(item_id):
+        if CANVAS_TAG not in self.preview_canvas.gettags(item_id):
             self.composite_drag_data['item'] = None
             return
 
-        for el_data in self.composite_elements:
-            if el_data.get('canvas_id') == item_id:
-                if el_data.get('is_fixed', False):
-                    logging.info(f"Attempted to drag a fixed element: {el_data.get('display_tag')}")
-                    self.composite_drag_data['item'] = None
-                    return
-                
-                initial_gx, initial_gy = 0.0, 0.0
-                try:
-                    if el_data.get('x_offset_label_linked') in self.offsets:
-                        initial_gx = float(self.offsets_vars[tuple(self.offsets[el_data['x_offset_label_linked']])].get())
-                    if el_data.get('y_offset_label_linked') in self.offsets:
-                        initial_gy = float(self.offsets_vars[tuple(self.offsets[el_data['y_offset_label_linked']])].get())
-                except (ValueError, KeyError):
-                    logging.warning(f"Could not parse initial game offsets for {el_data.get('display_tag')}.")
-
-                self.composite_drag_data.update({
-                    'item': item_id, 'x': event.x, 'y': event.y, 'element_data': el_data,
-                    'start_original_x': el_data['original_x'], 'start_original_y': el_data['original_y'],
-                    'initial_game_offset_x_at_drag_start': initial_gx,
-                    'initial_game_offset_y_at_drag_start': initial_gy
-                })
-                self.preview_canvas.tag_raise(item_id)
-                self._highlight_linked_entries(el_data)
-                return
-        self.composite_drag_data['item'] = None
+        el_data = self.composite_renderer.element_for_item(item_id)
+        if el_data is None:
+            self.composite_drag_data['item'] = None
+            return
+        if el_data.get('is_fixed', False):
+            logging.info(f"Attempted to drag a fixed element: {el_data.get('display_tag')}")
+            self.composite_drag_data['item'] = None
+            return
+        
+        initial_gx, initial_gy = 0.0, 0.0
+        try:
+            if el_data.get('x_offset_label_linked') in self.offsets:
+                initial_gx = float(self.offsets_vars[tuple(self.offsets[el_data['x_offset_label_linked']])].get())
+            if el_data.get('y_offset_label_linked') in self.offsets:
+                initial_gy = float(self.offsets_vars[tuple(self.offsets[el_data['y_offset_label_linked']])].get())
+        except (ValueError, KeyError):
+            logging.warning(f"Could not parse initial game offsets for {el_data.get('display_tag')}.")
+
+        self.composite_drag_data.update({
+            'item': item_id, 'x': event.x, 'y': event.y, 'element_data': el_data,
+            'start_original_x': el_data['original_x'], 'start_original_y': el_data['original_y'],
+            'initial_game_offset_x_at_drag_start': initial_gx,
+            'initial_game_offset_y_at_drag_start': initial_gy,
+            'start_values': {key: self.offsets_vars[key].get() for key in self._drag_offset_keys(el_data)}
+        })
+        self.preview_canvas.tag_raise(item_id)
+        self._highlight_linked_entries(el_data)
 
     def _highlight_linked_entries(self, el_data):
         labels_to_highlight = [
@@ -1455,33 +1670,32 @@ class App:
             self.update_value(tuple(self.offsets[y_label]), self.offsets_vars[tuple(self.offsets[y_label])])
             
         # Update conjoined elements
-        if elem_data.get('display_tag'):
-            for follower in self.composite_elements:
-                if follower.get('conjoined_to_tag') == elem_data['display_tag']:
-                    follower['original_x'] = elem_data['original_x'] + follower.get('relative_offset_x', 0)
-                    follower['original_y'] = elem_data['original_y'] + follower.get('relative_offset_y', 0)
+        for follower in self.composite_renderer.followers_of(elem_data):
+            follower['original_x'] = elem_data['original_x'] + follower.get('relative_offset_x', 0)
+            follower['original_y'] = elem_data['original_y'] + follower.get('relative_offset_y', 0)
+
+        self.redraw_composite_view(self._with_conjoined([elem_data]), interactive=True)
 
-        self.redraw_composite_view()
+    def _drag_offset_keys(self, el_data):
+        labels = (el_data.get('x_offset_label_linked'), el_data.get('y_offset_label_linked'))
+        return [tuple(self.offsets[lbl]) for lbl in labels if lbl in self.offsets and tuple(self.offsets[lbl]) in self.offsets_vars]
 
     def on_drag_release_composite(self, event):
         if event.num == 3: # Right click
             self.drag_data["is_panning_rmb"] = False
         else: # Left click
-            # Create a single undo action for the entire drag operation
+            # Record the whole drag (X and Y together) as a single undo step
             elem_data = self.composite_drag_data.get('element_data')
             if elem_data and self.composite_drag_data.get('item'):
-                x_label = elem_data.get('x_offset_label_linked')
-                y_label = elem_data.get('y_offset_label_linked')
-                if x_label in self.offsets and y_label in self.offsets:
-                    x_key, y_key = tuple(self.offsets[x_label]), tuple(self.offsets[y_label])
-                    # For simplicity, we record the end state. A more complex system
-                    # could bundle both X and Y into a single "Move" action.
-                    # For now, we rely on the continuous updates during drag being coalesced
-                    # by the undo manager if we were to record them there.
-                    # With this release-based approach, we need to get the "before" values.
-                    # This is complex, so for now we'll just let the last update_value call handle it.
-                    pass 
+                start_values = self.composite_drag_data.get('start_values', {})
+                with self.undo_manager.transaction(f"Move {elem_data.get('display_tag')}"):
+                    for key, old_value in start_values.items():
+                        var = self.offsets_vars.get(key)
+                        if var is not None and var.get() != old_value:
+                            widget = self.offset_entry_widgets.get(key)
+                            self.undo_manager.record_action(EditAction(var, old_value, var.get(), key, widget, f"Drag {elem_data.get('display_tag')}"))
             self.composite_drag_data['item'] = None
+            self.composite_drag_data['start_values'] = {}
             self.clear_all_highlights()
 
     # --- Misc and Helpers ---
@@ -1512,8 +1726,11 @@ class App:
         win.wait_window()
 
     def show_documentation(self):
+        import webbrowser
         webbrowser.open("https://soccergaming.com/")
 
     def exit_app(self):
         if messagebox.askyesno("Exit Application", "Are you sure you want to exit?"):
+            if self._archive_cache: self._archive_cache.invalidate()
+            if self._snapshot_store: self._snapshot_store.close()
             self.root.destroy()
\ No newline at end of file
@@ -0,0 +1,206 @@
+import math
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image, ImageTk
+
+# --- Image Pyramids and Zoomed Image Cache ---
+
+# Zoom levels are cached on a logarithmic grid; 128 steps per octave keeps the size error
+# of a cached image under 0.3% (below a pixel for anything up to ~370 px across).
+ZOOM_STEPS_PER_OCTAVE = 128
+
+# Filters for previews drawn while the user is zooming or dragging, and for the settled view
+FAST_RESAMPLE = Image.BILINEAR
+QUALITY_RESAMPLE = Image.LANCZOS
+
+
+def quantize_zoom(zoom: float) -> int:
+    """Maps a zoom factor to its step on the cache grid (0 is 1:1)."""
+    return round(math.log2(zoom) * ZOOM_STEPS_PER_OCTAVE)
+
+
+def zoom_for_step(step: int) -> float:
+    return 2.0 ** (step / ZOOM_STEPS_PER_OCTAVE)
+
+
+class ImagePyramid:
+    """
+    Mip chain of an image: level n is the source box-filtered down by 2**n (alpha premultiplied,
+    as Image.reduce does for RGBA). Downscales start from the smallest level that is still at
+    least as large as the target, so LANCZOS never has to filter more than a 2:1 reduction.
+    """
+    def __init__(self, image: Image.Image):
+        self.source = image
+        self.levels: List[Image.Image] = [image]
+        while min(self.levels[-1].size) >= 2:
+            self.levels.append(self.levels[-1].reduce(2))
+
+    def level_for(self, width: int, height: int) -> Image.Image:
+        chosen = self.levels[0]
+        for level in self.levels[1:]:
+            if level.width < width or level.height < height:
+                break
+            chosen = level
+        return chosen
+
+    def resample(self, width: int, height: int, resample=QUALITY_RESAMPLE) -> Image.Image:
+        level = self.level_for(width, height)
+        if level.size == (width, height):
+            return level
+        return level.resize((width, height), resample)
+
+
+class ZoomedImageCache:
+    """
+    Tk images of resampled element textures, keyed by (element key, zoom step), plus one
+    pyramid per element. Tk keeps the resampled pixels, so only the PhotoImage is stored.
+    An element whose source image object changes has its pyramid and entries rebuilt.
+    Entries are evicted least recently used first once their pixel memory exceeds the budget.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._pyramids: Dict[Hashable, ImagePyramid] = {}
+        self._entries: "OrderedDict[Tuple[Hashable, int], Tuple[ImageTk.PhotoImage, int]]" = OrderedDict()
+
+    def pyramid(self, key: Hashable, image: Image.Image) -> ImagePyramid:
+        pyramid = self._pyramids.get(key)
+        if pyramid is None or pyramid.source is not image:
+            self.discard(key)
+            pyramid = self._pyramids[key] = ImagePyramid(image)
+        return pyramid
+
+    def get(self, key: Hashable, image: Image.Image, zoom: float, fast: bool = False) -> Optional[ImageTk.PhotoImage]:
+        """
+        Returns the PhotoImage of image scaled to zoom, or None if it would be empty.
+        With fast=True a missing level is resampled with FAST_RESAMPLE and not cached,
+        so interactive previews never displace the high-quality images.
+        """
+        pyramid = self.pyramid(key, image)
+        step = quantize_zoom(zoom)
+        entry = self._entries.get((key, step))
+        if entry is not None:
+            self._entries.move_to_end((key, step))
+            return entry[0]
+
+        scale = zoom_for_step(step)
+        width, height = int(image.width * scale), int(image.height * scale)
+        if width <= 0 or height <= 0:
+            return None
+        if fast:
+            return ImageTk.PhotoImage(pyramid.resample(width, height, FAST_RESAMPLE))
+        photo = ImageTk.PhotoImage(pyramid.resample(width, height, QUALITY_RESAMPLE))
+        size = width * height * 4
+        if size <= self.max_bytes:
+            self._entries[(key, step)] = (photo, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+        return photo
+
+    def discard(self, key: Hashable):
+        """Drops the pyramid and every cached zoom level of one element."""
+        self._pyramids.pop(key, None)
+        for entry_key in [k for k in self._entries if k[0] == key]:
+            self.current_bytes -= self._entries.pop(entry_key)[1]
+
+    def clear(self):
+        self._pyramids.clear()
+        self._entries.clear()
+        self.current_bytes = 0
+
+
+# --- Viewport Tiles for the Single-Texture View ---
+
+TILE_SIZE = 256
+
+
+class TileCache:
+    """
+    Renders only the visible part of one zoomed image. The zoomed image is split into
+    TILE_SIZE squares in screen space; each tile overlapping the view (plus a margin) is
+    resampled straight from the matching source region, taken from the pyramid level for
+    zoom-outs, and cached per zoom step and quality so panning reuses it. Resampling work
+    and memory therefore scale with the view size, not with texture size times zoom.
+    """
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, tile_size: int = TILE_SIZE, margin: int = 32):
+        self.max_bytes = max_bytes
+        self.tile_size = tile_size
+        self.margin = margin
+        self.current_bytes = 0
+        self._source: Optional[Image.Image] = None
+        self._pyramid: Optional[ImagePyramid] = None
+        self._tiles: "OrderedDict[Tuple[int, bool, int, int], Tuple[ImageTk.PhotoImage, int]]" = OrderedDict()
+
+    def visible_tiles(self, image: Image.Image, zoom: float, view_w: int, view_h: int,
+                      center_x: float, center_y: float, fast: bool = False) -> List[Tuple[int, int, ImageTk.PhotoImage]]:
+        """
+        Returns (x, y, PhotoImage) for each tile of image, scaled by zoom and centered on
+        (center_x, center_y), that overlaps the view; x and y are the tile's top-left corner.
+        """
+        if image is not self._source:
+            self.clear()
+            self._source = image
+        step = quantize_zoom(zoom)
+        scale = zoom_for_step(step)
+        width, height = int(image.width * scale), int(image.height * scale)
+        if width <= 0 or height <= 0:
+            return []
+
+        left, top = round(center_x - width / 2.0), round(center_y - height / 2.0)
+        x0, x1 = max(0, -self.margin - left), min(width, view_w + self.margin - left)
+        y0, y1 = max(0, -self.margin - top), min(height, view_h + self.margin - top)
+        if x0 >= x1 or y0 >= y1:
+            return []
+
+        if scale < 1.0:
+            if self._pyramid is None:
+                self._pyramid = ImagePyramid(image)
+            level = self._pyramid.level_for(width, height)
+        else:
+            level = image
+        size = self.tile_size
+        tiles = []
+        for ty in range(y0 // size, (y1 - 1) // size + 1):
+            for tx in range(x0 // size, (x1 - 1) // size + 1):
+                photo = self._tile(level, width, height, step, fast, tx, ty)
+                tiles.append((left + tx * size, top + ty * size, photo))
+        return tiles
+
+    def _tile(self, level: Image.Image, width: int, height: int, step: int, fast: bool, tx: int, ty: int) -> ImageTk.PhotoImage:
+        for key in ((step, False, tx, ty), (step, True, tx, ty)) if fast else ((step, False, tx, ty),):
+            entry = self._tiles.get(key)
+            if entry is not None:
+                self._tiles.move_to_end(key)
+                return entry[0]
+
+        size = self.tile_size
+        ox0, oy0 = tx * size, ty * size
+        ox1, oy1 = min(width, ox0 + size), min(height, oy0 + size)
+        sx, sy = level.width / width, level.height / height
+        bx0, by0, bx1, by1 = ox0 * sx, oy0 * sy, ox1 * sx, oy1 * sy
+        # Crop with room for the filter support (Lanczos reaches 3 source pixels, more when
+        # downscaling) so resize() does not premultiply the whole image, then pass the exact
+        # box so neighbouring source pixels are sampled and tiles join without seams.
+        pad_x, pad_y = math.ceil(3 * max(1.0, sx)) + 1, math.ceil(3 * max(1.0, sy)) + 1
+        cx0, cy0 = max(0, int(bx0) - pad_x), max(0, int(by0) - pad_y)
+        cx1, cy1 = min(level.width, math.ceil(bx1) + pad_x), min(level.height, math.ceil(by1) + pad_y)
+        tile = level.crop((cx0, cy0, cx1, cy1)).resize(
+            (ox1 - ox0, oy1 - oy0), FAST_RESAMPLE if fast else QUALITY_RESAMPLE,
+            box=(bx0 - cx0, by0 - cy0, bx1 - cx0, by1 - cy0))
+        photo = ImageTk.PhotoImage(tile)
+        nbytes = tile.width * tile.height * 4
+        self._tiles[(step, fast, tx, ty)] = (photo, nbytes)
+        self.current_bytes += nbytes
+        while self.current_bytes > self.max_bytes and len(self._tiles) > 1:
+            _, (_, evicted_size) = self._tiles.popitem(last=False)
+            self.current_bytes -= evicted_size
+        return photo
+
+    def clear(self):
+        self._source = None
+        self._pyramid = None
+        self._tiles.clear()
+        self.current_bytes = 0
@@ -0,0 +1,146 @@
+import os
+import zlib
+import struct
+import logging
+from typing import List, Optional, Tuple
+
+from layout import coalesce_writes
+
+# --- Write-Ahead Patch Journal ---
+#
+# <archive>.journal layout (little-endian):
+#   header  : magic "FBJ1", state (u8), reserved (3 bytes), archive size (u64), run count (u32)
+#   run     : address (u64), length (u32), original bytes, new bytes
+#   trailer : CRC32 of header and runs with the state byte zeroed (u32)
+#
+# A save writes and fsyncs the journal (state PENDING) before touching the archive,
+# applies the runs, fsyncs the archive, flips the state to COMMITTED and deletes the
+# journal. A journal found later is therefore either incomplete (the archive was never
+# touched; discard it), pending (the archive may be half-patched; replay or roll back),
+# or committed (already applied; delete it).
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_MAGIC = b"FBJ1"
+STATE_PENDING = 0
+STATE_COMMITTED = 1
+
+_HEADER = struct.Struct('<4sB3xQI')
+_RUN = struct.Struct('<QI')
+_CRC = struct.Struct('<I')
+_STATE_OFFSET = 4
+
+
+class JournalError(Exception):
+    """Raised when a patch set cannot be journaled or applied."""
+
+
+def journal_path(archive_path: str) -> str:
+    return archive_path + JOURNAL_SUFFIX
+
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _encode_journal(archive_size: int, runs: List[Tuple[int, bytes, bytes]]) -> bytes:
+    parts = [_HEADER.pack(JOURNAL_MAGIC, STATE_PENDING, archive_size, len(runs))]
+    for addr, old, new in runs:
+        parts.append(_RUN.pack(addr, len(new)))
+        parts.append(old)
+        parts.append(new)
+    body = b"".join(parts)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def _decode_journal(data: bytes) -> Optional[Tuple[int, int, List[Tuple[int, bytes, bytes]]]]:
+    """Returns (state, archive size, runs), or None if the journal is incomplete or corrupt."""
+    if len(data) < _HEADER.size + _CRC.size:
+        return None
+    magic, state, archive_size, count = _HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC:
+        return None
+    body = bytearray(data[:-_CRC.size])
+    body[_STATE_OFFSET] = STATE_PENDING
+    if zlib.crc32(body) != _CRC.unpack_from(data, len(data) - _CRC.size)[0]:
+        return None
+    runs = []
+    pos = _HEADER.size
+    for _ in range(count):
+        addr, length = _RUN.unpack_from(data, pos)
+        pos += _RUN.size
+        runs.append((addr, data[pos:pos + length], data[pos + length:pos + 2 * length]))
+        pos += 2 * length
+    return state, archive_size, runs
+
+
+def write_transaction(archive_path: str, writes: List[Tuple[int, bytes]]) -> int:
+    """
+    Applies (address, bytes) writes to the archive in place, crash-safely, via the journal.
+    Returns the number of bytes written to the archive.
+    """
+    runs = coalesce_writes(writes)
+    if not runs:
+        return 0
+    j_path = journal_path(archive_path)
+    if os.path.exists(j_path):
+        raise JournalError(f"An unresolved journal exists for {archive_path}; reopen the file to recover it first.")
+
+    with open(archive_path, 'r+b') as f:
+        archive_size = os.fstat(f.fileno()).st_size
+        journal_runs = []
+        for addr, data in runs:
+            if addr + len(data) > archive_size:
+                raise JournalError(f"Write at {addr:#x} ({len(data)} bytes) is beyond the end of the file ({archive_size} bytes).")
+            f.seek(addr)
+            journal_runs.append((addr, f.read(len(data)), data))
+
+        with open(j_path, 'wb') as jf:
+            jf.write(_encode_journal(archive_size, journal_runs))
+            _fsync(jf)
+
+        written = 0
+        for addr, _, data in journal_runs:
+            f.seek(addr)
+            f.write(data)
+            written += len(data)
+        _fsync(f)
+
+    with open(j_path, 'r+b') as jf:
+        jf.seek(_STATE_OFFSET)
+        jf.write(bytes([STATE_COMMITTED]))
+        _fsync(jf)
+    os.remove(j_path)
+    return written
+
+
+def recover(archive_path: str, rollback: bool = False) -> Optional[str]:
+    """
+    Resolves a journal left by an interrupted save. Pending journals are replayed
+    (or rolled back to the original bytes with rollback=True); incomplete and committed
+    ones are removed. Returns a short description of what was done, or None if there was no journal.
+    """
+    j_path = journal_path(archive_path)
+    if not os.path.exists(j_path):
+        return None
+    with open(j_path, 'rb') as jf:
+        decoded = _decode_journal(jf.read())
+
+    if decoded is None:
+        outcome = "discarded incomplete journal"
+    else:
+        state, archive_size, runs = decoded
+        if state == STATE_COMMITTED:
+            outcome = "removed committed journal"
+        elif os.path.getsize(archive_path) != archive_size:
+            raise JournalError(f"Journal {j_path} does not match the archive size; resolve it manually.")
+        else:
+            with open(archive_path, 'r+b') as f:
+                for addr, old, new in runs:
+                    f.seek(addr)
+                    f.write(old if rollback else new)
+                _fsync(f)
+            outcome = f"{'rolled back' if rollback else 'replayed'} {len(runs)} interrupted writes"
+    os.remove(j_path)
+    logging.warning(f"Recovered {archive_path}: {outcome}.")
+    return outcome
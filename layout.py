@@ -0,0 +1,296 @@
+import os
+import math
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# --- Scoreboard Layout Model (no GUI dependencies) ---
+
+# Color entries stored as a 5-byte ASCII word instead of a BGRA value
+SPECIAL_TEXT_COLOR_LABELS = ["Added Time Text Color"]
+SPECIAL_TEXT_COLOR_VALUES = ("WHITE", "BLACK")
+SPECIAL_TEXT_COLOR_SIZE = 5
+
+_FLOAT = struct.Struct('<f')
+_BGRA = struct.Struct('<4B')
+FLOAT_SIZE = _FLOAT.size
+COLOR_SIZE = _BGRA.size
+
+# Value spans closer together than this are read as one range
+_READ_MERGE_GAP = 512
+
+
+class LayoutError(ValueError):
+    """Raised when a layout value or an offsets.json entry cannot be used."""
+
+
+@dataclass
+class ScoreboardLayout:
+    """
+    Resolved addresses for one internal scoreboard name from offsets.json.
+    Each label maps to a tuple of addresses (its key); the *_labels_by_key indexes map back.
+    """
+    internal_name: str
+    reference_width: Optional[int] = None
+    reference_height: Optional[int] = None
+    offsets: Dict[str, Tuple[int, ...]] = field(default_factory=dict)
+    colors: Dict[str, Tuple[int, ...]] = field(default_factory=dict)
+    offset_labels_by_key: Dict[Tuple[int, ...], str] = field(default_factory=dict, repr=False)
+    color_labels_by_key: Dict[Tuple[int, ...], str] = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class LayoutValues:
+    """Values read from an archive, keyed by label; None marks a value that could not be read."""
+    offsets: Dict[str, Optional[float]] = field(default_factory=dict)
+    colors: Dict[str, Optional[str]] = field(default_factory=dict)
+
+
+def parse_addresses(value) -> Tuple[int, ...]:
+    """Parses an offsets.json address entry (one hex string or a list of them)."""
+    values = value if isinstance(value, list) else [value]
+    try:
+        addresses = tuple(int(str(v), 16) for v in values)
+    except ValueError as e:
+        raise LayoutError(f"Invalid address {value!r}: {e}") from e
+    if not addresses or any(a < 0 for a in addresses):
+        raise LayoutError(f"Invalid address {value!r}")
+    return addresses
+
+
+def _parse_reference_size(value, what: str) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise LayoutError(f"Invalid {what} {value!r}")
+    if size <= 0:
+        raise LayoutError(f"Invalid {what} {value!r}")
+    return size
+
+
+def _parse_address_table(entries, internal_name: str, section: str):
+    if not isinstance(entries, dict):
+        raise LayoutError(f"'{internal_name}': '{section}' must be an object")
+    table, by_key = {}, {}
+    for label, value in entries.items():
+        try:
+            key = parse_addresses(value)
+        except LayoutError as e:
+            raise LayoutError(f"'{internal_name}' {section} '{label}': {e}") from e
+        if key in by_key:
+            raise LayoutError(f"'{internal_name}' {section}: '{label}' and '{by_key[key]}' share the same addresses")
+        table[label] = key
+        by_key[key] = label
+    return table, by_key
+
+
+def resolve_layout(offsets_data: Dict[str, Any], internal_name: str) -> ScoreboardLayout:
+    """Validates and compiles one offsets.json entry."""
+    if internal_name not in offsets_data:
+        raise LayoutError(f"Configuration for '{internal_name}' not found in offsets.json.")
+    config_data = offsets_data[internal_name]
+    if not isinstance(config_data, dict):
+        raise LayoutError(f"'{internal_name}': entry must be an object")
+    offsets, offset_labels_by_key = _parse_address_table(config_data.get("offsets", {}), internal_name, "offsets")
+    colors, color_labels_by_key = _parse_address_table(config_data.get("colors", {}), internal_name, "colors")
+    return ScoreboardLayout(
+        internal_name=internal_name,
+        reference_width=_parse_reference_size(config_data.get("reference_width"), f"'{internal_name}' reference_width"),
+        reference_height=_parse_reference_size(config_data.get("reference_height"), f"'{internal_name}' reference_height"),
+        offsets=offsets,
+        colors=colors,
+        offset_labels_by_key=offset_labels_by_key,
+        color_labels_by_key=color_labels_by_key,
+    )
+
+
+# --- Value Reading ---
+
+_KIND_FLOAT, _KIND_BGRA, _KIND_TEXT = 0, 1, 2
+_KIND_SIZES = (FLOAT_SIZE, COLOR_SIZE, SPECIAL_TEXT_COLOR_SIZE)
+_KIND_FORMATS = ('f', '4B', f'{SPECIAL_TEXT_COLOR_SIZE}s')
+
+
+class LayoutReadPlan:
+    """
+    Precompiled reader for one layout's values (the first address of each offset and color).
+    Nearby values are grouped into address ranges; each range is fetched with one readinto
+    and decoded by a single struct.Struct covering all of its fields, gaps included.
+    Build it once per layout and call read() on every (re)load.
+    """
+    def __init__(self, offsets: Dict[str, Sequence[int]], colors: Dict[str, Sequence[int]]):
+        self.offset_labels = list(offsets)
+        self.color_labels = list(colors)
+        fields = [(addrs[0], _KIND_FLOAT, label) for label, addrs in offsets.items() if addrs]
+        fields += [(addrs[0], _KIND_TEXT if label in SPECIAL_TEXT_COLOR_LABELS else _KIND_BGRA, label)
+                   for label, addrs in colors.items() if addrs]
+        fields.sort()
+
+        groups: List[List[Tuple[int, int, str]]] = []
+        for field_spec in fields:
+            addr = field_spec[0]
+            if groups:
+                last_addr, last_kind, _ = groups[-1][-1]
+                last_end = last_addr + _KIND_SIZES[last_kind]
+                # Overlapping fields cannot share one record layout, so they start a new range.
+                if last_end <= addr <= last_end + _READ_MERGE_GAP:
+                    groups[-1].append(field_spec)
+                    continue
+            groups.append([field_spec])
+
+        self.ranges: List[Tuple[int, int, struct.Struct, List[Tuple[int, int, str]]]] = []
+        for group in groups:
+            fmt, pos = ['<'], group[0][0]
+            for addr, kind, _ in group:
+                if addr > pos:
+                    fmt.append(f'{addr - pos}x')
+                fmt.append(_KIND_FORMATS[kind])
+                pos = addr + _KIND_SIZES[kind]
+            self.ranges.append((group[0][0], pos, struct.Struct(''.join(fmt)), group))
+
+    def read(self, path: str) -> LayoutValues:
+        """Reads all values from the file; values lying (partly) outside it come back as None."""
+        values = LayoutValues(dict.fromkeys(self.offset_labels), dict.fromkeys(self.color_labels))
+        with open(path, 'rb', buffering=0) as f:
+            file_size = os.fstat(f.fileno()).st_size
+            for start, end, record, group in self.ranges:
+                if start >= file_size:
+                    continue
+                buf = bytearray(min(end, file_size) - start)
+                f.seek(start)
+                f.readinto(buf)
+                if end <= file_size:
+                    self._decode(values, group, record.unpack_from(buf))
+                else:
+                    for addr, kind, label in group:
+                        if addr + _KIND_SIZES[kind] <= file_size:
+                            self._decode(values, [(addr, kind, label)], struct.unpack_from('<' + _KIND_FORMATS[kind], buf, addr - start))
+        return values
+
+    @staticmethod
+    def _decode(values: LayoutValues, group, unpacked):
+        i = 0
+        for _, kind, label in group:
+            if kind == _KIND_FLOAT:
+                values.offsets[label] = unpacked[i]
+                i += 1
+            elif kind == _KIND_BGRA:
+                b, g, r = unpacked[i], unpacked[i + 1], unpacked[i + 2]
+                values.colors[label] = f'#{r:02X}{g:02X}{b:02X}'
+                i += 4
+            else:
+                values.colors[label] = unpacked[i].decode('ascii', errors='ignore').strip().rstrip('\x00')
+                i += 1
+
+
+def read_layout_values(path: str, offsets: Dict[str, Sequence[int]], colors: Dict[str, Sequence[int]]) -> LayoutValues:
+    """One-off convenience wrapper; keep a LayoutReadPlan around when reading repeatedly."""
+    return LayoutReadPlan(offsets, colors).read(path)
+
+
+# --- Value Encoding ---
+
+def encode_float(value) -> bytes:
+    try:
+        val_f = float(value)
+    except (TypeError, ValueError):
+        raise LayoutError(f"Invalid float value '{value}'")
+    if not math.isfinite(val_f):
+        raise LayoutError(f"Float value '{value}' is not finite")
+    return _FLOAT.pack(val_f)
+
+
+def encode_hex_color(value) -> bytes:
+    """Encodes '#RRGGBB' as the BGRA bytes stored in the archive (alpha forced to 0xFF)."""
+    hex_str = str(value)
+    if not (len(hex_str) == 7 and hex_str.startswith('#')):
+        raise LayoutError(f"Invalid hex color '{hex_str}'")
+    try:
+        r, g, b = int(hex_str[1:3], 16), int(hex_str[3:5], 16), int(hex_str[5:7], 16)
+    except ValueError:
+        raise LayoutError(f"Invalid hex value in '{hex_str}'")
+    return bytes([b, g, r, 0xFF])
+
+
+def encode_text_color(value) -> bytes:
+    if value not in SPECIAL_TEXT_COLOR_VALUES:
+        raise LayoutError(f"Invalid text color '{value}'")
+    return value.encode('ascii').ljust(SPECIAL_TEXT_COLOR_SIZE, b'\x00')[:SPECIAL_TEXT_COLOR_SIZE]
+
+
+def encode_color(label: str, value) -> bytes:
+    if label in SPECIAL_TEXT_COLOR_LABELS:
+        return encode_text_color(value)
+    return encode_hex_color(value)
+
+
+def encode_values(offset_values: Dict[str, Any], color_values: Dict[str, Any]) -> Tuple[Dict[str, bytes], Dict[str, bytes]]:
+    """
+    Encodes every offset and color value, keyed by label, before anything is written.
+    All problems are collected and reported together in a single LayoutError.
+    """
+    errors = []
+    encoded_offsets, encoded_colors = {}, {}
+    for label, value in offset_values.items():
+        try:
+            encoded_offsets[label] = encode_float(value)
+        except LayoutError as e:
+            errors.append(f"{label}: {e}")
+    for label, value in color_values.items():
+        try:
+            encoded_colors[label] = encode_color(label, value)
+        except LayoutError as e:
+            errors.append(f"{label}: {e}")
+    if errors:
+        raise LayoutError("\n".join(errors))
+    return encoded_offsets, encoded_colors
+
+
+def plan_writes(layout: ScoreboardLayout, encoded_offsets: Dict[str, bytes], encoded_colors: Dict[str, bytes]) -> List[Tuple[int, bytes]]:
+    """Maps encoded values to (address, bytes) writes for a layout; unknown labels raise LayoutError."""
+    missing = [lbl for lbl in encoded_offsets if lbl not in layout.offsets]
+    missing += [lbl for lbl in encoded_colors if lbl not in layout.colors]
+    if missing:
+        raise LayoutError(f"Labels not defined for '{layout.internal_name}': {', '.join(missing)}")
+    writes = []
+    for label, packed in encoded_offsets.items():
+        writes.extend((addr, packed) for addr in layout.offsets[label])
+    for label, packed in encoded_colors.items():
+        writes.extend((addr, packed) for addr in layout.colors[label])
+    return writes
+
+
+def coalesce_writes(writes: List[Tuple[int, bytes]]) -> List[Tuple[int, bytes]]:
+    """
+    Sorts writes by address and merges touching or overlapping ones into single runs.
+    Where writes overlap, the later one in the input wins.
+    """
+    groups: List[List] = []  # [start, end, indices into writes]
+    for i in sorted(range(len(writes)), key=lambda i: writes[i][0]):
+        addr, data = writes[i]
+        if groups and addr <= groups[-1][1]:
+            groups[-1][1] = max(groups[-1][1], addr + len(data))
+            groups[-1][2].append(i)
+        else:
+            groups.append([addr, addr + len(data), [i]])
+
+    runs = []
+    for start, end, indices in groups:
+        buf = bytearray(end - start)
+        for i in sorted(indices):
+            addr, data = writes[i]
+            buf[addr - start:addr - start + len(data)] = data
+        runs.append((start, bytes(buf)))
+    return runs
+
+
+def apply_writes(f, writes: List[Tuple[int, bytes]]) -> int:
+    """Writes (address, bytes) pairs to an open binary file as coalesced runs; returns bytes written."""
+    written = 0
+    for addr, data in coalesce_writes(writes):
+        f.seek(addr)
+        f.write(data)
+        written += len(data)
+    return written
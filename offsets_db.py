@@ -0,0 +1,153 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from layout import LayoutError, LayoutReadPlan, ScoreboardLayout, resolve_layout
+
+# --- Compiled Offsets Database ---
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+OFFSETS_JSON_PATH = os.path.join(SCRIPT_DIR, "offsets.json")
+CACHE_SUFFIX = ".cache"
+# Bump when ScoreboardLayout or the compile step changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+
+class OffsetsDatabase:
+    """
+    offsets.json compiled into validated ScoreboardLayout objects, keyed by internal name.
+    Read plans are built on first request per layout and kept for the session.
+    """
+    def __init__(self, layouts: Dict[str, ScoreboardLayout], source_hash: str, source_path: str):
+        self.layouts = layouts
+        self.source_hash = source_hash
+        self.source_path = source_path
+        self._read_plans: Dict[str, LayoutReadPlan] = {}
+
+    def __contains__(self, internal_name: str) -> bool:
+        return internal_name in self.layouts
+
+    def __len__(self) -> int:
+        return len(self.layouts)
+
+    def get(self, internal_name: str) -> Optional[ScoreboardLayout]:
+        return self.layouts.get(internal_name)
+
+    def names(self) -> List[str]:
+        return list(self.layouts)
+
+    def read_plan(self, internal_name: str) -> LayoutReadPlan:
+        plan = self._read_plans.get(internal_name)
+        if plan is None:
+            layout = self.layouts[internal_name]
+            plan = self._read_plans[internal_name] = LayoutReadPlan(layout.offsets, layout.colors)
+        return plan
+
+
+def compile_offsets(offsets_data) -> Dict[str, ScoreboardLayout]:
+    """Validates the whole offsets.json document; raises LayoutError on the first bad entry."""
+    if not isinstance(offsets_data, dict):
+        raise LayoutError("offsets.json must contain an object keyed by internal name")
+    return {name: resolve_layout(offsets_data, name) for name in offsets_data}
+
+
+def cache_path_for(json_path: str) -> str:
+    return json_path + CACHE_SUFFIX
+
+
+def _layout_to_record(layout: ScoreboardLayout) -> Dict[str, Any]:
+    return {
+        "internal_name": layout.internal_name,
+        "reference_width": layout.reference_width,
+        "reference_height": layout.reference_height,
+        "offsets": {label: list(key) for label, key in layout.offsets.items()},
+        "colors": {label: list(key) for label, key in layout.colors.items()},
+    }
+
+
+def _layout_from_record(record: Dict[str, Any]) -> ScoreboardLayout:
+    offsets = {label: tuple(int(a) for a in key) for label, key in record["offsets"].items()}
+    colors = {label: tuple(int(a) for a in key) for label, key in record["colors"].items()}
+    return ScoreboardLayout(
+        internal_name=str(record["internal_name"]),
+        reference_width=record["reference_width"],
+        reference_height=record["reference_height"],
+        offsets=offsets,
+        colors=colors,
+        offset_labels_by_key={key: label for label, key in offsets.items()},
+        color_labels_by_key={key: label for label, key in colors.items()},
+    )
+
+
+def _read_cache(cache_path: str, source_hash: str) -> Optional[Dict[str, ScoreboardLayout]]:
+    """
+    The cache is plain JSON holding integer addresses, so loading it never runs code
+    even if someone else wrote the file; anything malformed just triggers a rebuild.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            payload = json.loads(f.read())
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION or payload.get("hash") != source_hash:
+            return None
+        return {name: _layout_from_record(record) for name, record in payload["layouts"].items()}
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.info(f"Ignoring unreadable offsets cache {cache_path}: {e}")
+        return None
+
+
+def _write_cache(cache_path: str, source_hash: str, layouts: Dict[str, ScoreboardLayout]):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    payload = {"version": CACHE_VERSION, "hash": source_hash,
+               "layouts": {name: _layout_to_record(layout) for name, layout in layouts.items()}}
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logging.info(f"Could not write offsets cache {cache_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_database(json_path: str = OFFSETS_JSON_PATH, use_cache: bool = True) -> OffsetsDatabase:
+    """
+    Loads the compiled database for json_path, reusing the on-disk cache when it was built
+    from identical JSON bytes. Raises OSError, json.JSONDecodeError or LayoutError.
+    """
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    source_hash = hashlib.sha256(raw).hexdigest()
+    cache_path = cache_path_for(json_path)
+
+    layouts = _read_cache(cache_path, source_hash) if use_cache else None
+    if layouts is None:
+        layouts = compile_offsets(json.loads(raw))
+        logging.info(f"Compiled {len(layouts)} scoreboard layouts from {json_path}")
+        if use_cache:
+            _write_cache(cache_path, source_hash, layouts)
+    return OffsetsDatabase(layouts, source_hash, json_path)
+
+
+_default_database: Optional[OffsetsDatabase] = None
+_default_lock = threading.Lock()
+
+
+def get_database() -> OffsetsDatabase:
+    """Returns the database for the bundled offsets.json, loading it on first use (thread-safe)."""
+    global _default_database
+    with _default_lock:
+        if _default_database is None:
+            _default_database = load_database(OFFSETS_JSON_PATH)
+        return _default_database
+
+
+def set_database(database: OffsetsDatabase):
+    """Installs a database loaded from elsewhere (e.g. a user-selected offsets.json) as the default."""
+    global _default_database
+    with _default_lock:
+        _default_database = database
@@ -0,0 +1,277 @@
+"""
+Compact binary patch sets: the (address, bytes) changes that make up a scoreboard mod,
+applied in place to any number of .big archives with the same internal name.
+Does not import tkinter or config, so it runs on build hosts without a display.
+
+Patch file layout (.fbp, little-endian):
+    header  : magic "FBP1", version (u8), flags (u8), name length (u8), reserved (1 byte), run count (u32)
+    name    : internal scoreboard name the patch targets (ASCII)
+    runs    : address (u64), length (u32), run flags (u8), reserved (3 bytes), base CRC32 (u32)
+              sorted by address, non-overlapping
+    payload : the new bytes of every run in run order (zlib-compressed when FLAG_ZLIB is set)
+    trailer : CRC32 of everything before it (u32)
+
+Runs flagged RUN_VERIFY_BASE (replaced texture slots) are only written over bytes whose
+CRC32 matches the base checksum, so a slot is never patched in an archive whose table of
+contents differs. Value runs (offsets and colors) are addressed by the layout of the
+internal name and are never verified: they carry no base checksum (the export only knows
+the new values) and are written unconditionally. Runs whose bytes already match are skipped,
+so applying twice is harmless. The writes go through the archive's write-ahead journal
+(see journal.py): an apply interrupted by a crash is replayed before the next apply, and
+the GUI replays it when the file is opened.
+
+Usage:
+    python patchset.py apply mod.fbp "mods/*.big" other.big [--workers N] [--force] [--dry-run]
+    python patchset.py info mod.fbp
+"""
+import os
+import sys
+import mmap
+import zlib
+import struct
+import logging
+import argparse
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from batch_patch import PatchResult, expand_paths, print_report
+from journal import JournalError, journal_path, recover as recover_journal, write_transaction
+from layout import coalesce_writes
+from utils import detection_order, format_filesize, read_internal_name
+
+PATCH_MAGIC = b"FBP1"
+PATCH_VERSION = 1
+PATCH_SUFFIX = ".fbp"
+FLAG_ZLIB = 0x01
+RUN_VERIFY_BASE = 0x01
+
+_HEADER = struct.Struct('<4sBBBxI')
+_RUN = struct.Struct('<QIB3xI')
+_CRC = struct.Struct('<I')
+
+
+class PatchError(Exception):
+    """Raised when a patch file is malformed or cannot be built."""
+
+
+@dataclass
+class PatchRun:
+    address: int
+    data: bytes
+    base_crc: int = 0
+    verify_base: bool = False
+
+    @property
+    def end(self) -> int:
+        return self.address + len(self.data)
+
+
+@dataclass
+class PatchSet:
+    internal_name: str
+    runs: List[PatchRun] = field(default_factory=list)
+
+    @property
+    def payload_bytes(self) -> int:
+        return sum(len(run.data) for run in self.runs)
+
+
+def build_patch(internal_name: str, value_writes: List[Tuple[int, bytes]],
+                slot_runs: List[Tuple[int, bytes, bytes]] = ()) -> PatchSet:
+    """
+    Builds a patch from (address, bytes) value writes and (address, new bytes, base bytes)
+    texture slot replacements. Value writes are coalesced; runs may not overlap.
+    """
+    try:
+        internal_name.encode('ascii')
+    except UnicodeEncodeError:
+        raise PatchError(f"Internal name {internal_name!r} is not ASCII")
+    runs = [PatchRun(addr, data) for addr, data in coalesce_writes(value_writes)]
+    for addr, new, base in slot_runs:
+        if len(new) != len(base):
+            raise PatchError(f"Slot at {addr:#x}: new and base data differ in length")
+        runs.append(PatchRun(addr, bytes(new), zlib.crc32(base), True))
+    runs.sort(key=lambda run: run.address)
+    _check_runs(runs)
+    return PatchSet(internal_name, runs)
+
+
+def _check_runs(runs: List[PatchRun]):
+    for prev, run in zip(runs, runs[1:]):
+        if run.address < prev.end:
+            raise PatchError(f"Runs at {prev.address:#x} and {run.address:#x} overlap")
+
+
+def encode_patch(patch: PatchSet, compress: bool = True) -> bytes:
+    name = patch.internal_name.encode('ascii')
+    if len(name) > 255:
+        raise PatchError("Internal name is too long")
+    payload = b"".join(run.data for run in patch.runs)
+    flags = 0
+    if compress:
+        packed = zlib.compress(payload, 9)
+        if len(packed) < len(payload):
+            payload, flags = packed, FLAG_ZLIB
+    parts = [_HEADER.pack(PATCH_MAGIC, PATCH_VERSION, flags, len(name), len(patch.runs)), name]
+    parts += [_RUN.pack(run.address, len(run.data), RUN_VERIFY_BASE if run.verify_base else 0, run.base_crc)
+              for run in patch.runs]
+    parts.append(payload)
+    body = b"".join(parts)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def decode_patch(data: bytes) -> PatchSet:
+    if len(data) < _HEADER.size + _CRC.size:
+        raise PatchError("File is too short to be a patch")
+    magic, version, flags, name_len, count = _HEADER.unpack_from(data, 0)
+    if magic != PATCH_MAGIC:
+        raise PatchError("Not a patch file")
+    if version != PATCH_VERSION:
+        raise PatchError(f"Unsupported patch version {version}")
+    if zlib.crc32(memoryview(data)[:-_CRC.size]) != _CRC.unpack_from(data, len(data) - _CRC.size)[0]:
+        raise PatchError("Patch checksum mismatch; the file is damaged")
+
+    pos = _HEADER.size
+    if pos + name_len + count * _RUN.size > len(data) - _CRC.size:
+        raise PatchError("Run table is truncated")
+    internal_name = data[pos:pos + name_len].decode('ascii', errors='replace')
+    pos += name_len
+    table = []
+    for _ in range(count):
+        table.append(_RUN.unpack_from(data, pos))
+        pos += _RUN.size
+    payload = data[pos:len(data) - _CRC.size]
+    if flags & FLAG_ZLIB:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error as e:
+            raise PatchError(f"Corrupt patch payload: {e}")
+    if len(payload) != sum(length for _, length, _, _ in table):
+        raise PatchError("Patch payload does not match its run table")
+
+    runs, offset = [], 0
+    for address, length, run_flags, base_crc in table:
+        runs.append(PatchRun(address, payload[offset:offset + length], base_crc, bool(run_flags & RUN_VERIFY_BASE)))
+        offset += length
+    if any(b.address < a.address for a, b in zip(runs, runs[1:])):
+        raise PatchError("Patch runs are not sorted by address")
+    _check_runs(runs)
+    return PatchSet(internal_name, runs)
+
+
+def write_patch(path: str, patch: PatchSet) -> int:
+    """Writes the patch file atomically; returns its size in bytes."""
+    data = encode_patch(patch)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def read_patch(path: str) -> PatchSet:
+    with open(path, 'rb') as f:
+        return decode_patch(f.read())
+
+
+def apply_patch(patch: PatchSet, path: str, force: bool = False, dry_run: bool = False) -> PatchResult:
+    """
+    Applies a patch to one archive in place. Every run is checked against a read-only
+    memory mapping before anything is written; the runs that still differ are then
+    written as one journaled transaction. force skips the internal name and base checks.
+    """
+    if not os.path.isfile(path):
+        return PatchResult(path, False, message="File not found")
+    # Detect with the same priority as the GUI and batch_patch, so an archive that also
+    # mentions the patch's name but is really another scoreboard is not patched.
+    internal_name = read_internal_name(path, detection_order((patch.internal_name,)))
+    if internal_name != patch.internal_name and not force:
+        return PatchResult(path, False, internal_name, message=f"Patch targets '{patch.internal_name}'")
+    try:
+        if dry_run:
+            if os.path.exists(journal_path(path)):
+                raise JournalError("An interrupted write is pending; apply without --dry-run to recover it first")
+        else:
+            recovery = recover_journal(path)
+            if recovery:
+                logging.warning(f"{path}: {recovery} before patching")
+        with open(path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            if patch.runs and patch.runs[-1].end > file_size:
+                raise PatchError(f"Patch reaches {patch.runs[-1].end:#x}, beyond the end of the file ({file_size} bytes)")
+            if not patch.runs:
+                return PatchResult(path, True, internal_name, 0, 0, "Nothing to apply")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pending, mismatched = [], []
+                for run in patch.runs:
+                    current = mm[run.address:run.end]
+                    if current == run.data:
+                        continue
+                    if run.verify_base and not force and zlib.crc32(current) != run.base_crc:
+                        mismatched.append(run.address)
+                    pending.append(run)
+        if mismatched:
+            raise PatchError(f"Base data differs at {', '.join(hex(a) for a in mismatched)}; "
+                             f"this archive does not match the patch source")
+        if dry_run:
+            written = sum(len(run.data) for run in pending)
+            return PatchResult(path, True, internal_name, len(pending), 0, f"Dry run, {format_filesize(written)} would be written")
+        written = write_transaction(path, [(run.address, run.data) for run in pending])
+        return PatchResult(path, True, internal_name, len(pending), written)
+    except (PatchError, JournalError, OSError, ValueError) as e:
+        return PatchResult(path, False, internal_name, message=str(e))
+
+
+def apply_patch_batch(patch: PatchSet, paths: List[str], max_workers: Optional[int] = None,
+                      force: bool = False, dry_run: bool = False) -> List[PatchResult]:
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(apply_patch, patch, p, force, dry_run) for p in paths]
+        return [fut.result() for fut in futures]
+
+
+def describe_patch(patch: PatchSet) -> str:
+    slots = sum(1 for run in patch.runs if run.verify_base)
+    lines = [f"Target: {patch.internal_name}",
+             f"Runs: {len(patch.runs)} ({slots} texture slots), {format_filesize(patch.payload_bytes)} of data"]
+    if slots < len(patch.runs):
+        lines.append(f"Value runs ({len(patch.runs) - slots}) are never verified against the archive before writing")
+    lines += [f"  {run.address:#010x} {len(run.data):>8} bytes {'[base checked]' if run.verify_base else '[unverified]'}"
+              for run in patch.runs]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or apply scoreboard patch sets (.fbp).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    apply_cmd = sub.add_parser("apply", help="Apply a patch to .big files")
+    apply_cmd.add_argument("patch", help="Patch file (.fbp)")
+    apply_cmd.add_argument("files", nargs="+", help=".big files or glob patterns")
+    apply_cmd.add_argument("--workers", type=int, default=None, help="Maximum concurrent files")
+    apply_cmd.add_argument("--force", action="store_true", help="Skip the internal name and base data checks")
+    apply_cmd.add_argument("--dry-run", action="store_true", help="Check only; write nothing")
+    info_cmd = sub.add_parser("info", help="Describe a patch file")
+    info_cmd.add_argument("patch", help="Patch file (.fbp)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    try:
+        patch = read_patch(args.patch)
+    except (OSError, PatchError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if args.command == "info":
+        print(describe_patch(patch))
+        return 0
+
+    paths = expand_paths(args.files)
+    if not paths:
+        print("Error: no input files", file=sys.stderr)
+        return 2
+    results = apply_patch_batch(patch, paths, args.workers, args.force, args.dry_run)
+    print_report(results)
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import time
+import logging
+from typing import Callable, Optional
+
+# --- Preview Render Scheduling ---
+
+
+class RenderScheduler:
+    """
+    Coalesces redraw requests from Tk event callbacks into at most one render per frame.
+    request() only marks the view dirty; the render itself runs from after_idle (or after, when
+    the previous frame was less than frame_ms ago), so any number of motion or wheel events
+    between two frames cost one render. While input keeps arriving, render(fast=True) is used;
+    once no interactive request has come in for settle_ms, one final render(fast=False) runs.
+    """
+    def __init__(self, root, render: Callable[[bool], None], frame_ms: int = 16, settle_ms: int = 150):
+        self.root = root
+        self.render = render
+        self.frame_ms = frame_ms
+        self.settle_ms = settle_ms
+        self._pending = False
+        self._interacting = False
+        self._rendered_fast = False
+        self._last_input = 0.0
+        self._last_render = 0.0
+        self._frame_job: Optional[str] = None
+        self._settle_job: Optional[str] = None
+
+    def request(self, interactive: bool = False):
+        """Marks the view dirty; interactive requests come from continuous input (drag, pan, wheel)."""
+        now = time.perf_counter()
+        self._pending = True
+        if interactive:
+            self._interacting = True
+            self._last_input = now
+            if self._settle_job is None:
+                self._settle_job = self.root.after(self.settle_ms, self._check_settled)
+        if self._frame_job is None:
+            wait_ms = int((self._last_render - now) * 1000) + self.frame_ms
+            if wait_ms > 0:
+                self._frame_job = self.root.after(wait_ms, self._render_frame)
+            else:
+                self._frame_job = self.root.after_idle(self._render_frame)
+
+    def flush(self):
+        """Renders a pending frame immediately instead of waiting for the event loop."""
+        if self._frame_job is not None:
+            self.root.after_cancel(self._frame_job)
+            self._frame_job = None
+        self._render_frame()
+
+    def cancel(self):
+        for job in (self._frame_job, self._settle_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self._frame_job = self._settle_job = None
+        self._pending = self._interacting = self._rendered_fast = False
+
+    def _render_frame(self):
+        self._frame_job = None
+        if not self._pending:
+            return
+        self._pending = False
+        self._last_render = time.perf_counter()
+        fast = self._interacting
+        try:
+            self.render(fast)
+        except Exception as e:
+            logging.error(f"Error rendering preview: {e}", exc_info=True)
+        self._rendered_fast = self._rendered_fast or fast
+
+    def _check_settled(self):
+        self._settle_job = None
+        idle_ms = (time.perf_counter() - self._last_input) * 1000
+        if idle_ms < self.settle_ms:
+            self._settle_job = self.root.after(int(self.settle_ms - idle_ms) + 1, self._check_settled)
+            return
+        self._interacting = False
+        if self._rendered_fast:
+            self._rendered_fast = False
+            self.request()
@@ -0,0 +1,141 @@
+import os
+import lzma
+import zlib
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from journal import write_transaction
+
+# --- Compressed Snapshot Store ---
+
+_COMPRESSORS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+
+class SnapshotStore:
+    """
+    Content-addressed store for archive byte ranges that undo may need to restore.
+    Each distinct payload is compressed once and shared by reference count, so importing
+    the same texture twice costs nothing extra. Compressed payloads larger than spill_bytes,
+    or that would push resident memory past max_memory_bytes, are written to a temporary
+    directory instead of being kept in memory. Call close() to delete the spill files.
+    """
+    def __init__(self, method: str = "zlib", spill_bytes: int = 256 * 1024, max_memory_bytes: int = 16 * 1024 * 1024):
+        if method not in _COMPRESSORS:
+            raise ValueError(f"Unknown snapshot compression '{method}'")
+        self._compress, self._decompress = _COMPRESSORS[method]
+        self.spill_bytes = spill_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self._memory: Dict[str, bytes] = {}
+        self._spilled: Dict[str, int] = {}  # digest -> compressed size on disk
+        self._refs: Dict[str, int] = {}
+        self._spill_dir: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(data) -> str:
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    def put(self, data) -> str:
+        """Stores data (or adds a reference to an identical payload) and returns its digest."""
+        digest = self.digest(data)
+        with self._lock:
+            if digest in self._refs:
+                self._refs[digest] += 1
+                return digest
+            packed = self._compress(bytes(data))
+            if len(packed) > self.spill_bytes or self.memory_bytes + len(packed) > self.max_memory_bytes:
+                with open(self._spill_path(digest), 'wb') as f:
+                    f.write(packed)
+                self._spilled[digest] = len(packed)
+                self.spilled_bytes += len(packed)
+            else:
+                self._memory[digest] = packed
+                self.memory_bytes += len(packed)
+            self._refs[digest] = 1
+        logging.debug(f"Snapshot {digest[:12]}: {len(data)} bytes stored as {len(packed)}")
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        with self._lock:
+            packed = self._memory.get(digest)
+            if packed is None:
+                if digest not in self._spilled:
+                    raise KeyError(f"Snapshot {digest} is not in the store")
+                with open(self._spill_path(digest), 'rb') as f:
+                    packed = f.read()
+        return self._decompress(packed)
+
+    def release(self, digest: str):
+        """Drops one reference; the payload is deleted when none are left."""
+        with self._lock:
+            count = self._refs.get(digest, 0) - 1
+            if count > 0:
+                self._refs[digest] = count
+                return
+            self._refs.pop(digest, None)
+            packed = self._memory.pop(digest, None)
+            if packed is not None:
+                self.memory_bytes -= len(packed)
+            elif digest in self._spilled:
+                self.spilled_bytes -= self._spilled.pop(digest)
+                try:
+                    os.remove(self._spill_path(digest))
+                except OSError as e:
+                    logging.info(f"Could not remove snapshot spill file: {e}")
+
+    def _spill_path(self, digest: str) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="flp_snapshots_")
+        return os.path.join(self._spill_dir, digest)
+
+    def close(self):
+        with self._lock:
+            self._memory.clear()
+            self._spilled.clear()
+            self._refs.clear()
+            self.memory_bytes = self.spilled_bytes = 0
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+
+def diff_writes(address: int, current, target, block_size: int = 512) -> List[Tuple[int, bytes]]:
+    """
+    Compares two equally long byte strings block by block and returns (address, bytes)
+    writes covering only the blocks that differ, adjacent blocks merged.
+    """
+    if len(current) != len(target):
+        raise ValueError("Snapshot and current data differ in length")
+    current, target = memoryview(current), memoryview(target)
+    writes: List[Tuple[int, bytes]] = []
+    run_start = None
+    for pos in range(0, len(target), block_size):
+        end = min(pos + block_size, len(target))
+        if current[pos:end] != target[pos:end]:
+            if run_start is None:
+                run_start = pos
+        elif run_start is not None:
+            writes.append((address + run_start, bytes(target[run_start:pos])))
+            run_start = None
+    if run_start is not None:
+        writes.append((address + run_start, bytes(target[run_start:])))
+    return writes
+
+
+def restore_range(archive_path: str, address: int, target) -> int:
+    """Makes the archive bytes at address equal target, writing only differing blocks (journaled)."""
+    with open(archive_path, 'rb') as f:
+        f.seek(address)
+        current = f.read(len(target))
+    if len(current) != len(target):
+        raise ValueError(f"Range at {address:#x} ({len(target)} bytes) is beyond the end of {archive_path}")
+    return write_transaction(archive_path, diff_writes(address, current, target))
@@ -0,0 +1,151 @@
+import os
+import random
+
+import pytest
+
+from core import Compression
+from file_io import Compressor, FifaBigFile
+
+SAMPLE_ARCHIVE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "overlay_9002.BIG")
+
+
+def _dds(size: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    return b"DDS " + bytes(rng.choice(b"abcdefgh") for _ in range(size - 4))
+
+
+def _write_big(path, entries):
+    """Writes a BIGF archive; entries are (name, payload) and an empty payload named sg1/sg2 starts a group."""
+    names = b"".join(name.encode('ascii') + b"\x00" for name, _ in entries)
+    header_len = 16 + 8 * len(entries) + len(names)
+    toc, offset = b"", header_len
+    for name, payload in entries:
+        toc += offset.to_bytes(4, "big") + len(payload).to_bytes(4, "big") + name.encode('ascii') + b"\x00"
+        offset += len(payload)
+    data = (b"BIGF" + offset.to_bytes(4, "little") + len(entries).to_bytes(4, "big") + header_len.to_bytes(4, "big")
+            + toc + b"".join(payload for _, payload in entries))
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+@pytest.fixture(scope="module")
+def archive(tmp_path_factory):
+    """Plain and EAHD entries in a DDS and an APT group; two large compressed entries reach the pool."""
+    path = str(tmp_path_factory.mktemp("big") / "mixed.big")
+    _write_big(path, [
+        ("0", b"plain data entry" * 10),
+        ("sg1", b""),
+        ("10", Compressor.compress_eahd(_dds(60000, 1), level=1)),
+        ("14", Compressor.compress_eahd(_dds(40000, 2), level=1)),
+        ("30", _dds(3000, 3)),
+        ("31", Compressor.compress_eahd(b"small compressed" * 8)),
+        ("sg2", b""),
+        ("1", b"Apt Data overlay_2002"),
+    ])
+    return path
+
+
+def _snapshot(big):
+    return [(e.offset, e.size, e.name, e.file_type, e.compression, e.raw_size, bytes(e.data)) for e in big.entries]
+
+
+@pytest.fixture(scope="module")
+def expected(archive):
+    big = FifaBigFile(archive)
+    yield _snapshot(big)
+    big.close()
+
+
+def test_default_load_decodes_entries(expected):
+    by_name = {name: (file_type, compression, data) for _, _, name, file_type, compression, _, data in expected}
+    assert by_name["10"] == ("DDS", Compression.EAHD, _dds(60000, 1))
+    assert by_name["31"][2] == b"small compressed" * 8
+    assert by_name["30"][:2] == ("DDS", Compression.NONE)
+    assert by_name["1"][0] == "APT"
+
+
+@pytest.mark.parametrize("options", [
+    {"lazy": True},
+    {"use_mmap": True},
+    {"lazy": True, "use_mmap": True},
+    {"max_workers": 2},
+    {"use_mmap": True, "max_workers": 2},
+])
+def test_loading_modes_match_default(archive, expected, options):
+    with FifaBigFile(archive, **options) as big:
+        assert _snapshot(big) == expected
+
+
+def test_lazy_entries_load_on_demand(archive, expected):
+    with FifaBigFile(archive, lazy=True) as big:
+        assert not any(e.is_loaded for e in big.entries if e.raw_size)
+        # Size and type come from the header probe, before any payload is read
+        assert [(e.size, e.file_type) for e in big.entries] == [(size, file_type) for _, size, _, file_type, *_ in expected]
+        assert big.entries[2].data[:4] == b"DDS "
+        assert [e.name for e in big.entries if e.is_loaded and e.raw_size] == ["10"]
+
+
+@pytest.mark.parametrize("options", [{"lazy": True}, {"lazy": True, "use_mmap": True, "max_workers": 2}])
+def test_decompress_all(archive, expected, options):
+    with FifaBigFile(archive, **options) as big:
+        big.decompress_all(["10", "14"])
+        assert {e.name for e in big.entries if e.is_loaded and e.raw_size} == {"10", "14"}
+        big.decompress_all()
+        assert _snapshot(big) == expected
+
+
+def test_pool_is_reused_and_closed(archive):
+    big = FifaBigFile(archive, lazy=True, max_workers=2)
+    big.decompress_all(["10", "14"])
+    pool = big._pool
+    assert pool is not None
+    for entry in big.entries:
+        entry.data = None
+    big.decompress_all()
+    assert big._pool is pool
+    big.close()
+    assert big._pool is None
+
+
+def test_mmap_entries_are_views(archive):
+    with FifaBigFile(archive, use_mmap=True) as big:
+        plain = next(e for e in big.entries if e.name == "30")
+        assert isinstance(plain.data, memoryview)
+        del plain
+
+
+@pytest.mark.parametrize("options", [{}, {"lazy": True}, {"use_mmap": True}])
+def test_sample_archive_modes_match(options):
+    reference = FifaBigFile(SAMPLE_ARCHIVE)
+    with FifaBigFile(SAMPLE_ARCHIVE, **options) as big:
+        assert _snapshot(big) == _snapshot(reference)
+
+
+@pytest.mark.parametrize("options", [{"lazy": True}, {"lazy": True, "use_mmap": True}])
+def test_peek_reads_a_bounded_prefix(archive, expected, options):
+    with FifaBigFile(archive, **options) as big:
+        raw_reads = []
+        read_raw = big._read_raw
+
+        def counting_read_raw(entry, limit=None):
+            raw = read_raw(entry, limit)
+            raw_reads.append(len(raw))
+            return raw
+        big._read_raw = counting_read_raw
+        for entry, (*_, data) in zip(big.entries, expected):
+            for n in (4, 13, 1000):
+                assert big.peek(entry, n) == data[:n]
+        assert not any(e.is_loaded for e in big.entries if e.raw_size)
+        assert max(raw_reads) < 1300
+
+
+def test_peek_inside_literal_runs(tmp_path):
+    # Random bytes compress to long literal runs, so the prefix ends inside one
+    payload = bytes(random.Random(4).getrandbits(8) for _ in range(3000))
+    path = str(tmp_path / "literals.big")
+    _write_big(path, [("0", Compressor.compress_eahd(payload)), ("1", payload)])
+    with FifaBigFile(path, lazy=True) as big:
+        for n in (1, 4, 111, 112, 113, 2999, 5000):
+            assert [big.peek(entry, n) for entry in big.entries] == [payload[:n]] * 2
+        assert big.entries[0].data == payload
+        assert big.peek(big.entries[0], 10) == payload[:10]
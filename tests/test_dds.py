@@ -0,0 +1,101 @@
+import struct
+
+import pytest
+from PIL import Image
+
+np = pytest.importorskip("numpy")
+
+from dds import DDS_HEADER_SIZE, _decode_dds_fallback, compress_blocks, encode_dds, open_dds_image  # noqa: E402
+
+
+def _gradient(width: int = 64, height: int = 32, alpha=None) -> Image.Image:
+    y, x = np.mgrid[0:height, 0:width]
+    a = np.full((height, width), 255) if alpha is None else alpha(x, y)
+    rgba = np.stack((x * 255 // (width - 1), y * 255 // (height - 1), 128 + (x - y) % 64, a), axis=-1)
+    return Image.fromarray(rgba.astype(np.uint8), "RGBA")
+
+
+def _decode(data: bytes) -> "np.ndarray":
+    return np.asarray(open_dds_image(data).convert("RGBA"), dtype=np.int32)
+
+
+def _psnr(reference, candidate) -> float:
+    mse = ((np.asarray(reference, dtype=np.float64) - candidate) ** 2).mean()
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def test_bc3_round_trip_keeps_alpha_ramp():
+    source = _gradient(alpha=lambda x, y: x * 255 // 63)
+    decoded = _decode(encode_dds(source, "BC3", mipmaps=False))
+    reference = np.asarray(source, dtype=np.int32)
+    assert decoded.shape == reference.shape
+    # Eight interpolated alpha levels per block: error at most half a step of the block's range
+    assert np.abs(decoded[..., 3] - reference[..., 3]).max() <= 2
+    assert _psnr(reference[..., :3], decoded[..., :3]) > 30
+
+
+def test_bc3_full_range_alpha_within_a_block():
+    source = _gradient(alpha=lambda x, y: ((x + y) % 4) * 85)
+    decoded = _decode(encode_dds(source, "BC3", mipmaps=False))
+    # 0..255 in one block: eight levels 255/7 apart, so at most half a level off
+    assert np.abs(decoded[..., 3] - np.asarray(source)[..., 3]).max() <= 255 // 14 + 1
+    assert (decoded[..., 3][np.asarray(source)[..., 3] == 255] == 255).all()
+    assert (decoded[..., 3][np.asarray(source)[..., 3] == 0] == 0).all()
+
+
+def test_bc1_punch_through_alpha():
+    source = _gradient(alpha=lambda x, y: np.where((x // 3 + y // 5) % 2, 255, 40) + 0 * x)
+    decoded = _decode(encode_dds(source, "BC1", mipmaps=False))
+    reference = np.asarray(source, dtype=np.int32)
+    opaque = reference[..., 3] >= 128
+    assert (decoded[..., 3][opaque] == 255).all()
+    assert (decoded[..., 3][~opaque] == 0).all()
+    assert (decoded[~opaque][:, :3] == 0).all()  # Punch-through texels decode to transparent black
+    assert _psnr(reference[opaque][:, :3], decoded[opaque][:, :3]) > 30
+
+
+def test_bc1_alpha_threshold_is_128():
+    source = Image.new("RGBA", (4, 4), (200, 100, 50, 127))
+    source.putpixel((0, 0), (200, 100, 50, 128))
+    decoded = _decode(encode_dds(source, "BC1", mipmaps=False))
+    assert decoded[0, 0, 3] == 255
+    assert (decoded[..., 3].ravel()[1:] == 0).all()
+
+
+@pytest.mark.parametrize("fmt", ["BC1", "BC3"])
+def test_solid_color_is_exact_in_565(fmt):
+    color = (255, 0, 255, 255)  # Exactly representable in RGB565
+    decoded = _decode(encode_dds(Image.new("RGBA", (8, 8), color), fmt, mipmaps=False))
+    assert (decoded == color).all()
+
+
+@pytest.mark.parametrize("fmt", ["BC1", "BC3"])
+def test_sizes_not_multiple_of_four(fmt):
+    source = _gradient(64, 32).crop((0, 0, 10, 6))
+    decoded = _decode(encode_dds(source, fmt, mipmaps=False))
+    assert decoded.shape == (6, 10, 4)
+    assert _psnr(np.asarray(source)[..., :3], decoded[..., :3]) > 30
+
+
+@pytest.mark.parametrize("fmt, block_bytes", [("BC1", 8), ("BC3", 16)])
+def test_mip_chain_layout(fmt, block_bytes):
+    data = encode_dds(_gradient(64, 32), fmt, mipmaps=True)
+    height, width, linear_size, _, mip_count = struct.unpack_from("<5I", data, 12)
+    assert (width, height, mip_count) == (64, 32, 7)
+    sizes = [max(1, (64 >> i) // 4 + ((64 >> i) % 4 > 0)) * max(1, (32 >> i) // 4 + ((32 >> i) % 4 > 0)) * block_bytes
+             for i in range(7)]
+    assert linear_size == sizes[0]
+    assert len(data) == DDS_HEADER_SIZE + sum(sizes)
+    assert data[84:88] == (b"DXT1" if fmt == "BC1" else b"DXT5")
+
+
+@pytest.mark.parametrize("fmt", ["BC1", "BC3"])
+def test_fallback_decoder_agrees(fmt):
+    data = encode_dds(_gradient(), fmt, mipmaps=True)
+    assert (np.asarray(_decode_dds_fallback(data).convert("RGBA"), dtype=np.int32) == _decode(data)).all()
+
+
+def test_compress_blocks_size():
+    pixels = np.zeros((8, 12, 4), dtype=np.uint8)
+    assert len(compress_blocks(pixels, "BC1")) == 6 * 8
+    assert len(compress_blocks(pixels, "BC3")) == 6 * 16
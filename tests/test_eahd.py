@@ -0,0 +1,129 @@
+import importlib.util
+import os
+import random
+
+import pytest
+
+from file_io import Compressor, Decompressor, EAHDError
+
+_BENCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "bench_eahd.py")
+_spec = importlib.util.spec_from_file_location("bench_eahd", _BENCH)
+bench_eahd = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench_eahd)
+
+# Decodes to b"abcabc": three literals, then a 3-byte match 3 bytes back
+ABCABC = bytes.fromhex("fb1000000603026162" "63fc")
+
+
+def _samples():
+    rng = random.Random(7)
+    text = b"The quick brown fox jumps over the lazy dog. " * 40
+    return {
+        "empty": b"",
+        "tiny": b"ab",
+        "text": text,
+        "run": b"\x00" * 5000,
+        "period3": b"xyz" * 700,
+        "random": bytes(rng.getrandbits(8) for _ in range(3000)),
+        # Matches longer than 1028 bytes and more than 16 KB back
+        "far": bytes(rng.getrandbits(8) for _ in range(2500)) + bytes(20000) + bytes(rng.getrandbits(8) for _ in range(2500)) * 2,
+        "dds": b"DDS " + bytes(rng.choice(b"\x00\x10\xff") for _ in range(6000)),
+    }
+
+
+SAMPLES = _samples()
+
+
+# --- Compressor ---
+
+@pytest.mark.parametrize("level", range(1, 10))
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+def test_round_trip_every_level(name, level):
+    data = SAMPLES[name]
+    packed = Compressor.compress_eahd(data, level=level)
+    assert packed[:2] == b"\xfb\x10"
+    assert Decompressor.read_eahd_size(packed) == len(data)
+    assert Decompressor.decompress_eahd(packed, strict=True) == data
+
+
+@pytest.mark.parametrize("level", [1, 6, 9])
+def test_legacy_decoder_reads_compressor_output(level):
+    for data in SAMPLES.values():
+        assert bench_eahd.legacy_decompress_eahd(Compressor.compress_eahd(data, level=level)) == data
+
+
+def test_repetitive_data_compresses():
+    assert len(Compressor.compress_eahd(SAMPLES["run"])) < 100
+    assert len(Compressor.compress_eahd(SAMPLES["text"], level=9)) <= len(Compressor.compress_eahd(SAMPLES["text"], level=1))
+
+
+def test_invalid_level_is_rejected():
+    with pytest.raises(ValueError):
+        Compressor.compress_eahd(b"abc", level=0)
+    with pytest.raises(ValueError):
+        Compressor.compress_eahd(b"abc", level=10)
+
+
+# --- Decompressor ---
+
+@pytest.mark.parametrize("seed", range(6))
+def test_decoder_matches_legacy_on_synthetic_streams(seed):
+    stream = bench_eahd.make_synthetic_stream(20000, seed)
+    assert Decompressor.decompress_eahd(stream, strict=True) == bench_eahd.legacy_decompress_eahd(stream)
+
+
+def test_decoder_accepts_memoryview():
+    assert Decompressor.decompress_eahd(memoryview(ABCABC)) == b"abcabc"
+
+
+def test_non_eahd_input_is_returned_unchanged():
+    assert Decompressor.decompress_eahd(b"DDS data") == b"DDS data"
+    assert Decompressor.read_eahd_size(b"DDS data") is None
+
+
+@pytest.mark.parametrize("limit", range(0, 8))
+def test_max_output_stops_early(limit):
+    assert Decompressor.decompress_eahd(ABCABC, strict=True, max_output=limit) == b"abcabc"[:limit]
+
+
+def test_max_output_on_compressed_sample():
+    data = SAMPLES["far"]
+    packed = Compressor.compress_eahd(data)
+    for limit in (1, 2499, 2500, 2501, 22500, 24999, len(data)):
+        assert Decompressor.decompress_eahd(packed, strict=True, max_output=limit) == data[:limit]
+
+
+def test_peek_decodes_a_prefix():
+    data = SAMPLES["dds"]
+    packed = Compressor.compress_eahd(data)
+    assert Decompressor.peek_eahd(packed, 4) == b"DDS "
+    assert Decompressor.peek_eahd(packed, 1000) == data[:1000]
+    assert Decompressor.peek_eahd(packed[:64], 4) == b"DDS "  # Only the head of the payload
+    assert Decompressor.peek_eahd(ABCABC, 2) == b"ab"
+    assert Decompressor.peek_eahd(b"not eahd", 4) == b""
+
+
+def test_truncated_header():
+    with pytest.raises(EAHDError, match="header"):
+        Decompressor.decompress_eahd(b"\xfb\x10\x00", strict=True)
+    assert Decompressor.decompress_eahd(b"\xfb\x10\x00") == b"\xfb\x10\x00"
+
+
+def test_back_reference_before_start():
+    stream = bytes.fromhex("fb10000006" "0005" "fc")  # 3-byte match 6 bytes back at position 0
+    with pytest.raises(EAHDError, match="back-reference"):
+        Decompressor.decompress_eahd(stream, strict=True)
+    assert Decompressor.decompress_eahd(stream) == stream
+
+
+def test_truncated_command():
+    stream = bytes.fromhex("fb10000006" "8000")  # 3-byte command with only one operand byte
+    with pytest.raises(EAHDError, match="truncated"):
+        Decompressor.decompress_eahd(stream, strict=True)
+
+
+def test_stream_shorter_than_declared():
+    stream = bytes.fromhex("fb10000010" "e0" "61626364")  # Declares 16 bytes, holds 4 literals
+    with pytest.raises(EAHDError, match="ended after 4"):
+        Decompressor.decompress_eahd(stream, strict=True)
+    assert Decompressor.decompress_eahd(stream) == b"abcd"
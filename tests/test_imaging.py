@@ -0,0 +1,177 @@
+import random
+
+import pytest
+from PIL import Image, ImageChops
+
+import imaging
+from imaging import ImagePyramid, TileCache, ZoomedImageCache, quantize_zoom, zoom_for_step
+
+
+class FakePhotoImage:
+    """Stands in for ImageTk.PhotoImage so the caches run without a Tk root."""
+    def __init__(self, image):
+        self.image = image.copy()
+
+    def width(self):
+        return self.image.width
+
+    def height(self):
+        return self.image.height
+
+
+@pytest.fixture(autouse=True)
+def headless(monkeypatch):
+    monkeypatch.setattr(imaging.ImageTk, "PhotoImage", FakePhotoImage)
+
+
+def _texture(width, height, seed=0):
+    """Opaque gradients with some noise: busy enough for seams between tiles to show."""
+    rng = random.Random(seed)
+    pixels = [((x * 255) // width, (y * 255) // height, ((x ^ y) * 7 + rng.randrange(32)) & 0xFF,
+               255) for y in range(height) for x in range(width)]
+    image = Image.new("RGBA", (width, height))
+    image.putdata(pixels)
+    return image
+
+
+def _max_difference(a, b):
+    return max(high for _, high in ImageChops.difference(a, b).getextrema())
+
+
+def _stitch(tiles, width, height, left, top):
+    canvas = Image.new("RGBA", (width, height))
+    for x, y, photo in tiles:
+        canvas.paste(photo.image, (x - left, y - top))
+    return canvas
+
+
+# --- Zoom grid ---
+
+def test_quantize_zoom_round_trips():
+    assert quantize_zoom(1.0) == 0
+    assert quantize_zoom(2.0) == imaging.ZOOM_STEPS_PER_OCTAVE
+    assert quantize_zoom(0.5) == -imaging.ZOOM_STEPS_PER_OCTAVE
+    for zoom in (0.13, 0.5, 0.999, 1.0, 1.37, 3.3, 16.0):
+        step = quantize_zoom(zoom)
+        assert quantize_zoom(zoom_for_step(step)) == step
+        assert abs(zoom_for_step(step) / zoom - 1) < 0.003
+
+
+def test_pyramid_levels():
+    pyramid = ImagePyramid(_texture(100, 40))
+    assert [level.size for level in pyramid.levels] == [(100, 40), (50, 20), (25, 10), (13, 5), (7, 3), (4, 2), (2, 1)]
+    assert pyramid.level_for(60, 10).size == (100, 40)
+    assert pyramid.level_for(50, 20).size == (50, 20)
+    assert pyramid.level_for(30, 6).size == (50, 20)
+    assert pyramid.resample(50, 20) is pyramid.levels[1]
+    assert pyramid.resample(31, 12).size == (31, 12)
+
+
+# --- ZoomedImageCache ---
+
+def test_zoomed_cache_hits_and_sizes():
+    cache = ZoomedImageCache()
+    image = _texture(64, 32)
+    photo = cache.get("a", image, 0.5)
+    assert (photo.width(), photo.height()) == (32, 16)
+    assert cache.get("a", image, 0.5001) is photo
+    assert cache.current_bytes == 32 * 16 * 4
+    assert cache.get("a", image, 0.001) is None
+
+
+def test_zoomed_cache_fast_results_are_not_cached():
+    cache = ZoomedImageCache()
+    image = _texture(64, 32)
+    fast = cache.get("a", image, 1.5, fast=True)
+    assert cache.current_bytes == 0
+    quality = cache.get("a", image, 1.5)
+    assert quality is not fast and cache.get("a", image, 1.5, fast=True) is quality
+
+
+def test_zoomed_cache_evicts_least_recently_used():
+    image = _texture(64, 64)
+    cache = ZoomedImageCache(max_bytes=2 * 64 * 64 * 4)
+    first = cache.get("a", image, 1.0)
+    cache.get("b", image, 1.0)
+    cache.get("a", image, 1.0)
+    cache.get("c", image, 1.0)
+    assert cache.current_bytes == 2 * 64 * 64 * 4
+    assert cache.get("a", image, 1.0) is first
+    assert {key for key, _ in cache._entries} == {"a", "c"}
+    # An image larger than the whole budget is returned but never cached
+    assert cache.get("d", image, 2.0).width() == 128
+    assert cache.current_bytes == 2 * 64 * 64 * 4 and ("d", quantize_zoom(2.0)) not in cache._entries
+
+
+def test_zoomed_cache_discard_and_source_change():
+    cache = ZoomedImageCache()
+    image = _texture(64, 32)
+    cache.get("a", image, 1.0)
+    cache.get("a", image, 0.5)
+    cache.get("b", image, 1.0)
+    replacement = _texture(64, 32, seed=1)
+    photo = cache.get("a", replacement, 1.0)
+    assert photo.image.tobytes() == replacement.tobytes()
+    assert cache.current_bytes == 2 * 64 * 32 * 4
+    cache.discard("b")
+    assert cache.current_bytes == 64 * 32 * 4
+    cache.clear()
+    assert cache.current_bytes == 0 and not cache._entries
+
+
+# --- TileCache ---
+
+@pytest.mark.parametrize("zoom", [1.0, 1.7, 3.0, 0.8, 0.3])
+def test_tiles_match_full_resize(zoom):
+    image = _texture(300, 170, seed=2)
+    scale = zoom_for_step(quantize_zoom(zoom))
+    width, height = int(image.width * scale), int(image.height * scale)
+    # A full-view render resizes from the same pyramid level the tiles are taken from
+    level = ImagePyramid(image).level_for(width, height) if scale < 1.0 else image
+    expected = level.resize((width, height), imaging.QUALITY_RESAMPLE)
+
+    cache = TileCache(tile_size=64)
+    tiles = cache.visible_tiles(image, zoom, width, height, width / 2.0, height / 2.0)
+    assert len(tiles) == -(-width // 64) * -(-height // 64)
+    assert _max_difference(_stitch(tiles, width, height, 0, 0), expected) <= 1
+
+
+def test_tiles_are_culled_to_the_view():
+    image = _texture(300, 170, seed=3)
+    cache = TileCache(tile_size=64, margin=0)
+    # At 2x the image is 600x340; centered at (170, 100) its top-left corner sits at (-130, -70),
+    # so the 200x100 view shows zoomed pixels 130..329 x 70..169, i.e. tile columns 2-5 and rows 1-2
+    tiles = cache.visible_tiles(image, 2.0, 200, 100, 170, 100)
+    assert sorted((x, y) for x, y, _ in tiles) == [(-130 + tx * 64, -70 + ty * 64) for tx in range(2, 6) for ty in (1, 2)]
+    assert all(photo.width() == 64 and photo.height() == 64 for *_, photo in tiles)
+    assert len(cache._tiles) == 8
+    assert cache.visible_tiles(image, 2.0, 200, 100, -1000, -1000) == []
+
+
+def test_tiles_are_reused_and_evicted():
+    image = _texture(300, 170, seed=4)
+    tile_bytes = 64 * 64 * 4
+    cache = TileCache(max_bytes=4 * tile_bytes, tile_size=64, margin=0)
+    first = cache.visible_tiles(image, 1.0, 64, 64, 150, 85)
+    assert [photo for *_, photo in cache.visible_tiles(image, 1.0, 64, 64, 150, 85)] == [photo for *_, photo in first]
+    # Panning across the image creates more tiles than the budget holds
+    for center_x in range(150, -100, -32):
+        cache.visible_tiles(image, 1.0, 64, 64, center_x, 85)
+    assert cache.current_bytes <= 4 * tile_bytes
+    assert len(cache._tiles) <= 4 and (0, False, 0, 0) not in cache._tiles
+    # Quality tiles serve fast requests; fast tiles are cached apart and never replace them
+    quality = cache.visible_tiles(image, 1.0, 64, 64, 0, 85)
+    assert len(quality) == 2
+    assert [p for *_, p in cache.visible_tiles(image, 1.0, 64, 64, 0, 85, fast=True)] == [p for *_, p in quality]
+    fast = cache.visible_tiles(image, 1.0, 64, 64, 150, 85, fast=True)
+    assert (0, True, 0, 0) in cache._tiles
+    assert [p for *_, p in cache.visible_tiles(image, 1.0, 64, 64, 150, 85)] != [p for *_, p in fast]
+
+
+def test_tile_larger_than_budget_is_kept():
+    cache = TileCache(max_bytes=100, tile_size=64, margin=0)
+    tiles = cache.visible_tiles(_texture(64, 64), 1.0, 64, 64, 32, 32)
+    assert len(tiles) == 1 and len(cache._tiles) == 1
+    other = _texture(64, 64, seed=5)
+    assert cache.visible_tiles(other, 1.0, 64, 64, 32, 32)[0][2].image.tobytes() == other.tobytes()
+    assert len(cache._tiles) == 1
@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+import journal
+from journal import (JournalError, STATE_COMMITTED, STATE_PENDING, _decode_journal, _encode_journal,
+                     journal_path, recover, write_transaction)
+from layout import coalesce_writes
+
+ORIGINAL = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "test.big"
+    path.write_bytes(ORIGINAL)
+    return str(path)
+
+
+def _leave_journal(archive_path, runs, state=STATE_PENDING):
+    """Writes the journal a save would have left behind if it had stopped after journaling."""
+    data = bytearray(_encode_journal(len(ORIGINAL), runs))
+    data[journal._STATE_OFFSET] = state
+    with open(journal_path(archive_path), 'wb') as f:
+        f.write(data)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# --- coalesce_writes ---
+
+def test_coalesce_merges_touching_and_overlapping_writes():
+    writes = [(10, b"ab"), (0, b"xyz"), (12, b"c"), (3, b"QQ"), (4, b"R")]
+    assert coalesce_writes(writes) == [(0, b"xyzQR"), (10, b"abc")]
+
+
+def test_coalesce_later_write_wins_on_overlap():
+    assert coalesce_writes([(0, b"aaaa"), (1, b"bb"), (0, b"c")]) == [(0, b"cbba")]
+
+
+def test_coalesce_empty():
+    assert coalesce_writes([]) == []
+
+
+# --- Encoding ---
+
+def test_encode_decode_round_trip():
+    runs = [(4, b"\x04\x05", b"ab"), (100, b"\x64", b"z")]
+    assert _decode_journal(_encode_journal(len(ORIGINAL), runs)) == (STATE_PENDING, len(ORIGINAL), runs)
+
+
+def test_state_byte_is_not_covered_by_crc():
+    data = bytearray(_encode_journal(len(ORIGINAL), [(0, b"\x00", b"x")]))
+    data[journal._STATE_OFFSET] = STATE_COMMITTED
+    assert _decode_journal(bytes(data))[0] == STATE_COMMITTED
+
+
+@pytest.mark.parametrize("position", [0, 8, journal._HEADER.size + 2, -6, -1])
+def test_crc_rejects_damaged_journal(position):
+    data = bytearray(_encode_journal(len(ORIGINAL), [(4, b"\x04\x05", b"ab")]))
+    data[position] ^= 0xFF
+    assert _decode_journal(bytes(data)) is None
+
+
+def test_truncated_journal_is_incomplete():
+    data = _encode_journal(len(ORIGINAL), [(4, b"\x04\x05", b"ab")])
+    for length in (0, 10, len(data) - 1):
+        assert _decode_journal(data[:length]) is None
+
+
+# --- write_transaction ---
+
+def test_write_transaction_applies_and_removes_journal(archive):
+    written = write_transaction(archive, [(8, b"AB"), (10, b"C"), (500, b"Z")])
+    assert written == 4
+    expected = bytearray(ORIGINAL)
+    expected[8:11] = b"ABC"
+    expected[500:501] = b"Z"
+    assert _read(archive) == bytes(expected)
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_write_transaction_without_writes_touches_nothing(archive):
+    assert write_transaction(archive, []) == 0
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_write_transaction_rejects_write_past_end(archive):
+    with pytest.raises(JournalError):
+        write_transaction(archive, [(len(ORIGINAL) - 1, b"ab")])
+    assert _read(archive) == ORIGINAL
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_write_transaction_refuses_unresolved_journal(archive):
+    _leave_journal(archive, [(0, ORIGINAL[:1], b"x")])
+    with pytest.raises(JournalError):
+        write_transaction(archive, [(8, b"AB")])
+    assert _read(archive) == ORIGINAL
+
+
+# --- Recovery ---
+
+def test_recover_without_journal(archive):
+    assert recover(archive) is None
+
+
+def test_recover_replays_pending_journal(archive):
+    runs = [(4, ORIGINAL[4:6], b"ab"), (300, ORIGINAL[300:303], b"xyz")]
+    _leave_journal(archive, runs)
+    with open(archive, 'r+b') as f:  # Crash after the first run reached the disk
+        f.seek(4)
+        f.write(b"ab")
+    assert recover(archive) == "replayed 2 interrupted writes"
+    expected = bytearray(ORIGINAL)
+    expected[4:6] = b"ab"
+    expected[300:303] = b"xyz"
+    assert _read(archive) == bytes(expected)
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_recover_rolls_back_pending_journal(archive):
+    runs = [(4, ORIGINAL[4:6], b"ab"), (300, ORIGINAL[300:303], b"xyz")]
+    _leave_journal(archive, runs)
+    with open(archive, 'r+b') as f:
+        f.seek(4)
+        f.write(b"ab")
+    assert recover(archive, rollback=True) == "rolled back 2 interrupted writes"
+    assert _read(archive) == ORIGINAL
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_recover_removes_committed_journal_without_writing(archive):
+    _leave_journal(archive, [(4, b"\xff\xff", b"ab")], state=STATE_COMMITTED)
+    assert recover(archive) == "removed committed journal"
+    assert _read(archive) == ORIGINAL
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_recover_discards_incomplete_journal(archive):
+    data = _encode_journal(len(ORIGINAL), [(4, ORIGINAL[4:6], b"ab")])
+    with open(journal_path(archive), 'wb') as f:
+        f.write(data[:-3])  # Crash while the journal itself was being written
+    assert recover(archive) == "discarded incomplete journal"
+    assert _read(archive) == ORIGINAL
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_recover_refuses_journal_for_resized_archive(archive):
+    _leave_journal(archive, [(4, ORIGINAL[4:6], b"ab")])
+    with open(archive, 'ab') as f:
+        f.write(b"extra")
+    with pytest.raises(JournalError):
+        recover(archive)
+    assert os.path.exists(journal_path(archive))
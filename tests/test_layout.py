@@ -0,0 +1,182 @@
+import json
+import math
+import os
+import random
+import struct
+
+import pytest
+
+from layout import (LayoutError, LayoutReadPlan, SPECIAL_TEXT_COLOR_LABELS, coalesce_writes, encode_color, encode_float,
+                    encode_hex_color, encode_values, plan_writes, resolve_layout)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_ARCHIVE = os.path.join(ROOT, "overlay_9002.BIG")
+TEXT_LABEL = SPECIAL_TEXT_COLOR_LABELS[0]
+
+
+def _baseline_read(path, offsets, colors):
+    """The original per-address reads: one seek and read per value, None where the read came up short."""
+    result_offsets, result_colors = {}, {}
+    with open(path, 'rb') as f:
+        for label, addrs in offsets.items():
+            f.seek(addrs[0])
+            data = f.read(4)
+            result_offsets[label] = struct.unpack('<f', data)[0] if len(data) == 4 else None
+        for label, addrs in colors.items():
+            f.seek(addrs[0])
+            if label in SPECIAL_TEXT_COLOR_LABELS:
+                data = f.read(5)
+                result_colors[label] = data.decode('ascii', errors='ignore').strip().rstrip('\x00') if len(data) == 5 else None
+            else:
+                data = f.read(4)
+                result_colors[label] = f'#{data[2]:02X}{data[1]:02X}{data[0]:02X}' if len(data) == 4 else None
+    return result_offsets, result_colors
+
+
+def _same(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+
+def _assert_matches_baseline(path, offsets, colors):
+    values = LayoutReadPlan(offsets, colors).read(path)
+    base_offsets, base_colors = _baseline_read(path, offsets, colors)
+    assert list(values.offsets) == list(offsets) and list(values.colors) == list(colors)
+    for label in offsets:
+        assert _same(values.offsets[label], base_offsets[label]), label
+    assert values.colors == base_colors
+
+
+# --- Reading ---
+
+def test_sample_archive_matches_baseline():
+    with open(os.path.join(ROOT, "offsets.json")) as f:
+        layout = resolve_layout(json.load(f), "2002")
+    _assert_matches_baseline(SAMPLE_ARCHIVE, layout.offsets, layout.colors)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_layout_matches_baseline(tmp_path, seed):
+    rng = random.Random(seed)
+    path = tmp_path / "random.big"
+    path.write_bytes(bytes(rng.getrandbits(8) for _ in range(20000)))
+    addresses = rng.sample(range(0, 19990), 60)
+    offsets = {f"offset {i}": (addr, addr + 100) for i, addr in enumerate(addresses[:40])}
+    colors = {f"color {i}": (addr,) for i, addr in enumerate(addresses[40:59])}
+    colors[TEXT_LABEL] = (addresses[59],)
+    _assert_matches_baseline(str(path), offsets, colors)
+
+
+def _offsets_at(*addresses):
+    return {f"v{i}": (addr,) for i, addr in enumerate(addresses)}
+
+
+def test_ranges_merge_gaps_up_to_512():
+    plan = LayoutReadPlan(_offsets_at(0, 4 + 512, 1000 + 513, 1000), {})
+    # Gaps after each field: 0..4 -> 516 is 512, 520 -> 1000 is 480, 1004 -> 1513 is 509
+    assert [(start, end) for start, end, _, _ in plan.ranges] == [(0, 1517)]
+    plan = LayoutReadPlan(_offsets_at(0, 4 + 513), {})
+    assert [(start, end) for start, end, _, _ in plan.ranges] == [(0, 4), (517, 521)]
+
+
+def test_overlapping_fields_start_a_new_range(tmp_path):
+    plan = LayoutReadPlan(_offsets_at(0, 2), {"c": (3,)})
+    assert [(start, end) for start, end, _, _ in plan.ranges] == [(0, 4), (2, 6), (3, 7)]
+    path = tmp_path / "small.big"
+    path.write_bytes(bytes(range(16)))
+    _assert_matches_baseline(str(path), _offsets_at(0, 2), {"c": (3,)})
+
+
+def test_values_partly_outside_the_file_are_none(tmp_path):
+    path = tmp_path / "short.big"
+    path.write_bytes(bytes(range(100)))
+    offsets = _offsets_at(0, 90, 98, 200)
+    colors = {"inside": (94,), "edge": (97,), TEXT_LABEL: (95,)}
+    values = LayoutReadPlan(offsets, colors).read(str(path))
+    assert values.offsets["v0"] == struct.unpack_from('<f', bytes(range(100)), 0)[0]
+    assert values.offsets["v1"] == struct.unpack_from('<f', bytes(range(100)), 90)[0]
+    assert values.offsets["v2"] is None and values.offsets["v3"] is None
+    assert values.colors["inside"] == "#605F5E"
+    assert values.colors["edge"] is None
+    assert values.colors[TEXT_LABEL] is not None  # 95..99 is the last full 5-byte word
+    _assert_matches_baseline(str(path), offsets, {"inside": (94,), "edge": (97,)})
+
+
+def test_empty_layout_and_empty_file(tmp_path):
+    path = tmp_path / "empty.big"
+    path.write_bytes(b"")
+    values = LayoutReadPlan(_offsets_at(0), {"c": (0,)}).read(str(path))
+    assert values.offsets == {"v0": None} and values.colors == {"c": None}
+    assert LayoutReadPlan({}, {}).read(str(path)).offsets == {}
+
+
+# --- resolve_layout ---
+
+def _doc(**entry):
+    return {"2002": {"offsets": {"X": "0x10"}, "colors": {"C": ["20", "0x30"]}, **entry}}
+
+
+def test_resolve_layout_parses_addresses_and_indexes():
+    layout = resolve_layout(_doc(reference_width=586, reference_height="156"), "2002")
+    assert layout.offsets == {"X": (0x10,)}
+    assert layout.colors == {"C": (0x20, 0x30)}
+    assert layout.offset_labels_by_key == {(0x10,): "X"}
+    assert layout.color_labels_by_key == {(0x20, 0x30): "C"}
+    assert (layout.reference_width, layout.reference_height) == (586, 156)
+
+
+@pytest.mark.parametrize("entry, message", [
+    ({"offsets": {"A": "0x10", "B": ["10"]}}, "share the same addresses"),
+    ({"colors": {"A": "zz"}}, "Invalid address"),
+    ({"colors": {"A": []}}, "Invalid address"),
+    ({"offsets": ["0x10"]}, "must be an object"),
+    ({"reference_width": 0}, "reference_width"),
+    ({"reference_height": "wide"}, "reference_height"),
+])
+def test_resolve_layout_rejects_bad_entries(entry, message):
+    with pytest.raises(LayoutError, match=message):
+        resolve_layout(_doc(**entry), "2002")
+
+
+def test_resolve_layout_unknown_name():
+    with pytest.raises(LayoutError, match="not found"):
+        resolve_layout(_doc(), "4002")
+    with pytest.raises(LayoutError, match="must be an object"):
+        resolve_layout({"2002": []}, "2002")
+
+
+# --- Encoding and writes ---
+
+def test_encode_values():
+    offsets, colors = encode_values({"X": "1.5", "Y": 2}, {"C": "#102030", TEXT_LABEL: "BLACK"})
+    assert offsets == {"X": struct.pack('<f', 1.5), "Y": struct.pack('<f', 2.0)}
+    assert colors == {"C": bytes([0x30, 0x20, 0x10, 0xFF]), TEXT_LABEL: b"BLACK"}
+    assert encode_color(TEXT_LABEL, "WHITE") == b"WHITE"
+
+
+def test_encode_values_reports_every_error():
+    with pytest.raises(LayoutError) as info:
+        encode_values({"X": "abc", "Y": "inf", "Z": "1"}, {"C": "#12345", "D": "#GG0000", TEXT_LABEL: "RED"})
+    lines = str(info.value).splitlines()
+    assert [line.split(":")[0] for line in lines] == ["X", "Y", "C", "D", TEXT_LABEL]
+
+
+def test_encoded_values_read_back(tmp_path):
+    path = tmp_path / "layout.big"
+    path.write_bytes(bytes(64))
+    layout = resolve_layout({"2002": {"offsets": {"X": ["0x0", "0x20"]}, "colors": {"C": "0x8", TEXT_LABEL: "0x10"}}}, "2002")
+    encoded = encode_values({"X": "12.25"}, {"C": "#A0B0C0", TEXT_LABEL: "WHITE"})
+    with open(path, 'r+b') as f:
+        for addr, data in coalesce_writes(plan_writes(layout, *encoded)):
+            f.seek(addr)
+            f.write(data)
+    values = LayoutReadPlan(layout.offsets, layout.colors).read(str(path))
+    assert values.offsets == {"X": 12.25}
+    assert values.colors == {"C": "#A0B0C0", TEXT_LABEL: "WHITE"}
+    assert path.read_bytes()[0x20:0x24] == encode_float(12.25)
+
+
+def test_plan_writes_rejects_unknown_labels():
+    layout = resolve_layout(_doc(), "2002")
+    with pytest.raises(LayoutError, match="Missing"):
+        plan_writes(layout, {"Missing": b"\x00" * 4}, {})
+    assert plan_writes(layout, {}, {"C": encode_hex_color("#000000")}) == [(0x20, b"\x00\x00\x00\xff"), (0x30, b"\x00\x00\x00\xff")]
@@ -0,0 +1,116 @@
+import json
+import os
+import pickle
+import shutil
+
+import pytest
+
+import offsets_db
+from layout import LayoutError, resolve_layout
+from offsets_db import CACHE_VERSION, cache_path_for, compile_offsets, load_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def offsets_json(tmp_path):
+    path = tmp_path / "offsets.json"
+    shutil.copyfile(os.path.join(ROOT, "offsets.json"), path)
+    return str(path)
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _count_compiles(monkeypatch):
+    calls = []
+    original = offsets_db.compile_offsets
+    monkeypatch.setattr(offsets_db, "compile_offsets", lambda data: calls.append(1) or original(data))
+    return calls
+
+
+def test_compile_matches_resolve_layout(offsets_json):
+    data = _load_json(offsets_json)
+    layouts = compile_offsets(data)
+    assert list(layouts) == list(data)
+    for name in data:
+        assert layouts[name] == resolve_layout(data, name)
+
+
+def test_compile_rejects_bad_documents():
+    with pytest.raises(LayoutError):
+        compile_offsets([])
+    with pytest.raises(LayoutError, match="share the same addresses"):
+        compile_offsets({"2002": {"offsets": {"A": "0x10", "B": "0x10"}}})
+
+
+def test_cache_round_trip(offsets_json, monkeypatch):
+    fresh = load_database(offsets_json)
+    assert os.path.exists(cache_path_for(offsets_json))
+    calls = _count_compiles(monkeypatch)
+    cached = load_database(offsets_json)
+    assert calls == []
+    assert cached.source_hash == fresh.source_hash
+    assert cached.layouts == fresh.layouts
+    for layout in cached.layouts.values():
+        assert layout.offset_labels_by_key == {key: label for label, key in layout.offsets.items()}
+        assert all(isinstance(a, int) for key in layout.colors.values() for a in key)
+
+
+def test_hash_change_invalidates_cache(offsets_json, monkeypatch):
+    load_database(offsets_json)
+    data = _load_json(offsets_json)
+    data["2002"]["offsets"]["Extra Offset"] = "0x7FFF0"
+    with open(offsets_json, "w") as f:
+        json.dump(data, f)
+    calls = _count_compiles(monkeypatch)
+    database = load_database(offsets_json)
+    assert calls == [1]
+    assert database.get("2002").offsets["Extra Offset"] == (0x7FFF0,)
+    with open(cache_path_for(offsets_json)) as f:
+        assert json.load(f)["hash"] == database.source_hash
+
+
+@pytest.mark.parametrize("cache_bytes", [
+    b"",
+    b"{not json",
+    pickle.dumps({"version": CACHE_VERSION, "layouts": {}}),
+    json.dumps({"version": CACHE_VERSION - 1, "hash": "", "layouts": {}}).encode(),
+    json.dumps([1, 2, 3]).encode(),
+])
+def test_unusable_cache_is_rebuilt(offsets_json, monkeypatch, cache_bytes):
+    with open(cache_path_for(offsets_json), "wb") as f:
+        f.write(cache_bytes)
+    calls = _count_compiles(monkeypatch)
+    database = load_database(offsets_json)
+    assert calls == [1]
+    assert database.layouts == compile_offsets(_load_json(offsets_json))
+    with open(cache_path_for(offsets_json)) as f:
+        assert json.load(f)["version"] == CACHE_VERSION
+
+
+def test_version_mismatch_with_matching_hash_is_rebuilt(offsets_json, monkeypatch):
+    database = load_database(offsets_json)
+    cache_path = cache_path_for(offsets_json)
+    with open(cache_path) as f:
+        payload = json.load(f)
+    payload["version"] = CACHE_VERSION + 1
+    payload["layouts"] = {}
+    with open(cache_path, "w") as f:
+        json.dump(payload, f)
+    assert load_database(offsets_json).layouts == database.layouts
+
+
+def test_no_cache_written_when_disabled(offsets_json):
+    database = load_database(offsets_json, use_cache=False)
+    assert not os.path.exists(cache_path_for(offsets_json))
+    assert "2002" in database and len(database) == len(_load_json(offsets_json))
+
+
+def test_read_plan_is_built_once(offsets_json):
+    database = load_database(offsets_json, use_cache=False)
+    plan = database.read_plan("2002")
+    assert database.read_plan("2002") is plan
+    assert plan.offset_labels == list(database.get("2002").offsets)
@@ -0,0 +1,198 @@
+import os
+import zlib
+
+import pytest
+
+import journal
+from journal import journal_path
+from patchset import (FLAG_ZLIB, PatchError, PatchRun, PatchSet, _HEADER, apply_patch, build_patch, decode_patch,
+                      describe_patch, encode_patch, read_patch, write_patch)
+
+SIZE = 8192
+
+
+def _archive_bytes(name: str = "2002") -> bytes:
+    # Not a BIG file, so the internal name comes from the fallback scan of the file head
+    head = f"scoreboard overlay {name} ".encode('ascii')
+    body = bytes((i * 7) & 0xFF for i in range(SIZE - len(head)))
+    return head + body
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "test.big"
+    path.write_bytes(_archive_bytes())
+    return str(path)
+
+
+def _slot_patch(original: bytes, name: str = "2002") -> PatchSet:
+    return build_patch(name, [(100, b"\x01\x02\x03\x04"), (104, b"\x05")],
+                       [(4096, b"\xee" * 1024, original[4096:5120])])
+
+
+# --- Format ---
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(compress):
+    patch = _slot_patch(_archive_bytes())
+    data = encode_patch(patch, compress=compress)
+    assert bool(_HEADER.unpack_from(data)[2] & FLAG_ZLIB) == compress
+    decoded = decode_patch(data)
+    assert decoded == patch
+    assert [run.address for run in decoded.runs] == [100, 4096]
+    assert decoded.runs[0].data == b"\x01\x02\x03\x04\x05"
+    assert decoded.runs[1].verify_base and not decoded.runs[0].verify_base
+
+
+def test_write_and_read_file(tmp_path):
+    patch = _slot_patch(_archive_bytes())
+    path = str(tmp_path / "mod.fbp")
+    assert write_patch(path, patch) == os.path.getsize(path)
+    assert read_patch(path) == patch
+    assert os.listdir(tmp_path) == ["mod.fbp"]
+
+
+@pytest.mark.parametrize("position", [-1, -4, _HEADER.size + 1, -10])
+def test_corrupt_patch_is_rejected(position):
+    data = bytearray(encode_patch(_slot_patch(_archive_bytes())))
+    data[position] ^= 0xFF
+    with pytest.raises(PatchError):
+        decode_patch(bytes(data))
+
+
+def test_truncated_patch_is_rejected():
+    data = encode_patch(_slot_patch(_archive_bytes()))
+    for length in (0, 5, len(data) - 1):
+        with pytest.raises(PatchError):
+            decode_patch(data[:length])
+
+
+def test_truncated_run_table_is_rejected():
+    # A valid checksum over a header that claims more runs than the file holds
+    body = _HEADER.pack(b"FBP1", 1, 0, 4, 5) + b"2002" + bytes(20)
+    with pytest.raises(PatchError, match="Run table is truncated"):
+        decode_patch(body + zlib.crc32(body).to_bytes(4, 'little'))
+
+
+def test_bad_magic_and_version_are_rejected():
+    data = bytearray(encode_patch(build_patch("2002", [(0, b"x")])))
+    with pytest.raises(PatchError, match="Not a patch"):
+        decode_patch(b"XXXX" + bytes(data[4:]))
+    data[4] = 99
+    body = bytes(data[:-4])
+    with pytest.raises(PatchError, match="version"):
+        decode_patch(body + zlib.crc32(body).to_bytes(4, 'little'))
+
+
+def test_build_rejects_overlapping_runs():
+    with pytest.raises(PatchError, match="overlap"):
+        build_patch("2002", [(100, b"abcd")], [(102, b"xy", b"\x00\x00")])
+
+
+def test_build_rejects_slot_length_mismatch():
+    with pytest.raises(PatchError):
+        build_patch("2002", [], [(0, b"abc", b"ab")])
+
+
+@pytest.mark.parametrize("runs, message", [
+    ([PatchRun(200, b"ab"), PatchRun(100, b"cd")], "not sorted"),
+    ([PatchRun(100, b"abcd"), PatchRun(102, b"ef")], "overlap"),
+])
+def test_decode_rejects_bad_run_table(runs, message):
+    with pytest.raises(PatchError, match=message):
+        decode_patch(encode_patch(PatchSet("2002", runs)))
+
+
+def test_describe_marks_unverified_value_runs():
+    lines = describe_patch(_slot_patch(_archive_bytes())).splitlines()
+    assert lines[1].startswith("Runs: 2 (1 texture slots)")
+    assert lines[2] == "Value runs (1) are never verified against the archive before writing"
+    assert lines[3].endswith("5 bytes [unverified]") and lines[4].endswith("1024 bytes [base checked]")
+    assert not any("never verified" in line for line in describe_patch(PatchSet("2002", [])).splitlines())
+
+
+# --- Applying ---
+
+def test_apply_and_reapply(archive):
+    original = _archive_bytes()
+    patch = _slot_patch(original)
+    result = apply_patch(patch, archive)
+    assert result.ok and result.writes == 2 and result.bytes_written == 5 + 1024
+
+    with open(archive, 'rb') as f:
+        patched = f.read()
+    assert patched[100:105] == b"\x01\x02\x03\x04\x05"
+    assert patched[4096:5120] == b"\xee" * 1024
+    assert patched[:100] == original[:100] and patched[5120:] == original[5120:]
+    assert not os.path.exists(journal_path(archive))
+
+    again = apply_patch(patch, archive)
+    assert again.ok and again.writes == 0 and again.bytes_written == 0
+    with open(archive, 'rb') as f:
+        assert f.read() == patched
+
+
+def test_dry_run_writes_nothing(archive):
+    result = apply_patch(_slot_patch(_archive_bytes()), archive, dry_run=True)
+    assert result.ok and result.writes == 2 and result.bytes_written == 0
+    with open(archive, 'rb') as f:
+        assert f.read() == _archive_bytes()
+
+
+def test_base_mismatch_is_refused_before_writing(archive):
+    other = bytearray(_archive_bytes())
+    other[4500] ^= 0xFF
+    result = apply_patch(_slot_patch(bytes(other)), archive)
+    assert not result.ok and "Base data differs" in result.message
+    with open(archive, 'rb') as f:
+        assert f.read() == _archive_bytes()
+
+
+def test_force_skips_base_check(archive):
+    other = bytearray(_archive_bytes())
+    other[4500] ^= 0xFF
+    assert apply_patch(_slot_patch(bytes(other)), archive, force=True).ok
+
+
+def test_interrupted_apply_is_finished_by_the_next_apply(archive):
+    original = _archive_bytes()
+    patch = _slot_patch(original)
+    # Crash halfway through the slot: the journal is pending and the slot is half written
+    runs = [(run.address, original[run.address:run.end], run.data) for run in patch.runs]
+    with open(journal_path(archive), 'wb') as f:
+        f.write(journal._encode_journal(len(original), runs))
+    with open(archive, 'r+b') as f:
+        f.seek(4096)
+        f.write(b"\xee" * 512)
+
+    dry = apply_patch(patch, archive, dry_run=True)
+    assert not dry.ok and "interrupted" in dry.message
+
+    result = apply_patch(patch, archive)
+    assert result.ok and result.writes == 0
+    with open(archive, 'rb') as f:
+        patched = f.read()
+    assert patched[4096:5120] == b"\xee" * 1024
+    assert patched[100:105] == b"\x01\x02\x03\x04\x05"
+    assert not os.path.exists(journal_path(archive))
+
+
+def test_run_past_end_is_refused(archive):
+    result = apply_patch(build_patch("2002", [(SIZE - 2, b"abcd")]), archive)
+    assert not result.ok and "beyond the end" in result.message
+
+
+def test_wrong_target_is_refused(archive):
+    result = apply_patch(build_patch("4002", [(100, b"x")]), archive)
+    assert not result.ok and result.internal_name == "2002"
+
+
+def test_higher_priority_name_wins_detection(tmp_path):
+    path = tmp_path / "mixed.big"
+    path.write_bytes(b"overlay 15002 " + _archive_bytes("2002"))
+    result = apply_patch(build_patch("2002", [(200, b"x")]), str(path))
+    assert not result.ok and result.internal_name == "15002"
+
+
+def test_missing_file(tmp_path):
+    assert not apply_patch(build_patch("2002", []), str(tmp_path / "missing.big")).ok
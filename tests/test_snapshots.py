@@ -0,0 +1,171 @@
+import os
+
+import pytest
+
+from journal import journal_path
+from snapshots import SnapshotStore, diff_writes, restore_range
+
+
+def _payload(seed: int, size: int = 4096) -> bytes:
+    return bytes((i * seed + i // 7) & 0xFF for i in range(size))
+
+
+@pytest.fixture
+def store():
+    store = SnapshotStore()
+    yield store
+    store.close()
+
+
+# --- SnapshotStore ---
+
+def test_put_get_round_trip(store):
+    data = _payload(3)
+    digest = store.put(data)
+    assert store.get(digest) == data
+    assert 0 < store.memory_bytes < len(data)
+
+
+def test_identical_payloads_share_one_copy(store):
+    first = store.put(_payload(5))
+    size = store.memory_bytes
+    second = store.put(bytearray(_payload(5)))
+    assert first == second
+    assert store.memory_bytes == size
+
+
+def test_release_deletes_after_last_reference(store):
+    digest = store.put(_payload(7))
+    store.put(_payload(7))
+    store.release(digest)
+    assert store.get(digest) == _payload(7)
+    store.release(digest)
+    assert store.memory_bytes == 0
+    with pytest.raises(KeyError):
+        store.get(digest)
+
+
+def test_release_of_unknown_digest_is_harmless(store):
+    store.release("0" * 40)
+    assert store.memory_bytes == 0
+
+
+def test_large_payload_spills_to_disk():
+    store = SnapshotStore(spill_bytes=16)
+    try:
+        data = os.urandom(1024)
+        digest = store.put(data)
+        assert store.memory_bytes == 0 and store.spilled_bytes > 0
+        spill_file = store._spill_path(digest)
+        assert os.path.isfile(spill_file)
+        assert store.get(digest) == data
+
+        store.release(digest)
+        assert store.spilled_bytes == 0
+        assert not os.path.exists(spill_file)
+    finally:
+        store.close()
+
+
+def test_memory_budget_spills_overflow():
+    store = SnapshotStore(max_memory_bytes=200)
+    try:
+        kept = store.put(b"a" * 1000)
+        spilled = store.put(os.urandom(300))
+        assert store.memory_bytes <= 200
+        assert store.spilled_bytes > 0
+        assert store.get(kept) == b"a" * 1000
+        assert len(store.get(spilled)) == 300
+    finally:
+        store.close()
+
+
+def test_close_removes_spill_directory():
+    store = SnapshotStore(spill_bytes=0)
+    digest = store.put(_payload(11))
+    spill_dir = os.path.dirname(store._spill_path(digest))
+    store.close()
+    assert not os.path.exists(spill_dir)
+    assert store.memory_bytes == store.spilled_bytes == 0
+
+
+def test_lzma_store_round_trip():
+    store = SnapshotStore("lzma")
+    try:
+        assert store.get(store.put(_payload(13))) == _payload(13)
+    finally:
+        store.close()
+
+
+def test_unknown_compression_is_rejected():
+    with pytest.raises(ValueError):
+        SnapshotStore("brotli")
+
+
+# --- diff_writes ---
+
+def test_identical_data_needs_no_writes():
+    data = _payload(2)
+    assert diff_writes(0x1000, data, data) == []
+
+
+@pytest.mark.parametrize("position, expected", [
+    (0, [(0x1000, 0, 512)]),
+    (511, [(0x1000, 0, 512)]),
+    (512, [(0x1200, 512, 1024)]),
+    (4095, [(0x1e00, 3584, 4096)]),
+])
+def test_single_change_rewrites_its_block(position, expected):
+    current = _payload(2)
+    target = bytearray(current)
+    target[position] ^= 0xFF
+    assert diff_writes(0x1000, current, target) == [(addr, bytes(target[a:b])) for addr, a, b in expected]
+
+
+def test_changes_in_adjacent_blocks_merge():
+    current = _payload(2)
+    target = bytearray(current)
+    target[511] ^= 0xFF
+    target[512] ^= 0xFF
+    assert diff_writes(0, current, target) == [(0, bytes(target[0:1024]))]
+
+
+def test_separate_blocks_stay_separate():
+    current = _payload(2)
+    target = bytearray(current)
+    target[10] ^= 0xFF
+    target[2000] ^= 0xFF
+    assert diff_writes(0, current, target) == [(0, bytes(target[0:512])), (1536, bytes(target[1536:2048]))]
+
+
+def test_partial_last_block():
+    current = _payload(2, 1000)
+    target = bytearray(current)
+    target[999] ^= 0xFF
+    assert diff_writes(0, current, target) == [(512, bytes(target[512:1000]))]
+
+
+def test_length_mismatch_is_rejected():
+    with pytest.raises(ValueError):
+        diff_writes(0, b"abc", b"ab")
+
+
+# --- restore_range ---
+
+def test_restore_range_rewrites_only_changed_blocks(tmp_path):
+    before = _payload(9)
+    path = tmp_path / "test.big"
+    archive = bytearray(b"\x00" * 256 + before + b"\x00" * 256)
+    archive[256 + 1000] ^= 0xFF  # An import changed one byte of the slot
+    path.write_bytes(bytes(archive))
+
+    assert restore_range(str(path), 256, before) == 512
+    assert path.read_bytes() == b"\x00" * 256 + before + b"\x00" * 256
+    assert not os.path.exists(journal_path(str(path)))
+
+
+def test_restore_range_past_end_is_rejected(tmp_path):
+    path = tmp_path / "test.big"
+    path.write_bytes(b"\x00" * 100)
+    with pytest.raises(ValueError):
+        restore_range(str(path), 90, b"\x01" * 20)
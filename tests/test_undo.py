@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from core import CompoundAction, EditAction, TextureImportAction, UndoManager
+from snapshots import SnapshotStore
+
+
+class _StubApp:
+    def update_menu_states(self):
+        pass
+
+
+class _StubVar:
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+@pytest.fixture
+def store():
+    store = SnapshotStore()
+    yield store
+    store.close()
+
+
+def _import_action(store, address=0x100, before=b"\x00" * 64, after=b"\xff" * 64):
+    return TextureImportAction("test.big", "10", address, len(before), store.put(before), store.put(after), store)
+
+
+def test_edit_after_texture_import_is_recorded_separately(store):
+    manager = UndoManager(_StubApp())
+    var = _StubVar("2.0")
+    imported = _import_action(store)
+    edit = EditAction(var, "1.0", "2.0", (0x10,), None)
+
+    manager.record_action(imported)
+    manager.record_action(edit)
+    assert list(manager.undo_stack) == [imported, edit]
+
+    assert manager.perform_undo() is edit
+    assert manager.perform_undo() is imported
+    assert not manager.can_undo()
+    assert list(manager.redo_stack) == [edit, imported]
+
+
+def test_edits_merge_again_after_an_import(store):
+    manager = UndoManager(_StubApp(), coalesce_window=10.0)
+    var = _StubVar()
+    manager.record_action(_import_action(store))
+    manager.record_action(EditAction(var, "1.0", "2.0", (0x10,), None))
+    manager.record_action(EditAction(var, "2.0", "3.0", (0x10,), None))
+    assert len(manager.undo_stack) == 2
+    assert (manager.undo_stack[-1].old_value, manager.undo_stack[-1].new_value) == ("1.0", "3.0")
+
+
+def test_edits_outside_window_are_not_merged():
+    manager = UndoManager(_StubApp(), coalesce_window=0.5)
+    var = _StubVar()
+    first = EditAction(var, "1.0", "2.0", (0x10,), None)
+    manager.record_action(first)
+    manager.record_action(EditAction(var, "2.0", "3.0", (0x10,), None, timestamp=first.timestamp + 1.0))
+    assert len(manager.undo_stack) == 2
+
+
+def test_transaction_records_one_compound_action():
+    manager = UndoManager(_StubApp())
+    x, y = _StubVar(), _StubVar()
+    with manager.transaction("Move"):
+        manager.record_action(EditAction(x, "0", "5", (0x10,), None))
+        manager.record_action(EditAction(y, "0", "7", (0x20,), None))
+    assert len(manager.undo_stack) == 1
+    assert isinstance(manager.undo_stack[0], CompoundAction)
+    assert len(manager.undo_stack[0].actions) == 2
+
+
+def test_eviction_releases_import_snapshots(store):
+    manager = UndoManager(_StubApp(), max_history=2)
+    manager.record_action(_import_action(store, before=b"a" * 64, after=b"b" * 64))
+    for i in range(2):
+        manager.record_action(EditAction(_StubVar(), "0", str(i), (i,), None, timestamp=time.monotonic() + 10 * i))
+    assert store.memory_bytes == 0
+    assert len(manager.undo_stack) == 2
+
+
+def test_clear_edits_keeps_texture_imports(store):
+    manager = UndoManager(_StubApp())
+    var = _StubVar()
+    imported = _import_action(store)
+    manager.record_action(EditAction(var, "0", "1", (0x10,), None))
+    manager.record_action(imported)
+    manager.record_action(EditAction(var, "1", "2", (0x10,), None))
+    manager.perform_undo()
+
+    manager.clear_edits()
+    assert list(manager.undo_stack) == [imported]
+    assert not manager.redo_stack
+    assert manager.history_bytes == imported.size_bytes()
+    assert store.get(imported.before_digest) == b"\x00" * 64
+    assert manager.perform_undo() is imported
@@ -1,6 +1,11 @@
 import os
+import re
+import hashlib
 import logging
-from typing import Optional
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Set, Tuple
 
 def format_filesize(byte_count: int) -> str:
     """Formats a size in bytes into a human-readable string (KB, MB)."""
@@ -11,23 +16,100 @@ def format_filesize(byte_count: int) -> str:
     else:
         return f"{byte_count / (1024 * 1024):.2f} MB"
 
-def read_internal_name(file_path: str) -> Optional[str]:
+# Known internal scoreboard names, in the order they win when an archive references several
+KNOWN_INTERNAL_NAMES = ("15002", "2002", "3002", "4002", "5002", "6002", "8002")
+
+_BIG_MAGICS = (b"BIGF", b"BIG4")
+_APT_MAGIC = b"Apt Data"
+_OVERLAY_TOKEN = re.compile(rb"overlay_(\d+)")
+_FINGERPRINT_BYTES = 4096
+_FALLBACK_SCAN_BYTES = 200 * 1024
+_NAME_CACHE_SIZE = 256
+
+_name_cache: "OrderedDict[tuple, Optional[str]]" = OrderedDict()
+_name_cache_lock = threading.Lock()
+
+
+def detection_order(names: Iterable[str]) -> Tuple[str, ...]:
+    """Known names first (in priority order), then any other configured names."""
+    return KNOWN_INTERNAL_NAMES + tuple(n for n in names if n not in KNOWN_INTERNAL_NAMES)
+
+
+def file_fingerprint(file_path: str) -> tuple:
+    """(path, size, mtime, hash of the header block): changes whenever the archive is rewritten."""
+    st = os.stat(file_path)
+    with open(file_path, 'rb') as f:
+        head = f.read(_FINGERPRINT_BYTES)
+    return (os.path.normcase(os.path.abspath(file_path)), st.st_size, st.st_mtime_ns,
+            hashlib.blake2b(head, digest_size=16).hexdigest())
+
+
+def read_internal_name(file_path: str, known_names: Sequence[str] = KNOWN_INTERNAL_NAMES) -> Optional[str]:
     """
-    Reads the beginning of a file to detect a known internal scoreboard name.
+    Detects the internal scoreboard name of an archive.
+    Names are taken from the overlay_<n> symbols of its APT entries (the sg2 group and any
+    "Apt Data" movie), falling back to a single-pass search of the first 200 KB for files that
+    do not parse as BIG archives. When several known names occur, the earliest in known_names wins.
+    Results are cached per file fingerprint, so reopening an unchanged file costs one small read.
     """
     if not file_path or not os.path.exists(file_path):
         return None
     try:
-        with open(file_path, 'rb') as f:
-            content = f.read(200 * 1024)  # Read first 200KB
-        text = content.decode('utf-8', errors='ignore')
-        
-        # List of known internal names to search for
-        names_to_check = ["15002", "2002", "3002", "4002", "5002", "6002", "8002"]
-        for name in names_to_check:
-            if name in text:
-                return name
-        return None
+        key = file_fingerprint(file_path) + (tuple(known_names),)
+        with _name_cache_lock:
+            if key in _name_cache:
+                _name_cache.move_to_end(key)
+                return _name_cache[key]
+
+        found = _names_from_apt(file_path)
+        name = _pick_by_priority(found, known_names) if found else None
+        if name is None:
+            name = _pick_by_priority(_names_from_scan(file_path, tuple(known_names)), known_names)
+
+        with _name_cache_lock:
+            _name_cache[key] = name
+            while len(_name_cache) > _NAME_CACHE_SIZE:
+                _name_cache.popitem(last=False)
+        return name
     except Exception as e:
         logging.error(f"Failed to read internal name from {file_path}: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _pick_by_priority(found: Set[str], known_names: Sequence[str]) -> Optional[str]:
+    return next((name for name in known_names if name in found), None)
+
+
+def _names_from_apt(file_path: str) -> Set[str]:
+    """Collects overlay_<n> numbers from the archive's APT entries; empty if it is not a readable BIG file."""
+    from file_io import FifaBigFile
+
+    found: Set[str] = set()
+    with open(file_path, 'rb') as f:
+        if f.read(4) not in _BIG_MAGICS:
+            return found
+    try:
+        with FifaBigFile(file_path, lazy=True) as big_file:
+            for entry in big_file.entries:
+                if entry.raw_size == 0 or entry.file_type == "DDS":
+                    continue
+                if entry.file_type != "APT":
+                    if big_file.peek(entry, len(_APT_MAGIC)) != _APT_MAGIC:
+                        continue
+                found.update(m.group(1).decode('ascii') for m in _OVERLAY_TOKEN.finditer(entry.data))
+    except (ValueError, OSError) as e:
+        logging.debug(f"TOC-based name detection unavailable for {file_path}: {e}")
+    return found
+
+
+@lru_cache(maxsize=8)
+def _name_pattern(known_names: Tuple[str, ...]) -> "re.Pattern":
+    # Longest names first, and no digit on either side, so "5002" never matches inside "15002".
+    alternatives = b"|".join(re.escape(n.encode('ascii')) for n in sorted(known_names, key=len, reverse=True))
+    return re.compile(rb"(?<!\d)(" + alternatives + rb")(?!\d)")
+
+
+def _names_from_scan(file_path: str, known_names: Tuple[str, ...]) -> Set[str]:
+    with open(file_path, 'rb') as f:
+        content = f.read(_FALLBACK_SCAN_BYTES)
+    return {m.group(1).decode('ascii') for m in _name_pattern(known_names).finditer(content)}